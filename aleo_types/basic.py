@@ -8,13 +8,18 @@ from .traits import *
 
 
 class Bech32m:
+    # class level default keeps instances pickled before the string was cached loadable
+    _str: Optional[str] = None
 
-    def __init__(self, data: bytes, prefix: str):
+    def __init__(self, data: bytes, prefix: str, encoded: Optional[str] = None):
         self.data = data
         self.prefix = prefix
+        self._str = encoded
 
     def __str__(self):
-        return aleo_explorer_rust.bech32_encode(self.prefix, self.data)
+        if self._str is None:
+            self._str = aleo_explorer_rust.bech32_encode(self.prefix, self.data)
+        return self._str
 
     def __repr__(self):
         return str(self)
@@ -1,4 +1,6 @@
 import functools
+import io
+import pickle
 from types import GenericAlias
 from typing import Generic, TypeVar, Optional, TypeVarTuple, TypeGuard, cast, Callable, Hashable
 
@@ -22,7 +24,14 @@ def tp_cache(func: Optional[Callable[..., Any]] = None, /, *, typed: bool = Fals
     For non-hashable arguments, the original function is used as a fallback.
     """
     def decorator(func: Callable[..., Any]):
-        cached = functools.lru_cache(maxsize=None, typed=typed)(func)
+        # remember how each parametrized class was made so it can be pickled by reference, see GenericPickler
+        def tagged(*args: Hashable, **kwds: Hashable):
+            alias = func(*args, **kwds)
+            if isinstance(alias, GenericAlias) and not kwds:
+                alias.__origin__._generic_args = args
+            return alias
+
+        cached = functools.lru_cache(maxsize=None, typed=typed)(tagged)
 
         @functools.wraps(func)
         def inner(*args: Hashable, **kwds: Hashable):
@@ -30,7 +39,7 @@ def tp_cache(func: Optional[Callable[..., Any]] = None, /, *, typed: bool = Fals
                 return cached(*args, **kwds)
             except TypeError:
                 pass  # All real errors (not unhashable args) are raised below.
-            return func(*args, **kwds)
+            return tagged(*args, **kwds)
         return inner
 
     if func is not None:
@@ -38,6 +47,27 @@ def tp_cache(func: Optional[Callable[..., Any]] = None, /, *, typed: bool = Fals
 
     return decorator
 
+def _load_generic(cls: Any, key: Any) -> type:
+    return cls[key].__origin__
+
+class GenericPickler(pickle.Pickler):
+    """
+    Pickler for decoded aleo types. Parametrized classes like Vec[Block, u8] are created on the fly and can't be
+    found by name, so they are pickled as the generic class and its parameters instead. Unpickling goes through the
+    tp_cache of the receiving process and yields the same class objects its own code uses.
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, type) and "_generic_args" in obj.__dict__:
+            return _load_generic, obj.__dict__["_generic_args"]
+        return NotImplemented
+
+    @classmethod
+    def dumps(cls, obj: Any) -> bytes:
+        f = io.BytesIO()
+        cls(f, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+        return f.getvalue()
+
 def is_serializable(t: Any) -> TypeGuard[TType[Serializable]]:
     return isinstance(t, Serializable)
 
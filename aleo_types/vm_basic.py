@@ -27,13 +27,17 @@ class AleoID(AleoIDProtocol):
         return self
 
     @classmethod
-    def loads(cls, data: str):
+    def loads(cls, data: str) -> Self:
         hrp, raw = aleo_explorer_rust.bech32_decode(data)
         if hrp != cls._prefix:
             raise ValueError("incorrect hrp")
         if len(raw) != cls.size:
             raise ValueError("incorrect length")
-        return cls(bytes(raw))
+        self = cls(bytes(raw))
+        # bech32 is either all lower or all upper case, so the lowered input is the canonical encoding and doesn't
+        # have to be encoded again on str()
+        self._bech32m = Bech32m(self._data, cls._prefix, data.lower())
+        return self
 
     def __str__(self):
         return str(self._bech32m)
@@ -65,13 +69,17 @@ class AleoObject(AleoIDProtocol):
         return self
 
     @classmethod
-    def loads(cls, data: str):
+    def loads(cls, data: str) -> Self:
         hrp, raw = aleo_explorer_rust.bech32_decode(data)
         if hrp != cls._prefix:
             raise ValueError("incorrect hrp")
         if len(raw) != cls.size:
             raise ValueError("incorrect length")
-        return cls(bytes(raw))
+        self = cls(bytes(raw))
+        # bech32 is either all lower or all upper case, so the lowered input is the canonical encoding and doesn't
+        # have to be encoded again on str()
+        self._bech32m = Bech32m(self._data, cls._prefix, data.lower())
+        return self
 
     def __str__(self):
         return str(self._bech32m)
@@ -125,6 +133,11 @@ class Address(AleoObject, Cast):
             raise ValueError("invalid type")
         return destination_type.primitive_type.load(BytesIO(aleo_explorer_rust.cast(str(self), LiteralType.Address, destination_type, lossy)))
 
+    # addresses are never mutated, so repeated loads of hot addresses share one instance (and its encoded string)
+    @classmethod
+    def loads(cls, data: str) -> Self:
+        return cast(Self, _cached_address_loads(cls, data))
+
     def __hash__(self):
         return hash(self._data)
 
@@ -134,6 +147,11 @@ class Address(AleoObject, Cast):
         return self._data == other._data
 
 
+@lru_cache(maxsize=65536)
+def _cached_address_loads(cls: type[Address], data: str) -> AleoObject:
+    return super(Address, cls).loads(data)
+
+
 class Field(Serializable, Double, Sub, Square, Div, Sqrt, Compare, Pow, Inv, Neg, Cast):
     # Fr, Fp256
     # Just store as a large integer now
@@ -448,11 +466,21 @@ class Signature(Serializable):
 
 
 class Data(Serializable, Generic[T]):
+    """
+    Length prefixed payload. Loading only keeps a view of the payload bytes, which are decoded on the first access
+    of `value`; an untouched payload is dumped as the original bytes.
+
+    This only saves work for payloads nobody reads, such as unconfirmed transactions and solutions that are dropped
+    or forwarded. Block responses are decoded in full as soon as they arrive, every block is inserted anyway.
+    """
     types: TType[T]
     version = u8(1)
 
-    def __init__(self, value: T):
-        self.value = value
+    def __init__(self, value: Optional[T] = None, *, raw: Optional[bytes | memoryview] = None):
+        if value is None and raw is None:
+            raise ValueError("expected value or raw data")
+        self._value = value
+        self._raw = raw
 
     @tp_cache
     def __class_getitem__(cls, key) -> GenericAlias:
@@ -463,8 +491,19 @@ class Data(Serializable, Generic[T]):
         )
         return GenericAlias(param_type, key)
 
+    @property
+    def value(self) -> T:
+        if self._value is None:
+            self._value = self.types.load(BytesIO(cast(bytes | memoryview, self._raw)))
+            # the decoded value may be changed from now on, so it is the source of truth for dump
+            self._raw = None
+        return self._value
+
     def dump(self) -> bytes:
-        data = self.value.dump()
+        if self._raw is not None:
+            data = bytes(self._raw)
+        else:
+            data = self.value.dump()
         return self.version.dump() + len(data).to_bytes(4, "little") + data
 
     @classmethod
@@ -475,5 +514,16 @@ class Data(Serializable, Generic[T]):
         if version != cls.version:
             raise ValueError(f"expected version {cls.version}, got {version}")
         size = u32.load(data)
-        value = cls.types.load(BytesIO(data.read(size)))
-        return cls(value)
+        start = data.tell()
+        # getvalue returns the bytes the BytesIO was created from without copying, so this is a view into the frame
+        raw = memoryview(data.getvalue())[start:start + size]
+        if len(raw) != size:
+            raise ValueError("unexpected end of data")
+        data.seek(start + size)
+        return cls(raw=raw)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        if isinstance(self._raw, memoryview):
+            state["_raw"] = bytes(self._raw)
+        return state
@@ -3001,6 +3001,34 @@ class Transactions(Serializable):
                     total += fee.value.amount[1]
         return total
 
+    @property
+    def total_fee(self):
+        total = 0
+        for ctx in self:
+            tx = ctx.transaction
+            if isinstance(tx, (DeployTransaction, FeeTransaction)):
+                total += sum(cast(Fee, tx.fee).amount)
+            elif isinstance(tx, ExecuteTransaction):
+                fee = cast(Option[Fee], tx.fee)
+                if fee.value is not None:
+                    total += sum(fee.value.amount)
+        return total
+
+    @property
+    def transition_count(self):
+        total = 0
+        for ctx in self:
+            tx = ctx.transaction
+            if isinstance(tx, ExecuteTransaction):
+                total += len(tx.execution.transitions)
+                if cast(Option[Fee], tx.fee).value is not None:
+                    total += 1
+            else:
+                total += 1
+            if isinstance(ctx, RejectedExecute):
+                total += len(cast(RejectedExecution, ctx.rejected).execution.transitions)
+        return total
+
 class BlockHeaderMetadata(Serializable):
     version = u8(1)
 
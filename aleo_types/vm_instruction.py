@@ -181,7 +181,9 @@ class ProgramID(Serializable):
         network = Identifier.load(data)
         return cls(name=name, network=network)
 
+    # program ids are looked up by string all over the explorer and never mutated, keep the hot ones interned
     @classmethod
+    @lru_cache(maxsize=65536)
     def loads(cls, data: str):
         (name, network) = data.split(".")
         return cls(name=Identifier(value=name), network=Identifier(value=network))
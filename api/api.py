@@ -12,15 +12,18 @@ from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
-from starlette.routing import Route
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket
 
 from db import Database
 from middleware.api_filter import APIFilterMiddleware
 from middleware.api_quota import APIQuotaMiddleware
 from middleware.asgi_logger import AccessLoggerMiddleware
+from middleware.response_cache import ResponseCacheMiddleware
 from middleware.server_timing import ServerTimingMiddleware
-from util.cache import Cache
+from util.chain_tip import chain_tip
 from util.set_proc_title import set_proc_title
+from util.stream import stream_hub
 from .execute_routes import preview_finalize_route
 from .mapping_routes import mapping_route, mapping_list_route, mapping_value_list_route, mapping_key_count_route
 from .utils import get_remote_height
@@ -51,8 +54,7 @@ async def status_route(request: Request):
         node_height = await get_remote_height(session, rpc_root)
     if ref_rpc_root := os.environ.get("REF_RPC_URL_ROOT"):
         reference_height = await get_remote_height(session, ref_rpc_root)
-    latest_block_height = await db.get_latest_height()
-    latest_block_timestamp = await db.get_latest_block_timestamp()
+    latest_block_height, _, latest_block_timestamp = await chain_tip.get(db)
     res = {
         "server_time": int(time.time()),
         "latest_block_height": latest_block_height,
@@ -60,7 +62,13 @@ async def status_route(request: Request):
         "node_height": node_height,
         "reference_height": reference_height,
     }
-    return JSONResponse(res)
+    return JSONResponse(res, headers={'Cache-Control': 'no-cache'})
+
+async def stream_route(websocket: WebSocket):
+    version = websocket.path_params["version"]
+    if version < 2:
+        return await websocket.close(code=1008, reason="This endpoint is not supported in this version")
+    await stream_hub.websocket(websocket)
 
 
 routes = [
@@ -70,6 +78,7 @@ routes = [
     Route("/v{version:int}/mapping/get_key_count/{program_id}/{mapping}", mapping_key_count_route),
     Route("/v{version:int}/simulate_execution/finalize", preview_finalize_route, methods=["POST"]),
     Route("/v{version:int}/status", status_route),
+    WebSocketRoute("/v{version:int}/stream", stream_route),
 ]
 
 async def startup():
@@ -84,7 +93,7 @@ async def startup():
                   message_callback=noop)
     await db.connect()
     app.state.db = db
-    app.state.program_cache = Cache()
+    chain_tip.start(db)
     app.state.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=1))
     set_proc_title("aleo-explorer: api")
 
@@ -100,6 +109,7 @@ app = Starlette(
         Middleware(ServerTimingMiddleware),
         Middleware(APIQuotaMiddleware),
         Middleware(APIFilterMiddleware),
+        Middleware(ResponseCacheMiddleware, default_ttl=60),
     ]
 )
 
@@ -1,4 +1,3 @@
-from io import BytesIO
 from typing import cast, Any
 
 from starlette.requests import Request
@@ -8,10 +7,10 @@ from aleo_types import Program, Identifier, Finalize, LiteralPlaintextType, \
     LiteralPlaintext, Literal, StructPlaintextType, StructPlaintext, FinalizeOperation, Value, \
     PlaintextFinalizeType, FutureFinalizeType, PlaintextValue, Future, FinalizeInput, Argument, PlaintextArgument, \
     FutureValue, FutureArgument, u8, Vec
-from api.utils import use_program_cache
 from db import Database
 from interpreter.finalizer import ExecuteError
 from interpreter.interpreter import preview_finalize_execution
+from util.global_cache import get_program
 
 
 class LoadError(Exception):
@@ -19,18 +18,13 @@ class LoadError(Exception):
         self.error = error
         self.status_code = status_code
 
-async def _load_program_finalize_inputs(db, program_id, program_cache, function_name) -> (Program, list[FinalizeInput]):
+async def _load_program_finalize_inputs(db, program_id, function_name) -> (Program, list[FinalizeInput]):
     try:
-        try:
-            program = program_cache[program_id]
-        except KeyError:
-            program_bytes = await db.get_program(program_id)
-            if not program_bytes:
-                raise LoadError("Program not found", 404)
-            program = Program.load(BytesIO(program_bytes))
-            program_cache[program_id] = program
+        program = await get_program(db, program_id)
     except:
         raise LoadError("Program not found", 404)
+    if program is None:
+        raise LoadError("Program not found", 404)
     if function_name not in program.functions:
         return JSONResponse({"error": "Transition not found"}, status_code=404)
     function = program.functions[function_name]
@@ -39,7 +33,7 @@ async def _load_program_finalize_inputs(db, program_id, program_cache, function_
     finalize: Finalize = function.finalize.value
     return program, finalize.inputs
 
-async def _load_args(db, program, program_cache, input_, finalize_type, index) -> Value:
+async def _load_args(db, program, input_, finalize_type, index) -> Value:
     if isinstance(finalize_type, PlaintextFinalizeType):
         plaintext_type = finalize_type.plaintext_type
         if isinstance(plaintext_type, LiteralPlaintextType):
@@ -67,13 +61,13 @@ async def _load_args(db, program, program_cache, input_, finalize_type, index) -
         if not isinstance(args, list):
             raise LoadError(f"Invalid input for index {index} (future arguments should be an array)", 400)
 
-        future_program, finalize_inputs = await _load_program_finalize_inputs(db, str(program_id), program_cache, function_name)
+        future_program, finalize_inputs = await _load_program_finalize_inputs(db, str(program_id), function_name)
         arguments: list[Argument] = []
         for arg_index, finalize_input in enumerate(finalize_inputs):
             arg_finalize_type = finalize_input.finalize_type
             if arg_index >= len(args):
                 raise LoadError(f"Missing input for index {index}, program {program_id}", 400)
-            value = await _load_args(db, future_program, program_cache, args[arg_index], arg_finalize_type, arg_index)
+            value = await _load_args(db, future_program, args[arg_index], arg_finalize_type, arg_index)
             if isinstance(value, PlaintextValue):
                 arguments.append(PlaintextArgument(plaintext=value.plaintext))
             elif isinstance(value, FutureValue):
@@ -88,8 +82,7 @@ async def _load_args(db, program, program_cache, input_, finalize_type, index) -
         )
         return FutureValue(future=future)
 
-@use_program_cache
-async def preview_finalize_route(request: Request, program_cache: dict[str, Program]):
+async def preview_finalize_route(request: Request):
     db: Database = request.app.state.db
     _ = request.path_params["version"]
     json = await request.json()
@@ -108,7 +101,7 @@ async def preview_finalize_route(request: Request, program_cache: dict[str, Prog
 
     function_name = Identifier.loads(transition_name)
     try:
-        program, finalize_inputs = await _load_program_finalize_inputs(db, program_id, program_cache, function_name)
+        program, finalize_inputs = await _load_program_finalize_inputs(db, program_id, function_name)
     except LoadError as e:
         return JSONResponse({"error": e.error}, status_code=e.status_code)
     except Exception as e:
@@ -119,7 +112,7 @@ async def preview_finalize_route(request: Request, program_cache: dict[str, Prog
         if index >= len(inputs):
             return JSONResponse({"error": f"Missing input for index {index}"}, status_code=400)
         try:
-            values.append(await _load_args(db, program, program_cache, inputs[index], finalize_type, index))
+            values.append(await _load_args(db, program, inputs[index], finalize_type, index))
         except LoadError as e:
             return JSONResponse({"error": e.error}, status_code=e.status_code)
         except Exception as e:
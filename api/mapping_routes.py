@@ -3,28 +3,23 @@ from io import BytesIO
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from aleo_types import Program, Value, LiteralPlaintextType, LiteralPlaintext, \
+from aleo_types import Value, LiteralPlaintextType, LiteralPlaintext, \
     Literal, StructPlaintextType, StructPlaintext, cached_get_key_id
-from api.utils import async_check_sync, use_program_cache
+from api.utils import async_check_sync
 from db import Database
+from util.global_cache import get_program
 
 
 @async_check_sync
-@use_program_cache
-async def mapping_route(request: Request, program_cache: dict[str, Program]):
+async def mapping_route(request: Request):
     db: Database = request.app.state.db
     _ = request.path_params["version"]
     program_id = request.path_params["program_id"]
     mapping = request.path_params["mapping"]
     key = request.path_params["key"]
-    try:
-        program = program_cache[program_id]
-    except KeyError:
-        program = await db.get_program(program_id)
-        if not program:
-            return JSONResponse({"error": "Program not found"}, status_code=404)
-        program = Program.load(BytesIO(program))
-        program_cache[program_id] = program
+    program = await get_program(db, program_id)
+    if program is None:
+        return JSONResponse({"error": "Program not found"}, status_code=404)
     if mapping not in program.mappings:
         return JSONResponse({"error": "Mapping not found"}, status_code=404)
     map_key_type = program.mappings[mapping].key.plaintext_type
@@ -52,37 +47,25 @@ async def mapping_route(request: Request, program_cache: dict[str, Program]):
     return JSONResponse(str(Value.load(BytesIO(value))))
 
 @async_check_sync
-@use_program_cache
-async def mapping_list_route(request: Request, program_cache: dict[str, Program]):
+async def mapping_list_route(request: Request):
     db: Database = request.app.state.db
     _ = request.path_params["version"]
     program_id = request.path_params["program_id"]
-    try:
-        program = program_cache[program_id]
-    except KeyError:
-        program = await db.get_program(program_id)
-        if not program:
-            return JSONResponse({"error": "Program not found"}, status_code=404)
-        program = Program.load(BytesIO(program))
-        program_cache[program_id] = program
+    program = await get_program(db, program_id)
+    if program is None:
+        return JSONResponse({"error": "Program not found"}, status_code=404)
     mappings = program.mappings
     return JSONResponse(list(map(str, mappings.keys())))
 
 @async_check_sync
-@use_program_cache
-async def mapping_value_list_route(request: Request, program_cache: dict[str, Program]):
+async def mapping_value_list_route(request: Request):
     db: Database = request.app.state.db
     version = request.path_params["version"]
     program_id = request.path_params["program_id"]
     mapping = request.path_params["mapping"]
-    try:
-        program = program_cache[program_id]
-    except KeyError:
-        program = await db.get_program(program_id)
-        if not program:
-            return JSONResponse({"error": "Program not found"}, status_code=404)
-        program = Program.load(BytesIO(program))
-        program_cache[program_id] = program
+    program = await get_program(db, program_id)
+    if program is None:
+        return JSONResponse({"error": "Program not found"}, status_code=404)
     mappings = program.mappings
     if mapping not in mappings:
         return JSONResponse({"error": "Mapping not found"}, status_code=404)
@@ -113,22 +96,16 @@ async def mapping_value_list_route(request: Request, program_cache: dict[str, Pr
         return JSONResponse({"result": res, "cursor": mapping_data[1]})
 
 @async_check_sync
-@use_program_cache
-async def mapping_key_count_route(request: Request, program_cache: dict[str, Program]):
+async def mapping_key_count_route(request: Request):
     db: Database = request.app.state.db
     version = request.path_params["version"]
     if version <= 1:
         return JSONResponse({"error": "This endpoint is not supported in this version"}, status_code=400)
     program_id = request.path_params["program_id"]
     mapping = request.path_params["mapping"]
-    try:
-        program = program_cache[program_id]
-    except KeyError:
-        program = await db.get_program(program_id)
-        if not program:
-            return JSONResponse({"error": "Program not found"}, status_code=404)
-        program = Program.load(BytesIO(program))
-        program_cache[program_id] = program
+    program = await get_program(db, program_id)
+    if program is None:
+        return JSONResponse({"error": "Program not found"}, status_code=404)
     mappings = program.mappings
     if mapping not in mappings:
         return JSONResponse({"error": "Mapping not found"}, status_code=404)
@@ -6,10 +6,11 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
 
 from db import Database
+from util.chain_tip import chain_tip
 
 
 async def out_of_sync_check(db: Database) -> bool:
-    last_timestamp = await db.get_latest_block_timestamp()
+    last_timestamp = await chain_tip.get_timestamp(db)
     now = int(time.time())
     if now - last_timestamp > 120:
         return True
@@ -27,16 +28,6 @@ def async_check_sync(func: Callable[..., Coroutine[Any, Any, Response]]):
         return await func(*args, **kwargs)
     return wrapper
 
-def use_program_cache(func: Callable[..., Coroutine[Any, Any, Response]]):
-    async def wrapper(*args: Any, **kwargs: Any):
-        if len(args) < 1 or not isinstance(args[0], Request):
-            raise TypeError("this decorator cannot be used on this function")
-        request: Request = args[0]
-        program_cache = request.app.state.program_cache
-        kwargs["program_cache"] = program_cache
-        return await func(*args, **kwargs)
-    return wrapper
-
 async def get_remote_height(session: aiohttp.ClientSession, rpc_root: str) -> Optional[int]:
     try:
         async with session.get(f"{rpc_root}/testnet3/latest/height") as resp:
@@ -0,0 +1,41 @@
+"""
+Fills the raw block store with the blocks saved before BLOCK_RAW_STORE was enabled.
+
+    python block_raw_backfill.py [--workers N]
+
+Rebuilding a block from its rows is CPU heavy, so this runs as its own job next to the explorer instead of inside it.
+It can be stopped and restarted at any time, blocks already in the store are skipped.
+"""
+
+import argparse
+import asyncio
+import os
+from typing import Any
+
+from dotenv import load_dotenv
+
+from db import Database
+from util.set_proc_title import set_proc_title
+
+load_dotenv()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Store the blocks missing from the raw block store")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("BLOCK_RAW_BACKFILL_WORKERS", 4)))
+    args = parser.parse_args()
+
+    async def noop(_: Any): pass
+
+    db = Database(server=os.environ["DB_HOST"], user=os.environ["DB_USER"], password=os.environ["DB_PASS"],
+                  database=os.environ["DB_DATABASE"], schema=os.environ["DB_SCHEMA"],
+                  redis_server=os.environ["REDIS_HOST"], redis_port=int(os.environ["REDIS_PORT"]),
+                  redis_db=int(os.environ["REDIS_DB"]), redis_user=os.environ.get("REDIS_USER"),
+                  redis_password=os.environ.get("REDIS_PASS"),
+                  message_callback=noop)
+    await db.connect()
+    set_proc_title("aleo-explorer: raw block backfill")
+    await db.backfill_block_raw(args.workers)
+
+if __name__ == '__main__':
+    asyncio.run(main())
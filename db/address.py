@@ -3,6 +3,9 @@ from __future__ import annotations
 
 import time
 
+import psycopg
+import psycopg.sql
+
 from aleo_types import *
 from explorer.types import Message as ExplorerMessage
 from .base import DatabaseBase
@@ -49,19 +52,23 @@ class DatabaseAddress(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def get_solution_by_address(self, address: str, start: int, end: int) -> list[dict[str, Any]]:
+    async def get_solution_by_address(self, address: str, start: int, end: int,
+                                      cursor: Optional[int] = None) -> list[dict[str, Any]]:
+        # solutions are inserted together with their block, so the solution id orders them by height
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    before = "AND s.id < %s " if cursor is not None else ""
+                    params: tuple[Any, ...] = (address, cursor) if cursor is not None else (address,)
                     await cur.execute(
-                        "SELECT b.height, b.timestamp, s.counter, s.target, reward, ps.target_sum "
+                        "SELECT s.id, b.height, b.timestamp, s.counter, s.target, reward, ps.target_sum "
                         "FROM solution s "
                         "JOIN puzzle_solution ps ON ps.id = s.puzzle_solution_id "
                         "JOIN block b ON b.id = ps.block_id "
-                        "WHERE s.address = %s "
-                        "ORDER BY ps.id DESC "
+                        f"WHERE s.address = %s {before}"
+                        "ORDER BY s.id DESC "
                         "LIMIT %s OFFSET %s",
-                        (address, end - start, start)
+                        (*params, end - start, start)
                     )
                     return await cur.fetchall()
                 except Exception as e:
@@ -88,53 +95,36 @@ class DatabaseAddress(DatabaseBase):
                     raise
 
 
-    async def get_address_recent_transitions(self, address: str) -> list[dict[str, Any]]:
+    async def get_address_activity(self, address: str, start: int, end: int, program_id: Optional[str] = None,
+                                   cursor: Optional[tuple[int, int]] = None) -> list[dict[str, Any]]:
+        # cursor is (height, id) of the last row on the previous page
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    conditions = ["address = %s"]
+                    params: list[Any] = [address]
+                    if program_id is not None:
+                        conditions.append("program_id = %s")
+                        params.append(program_id)
+                    if cursor is not None:
+                        conditions.append("(height, id) < (%s, %s)")
+                        params.extend(cursor)
                     await cur.execute(
-                        """
-WITH ats AS
-    (SELECT DISTINCT transition_id
-     FROM address_transition
-     WHERE address = %s
-     ORDER BY transition_id DESC
-     LIMIT 30)
-SELECT DISTINCT ts.transition_id,
-                b.height,
-                b.timestamp
-FROM ats
-JOIN transition ts ON ats.transition_id = ts.id
-JOIN transaction_execute te ON te.id = ts.transaction_execute_id
-JOIN transaction tx ON tx.id = te.transaction_id
-JOIN confirmed_transaction ct ON ct.id = tx.confirmed_transaction_id
-JOIN block b ON b.id = ct.block_id
-UNION
-SELECT DISTINCT ts.transition_id,
-                b.height,
-                b.timestamp
-FROM ats
-JOIN transition ts ON ats.transition_id = ts.id
-JOIN fee f ON f.id = ts.fee_id
-JOIN transaction tx ON tx.id = f.transaction_id
-JOIN confirmed_transaction ct ON ct.id = tx.confirmed_transaction_id
-JOIN block b ON b.id = ct.block_id
-ORDER BY height DESC
-LIMIT 30
-""",
-                        (address,)
+                        "SELECT id, height, timestamp, transition_id, program_id, function_name, direction "
+                        "FROM address_activity "
+                        f"WHERE {' AND '.join(conditions)} "
+                        "ORDER BY height DESC, id DESC "
+                        "LIMIT %s OFFSET %s",
+                        (*params, end - start, start)
                     )
-                    def transform(x: dict[str, Any]):
-                        return {
-                            "transition_id": x["transition_id"],
-                            "height": x["height"],
-                            "timestamp": x["timestamp"]
-                        }
-                    return list(map(lambda x: transform(x), await cur.fetchall()))
+                    return await cur.fetchall()
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
+    async def get_address_recent_transitions(self, address: str) -> list[dict[str, Any]]:
+        return await self.get_address_activity(address, 0, 30)
+
     async def get_address_stake_reward(self, address: str) -> Optional[int]:
         data = await self.redis.hget("address_stake_reward", address)
         if data is None:
@@ -159,34 +149,62 @@ LIMIT 30
             return None
         return int(data)
 
+    async def get_address_stats(self, address: str) -> dict[str, Optional[int]]:
+        # same as the four getters above, in one round trip
+        keys = ["address_stake_reward", "address_transfer_in", "address_transfer_out", "address_fee"]
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(key, address)
+        return {key: None if data is None else int(data) for key, data in zip(keys, await pipe.execute())}
+
+    # solutions are rolled up into fixed buckets of this many seconds, see rollup_speed_buckets
+    speed_bucket_size = 300
+
+    @staticmethod
+    async def rollup_speed_buckets(cur: psycopg.AsyncCursor[dict[str, Any]], since: int):
+        # every solution is weighted by the proof target of the block before the one it was included in
+        await cur.execute(
+            "INSERT INTO prover_speed_bucket (address, bucket, solution_count, weighted_target) "
+            "SELECT s.address, b.timestamp / %(size)s * %(size)s, COUNT(*), SUM(pb.proof_target) "
+            "FROM solution s "
+            "JOIN puzzle_solution ps ON s.puzzle_solution_id = ps.id "
+            "JOIN block b ON ps.block_id = b.id "
+            "JOIN block pb ON pb.height = b.height - 1 "
+            "WHERE b.timestamp >= %(since)s "
+            "GROUP BY 1, 2",
+            {"size": DatabaseAddress.speed_bucket_size, "since": since}
+        )
+        await cur.execute(
+            "INSERT INTO network_speed_bucket (bucket, solution_count, weighted_target) "
+            "SELECT bucket, SUM(solution_count), SUM(weighted_target) FROM prover_speed_bucket "
+            "WHERE bucket >= %s GROUP BY bucket",
+            (since,)
+        )
+
+    @staticmethod
+    def _speed_window_start(now: int, interval: int) -> int:
+        # first whole bucket inside the window, the partial bucket at the start is left out
+        size = DatabaseAddress.speed_bucket_size
+        return (now - interval + size - 1) // size * size
+
     async def get_address_speed(self, address: str) -> tuple[float, int]: # (speed, interval)
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 interval_list = [900, 1800, 3600, 14400, 43200, 86400]
                 now = int(time.time())
                 try:
+                    await cur.execute(
+                        "SELECT bucket, solution_count, weighted_target FROM prover_speed_bucket "
+                        "WHERE address = %s AND bucket >= %s",
+                        (address, self._speed_window_start(now, interval_list[-1]))
+                    )
+                    buckets = await cur.fetchall()
                     for interval in interval_list:
-                        await cur.execute(
-                            "SELECT b.height FROM solution s "
-                            "JOIN puzzle_solution ps ON s.puzzle_solution_id = ps.id "
-                            "JOIN block b ON ps.block_id = b.id "
-                            "WHERE address = %s AND timestamp > %s",
-                            (address, now - interval)
-                        )
-                        partial_solutions = await cur.fetchall()
-                        if len(partial_solutions) < 10:
+                        start = self._speed_window_start(now, interval)
+                        window = [b for b in buckets if b["bucket"] >= start]
+                        if sum(b["solution_count"] for b in window) < 10:
                             continue
-                        heights = list(map(lambda x: x['height'], partial_solutions))
-                        ref_heights = list(map(lambda x: x - 1, set(heights)))
-                        await cur.execute(
-                            "SELECT height, proof_target FROM block WHERE height = ANY(%s::bigint[])", (ref_heights,)
-                        )
-                        ref_proof_targets = await cur.fetchall()
-                        ref_proof_target_dict = dict(map(lambda x: (x['height'], x['proof_target']), ref_proof_targets))
-                        total_solutions = 0
-                        for height in heights:
-                            total_solutions += ref_proof_target_dict[height - 1]
-                        return total_solutions / interval, interval
+                        return float(sum(b["weighted_target"] for b in window)) / (now - start), interval
                     return 0, 0
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
@@ -196,27 +214,48 @@ LIMIT 30
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 now = int(time.time())
-                interval = 900
+                start = self._speed_window_start(now, 900)
                 try:
                     await cur.execute(
-                        "SELECT b.height FROM solution s "
-                        "JOIN puzzle_solution ps ON s.puzzle_solution_id = ps.id "
-                        "JOIN block b ON ps.block_id = b.id "
-                        "WHERE timestamp > %s",
-                        (now - interval,)
+                        "SELECT SUM(weighted_target) AS total FROM network_speed_bucket WHERE bucket >= %s",
+                        (start,)
                     )
-                    partial_solutions = await cur.fetchall()
-                    heights = list(map(lambda x: x['height'], partial_solutions))
-                    ref_heights = list(map(lambda x: x - 1, set(heights)))
+                    if (res := await cur.fetchone()) is None or res["total"] is None:
+                        return 0
+                    return float(res["total"]) / (now - start)
+                except Exception as e:
+                    await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                    raise
+
+    async def get_address_speed_history(self, address: str, since: int) -> list[tuple[int, float]]: # (bucket, speed)
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await cur.execute(
+                        "SELECT bucket, weighted_target FROM prover_speed_bucket "
+                        "WHERE address = %s AND bucket >= %s ORDER BY bucket",
+                        (address, since)
+                    )
+                    return [
+                        (row["bucket"], float(row["weighted_target"]) / self.speed_bucket_size)
+                        for row in await cur.fetchall()
+                    ]
+                except Exception as e:
+                    await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                    raise
+
+    async def get_network_speed_history(self, since: int) -> list[tuple[int, float]]: # (bucket, speed)
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                try:
                     await cur.execute(
-                        "SELECT height, proof_target FROM block WHERE height = ANY(%s::bigint[])", (ref_heights,)
+                        "SELECT bucket, weighted_target FROM network_speed_bucket WHERE bucket >= %s ORDER BY bucket",
+                        (since,)
                     )
-                    ref_proof_targets = await cur.fetchall()
-                    ref_proof_target_dict = dict(map(lambda x: (x['height'], x['proof_target']), ref_proof_targets))
-                    total_solutions = 0
-                    for height in heights:
-                        total_solutions += ref_proof_target_dict[height - 1]
-                    return total_solutions / interval
+                    return [
+                        (row["bucket"], float(row["weighted_target"]) / self.speed_bucket_size)
+                        for row in await cur.fetchall()
+                    ]
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import os
 from asyncio import iscoroutinefunction
+from collections import defaultdict
 from typing import Awaitable, ParamSpec
 
+import psycopg
+import psycopg.sql
 from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 from redis.asyncio import Redis
@@ -27,6 +30,55 @@ except ImportError:
                 return func(*args, **kwargs)
             return wrapper
 
+class RedisWriter:
+    """
+    Collects the redis mutations of a block and applies them with a single MULTI/EXEC pipeline. Increments are
+    summed per field first, so any number of transfers to one address end up as one HINCRBY.
+    """
+
+    def __init__(self):
+        self.replaced: dict[str, dict[str, str]] = {}
+        # None marks a removed field
+        self.fields: defaultdict[str, dict[str, Optional[str]]] = defaultdict(dict)
+        self.increments: defaultdict[str, defaultdict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def replace_hash(self, name: str, mapping: dict[str, str]):
+        self.replaced[name] = dict(mapping)
+        self.fields.pop(name, None)
+
+    def hset(self, name: str, key: str, value: str):
+        self.fields[name][key] = value
+
+    def hdel(self, name: str, key: str):
+        self.fields[name][key] = None
+
+    def hincrby(self, name: str, key: str, amount: int):
+        self.increments[name][key] += amount
+
+    async def execute(self, redis_conn: Redis[str]):
+        pipe = redis_conn.pipeline(transaction=True)
+        for name, mapping in self.replaced.items():
+            pipe.delete(name)
+            if mapping:
+                pipe.hset(name, mapping=mapping)
+        for name, fields in self.fields.items():
+            updated = {k: v for k, v in fields.items() if v is not None}
+            removed = [k for k, v in fields.items() if v is None]
+            if updated:
+                pipe.hset(name, mapping=updated)
+            if removed:
+                pipe.hdel(name, *removed)
+        for name, increments in self.increments.items():
+            for key, amount in increments.items():
+                if amount != 0:
+                    pipe.hincrby(name, key, amount)
+        if len(pipe) > 0:
+            await pipe.execute()
+        self.replaced.clear()
+        self.fields.clear()
+        self.increments.clear()
+
+
 class DatabaseBase:
 
     def __init__(self, *, server: str, user: str, password: str, database: str, schema: str, redis_server: str,
@@ -43,6 +95,9 @@ class DatabaseBase:
         self.redis_db = redis_db
         self.redis_user = redis_user
         self.redis_password = redis_password
+        # pub/sub channels are shared by all redis databases, so the channels are namespaced by ours
+        self.block_added_channel = f"explorer:{redis_db}:block_added"
+        self.unconfirmed_transaction_channel = f"explorer:{redis_db}:unconfirmed_transaction"
 
         self.pool: AsyncConnectionPool
         self.redis: Redis[str]
@@ -66,3 +121,36 @@ class DatabaseBase:
             return
         await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseConnected, None))
 
+    # these tables are range partitioned by height, one partition per this many blocks. Old partitions can be
+    # detached and archived without touching the recent ones the pages read.
+    partitioned_tables = ("address_activity", "mapping_history")
+    partition_size = 1_000_000
+    # end of the highest partitions known to exist, see ensure_partitions
+    _partition_end = 0
+
+    @staticmethod
+    async def create_partition(cur: psycopg.AsyncCursor[dict[str, Any]], table: str, index: int):
+        size = DatabaseBase.partition_size
+        await cur.execute(
+            psycopg.sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                psycopg.sql.Identifier(f"{table}_p{index}"),
+                psycopg.sql.Identifier(table),
+                psycopg.sql.Literal(index * size),
+                psycopg.sql.Literal((index + 1) * size),
+            )
+        )
+
+    @staticmethod
+    async def ensure_partitions(cur: psycopg.AsyncCursor[dict[str, Any]], height: int):
+        if height < DatabaseBase._partition_end:
+            return
+        index = height // DatabaseBase.partition_size
+        for table in DatabaseBase.partitioned_tables:
+            await DatabaseBase.create_partition(cur, table, index)
+        DatabaseBase._partition_end = (index + 1) * DatabaseBase.partition_size
+
+    @staticmethod
+    def forget_partitions():
+        # the partitions are created in the block's transaction, a rollback takes them away again
+        DatabaseBase._partition_end = 0
+
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import zlib
 from collections import defaultdict
+from typing import LiteralString
 
 import psycopg
 import psycopg.sql
@@ -10,6 +12,615 @@ from explorer.types import Message as ExplorerMessage
 from .base import DatabaseBase, profile
 
 
+class _BlockLoader:
+    """
+    Rebuilds blocks, confirmed transactions and transitions from the database with one query per table for the
+    whole set of rows, instead of walking the tree one row at a time. The number of queries doesn't depend on the
+    number of blocks, transactions or transitions being loaded.
+    """
+
+    def __init__(self, cur: psycopg.AsyncCursor[dict[str, Any]]):
+        self.cur = cur
+
+    async def _fetch(self, query: LiteralString, params: tuple[Any, ...]) -> list[dict[str, Any]]:
+        await self.cur.execute(query, params)
+        return await self.cur.fetchall()
+
+    # transition output future id -> future, None if the future was not stored
+    async def load_futures(self, transition_output_future_ids: list[int]) -> dict[int, Optional[Future]]:
+        if not transition_output_future_ids:
+            return {}
+        futures = await self._fetch(
+            "WITH RECURSIVE f AS ("
+            "    SELECT id, transition_output_future_id, future_argument_id, program_id, function_name FROM future "
+            "    WHERE type = 'Output' AND transition_output_future_id = ANY(%s::int[]) "
+            "    UNION ALL "
+            "    SELECT fu.id, fu.transition_output_future_id, fu.future_argument_id, fu.program_id, fu.function_name "
+            "    FROM future fu "
+            "    JOIN future_argument fa ON fu.future_argument_id = fa.id "
+            "    JOIN f ON fa.future_id = f.id "
+            "    WHERE fu.type = 'Argument'"
+            ") SELECT * FROM f",
+            (transition_output_future_ids,)
+        )
+        arguments = await self._fetch(
+            "SELECT id, future_id, type, plaintext FROM future_argument WHERE future_id = ANY(%s::int[]) ORDER BY id",
+            ([f["id"] for f in futures],)
+        )
+        future_arguments: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        for argument in arguments:
+            future_arguments[argument["future_id"]].append(argument)
+        argument_futures = {f["future_argument_id"]: f for f in futures if f["future_argument_id"] is not None}
+
+        def build(future: dict[str, Any]) -> Future:
+            args: list[Argument] = []
+            for argument in future_arguments[future["id"]]:
+                if argument["type"] == "Plaintext":
+                    args.append(PlaintextArgument(
+                        plaintext=Plaintext.load(BytesIO(argument["plaintext"]))
+                    ))
+                elif argument["type"] == "Future":
+                    if argument["id"] not in argument_futures:
+                        raise RuntimeError("database inconsistent")
+                    args.append(FutureArgument(future=build(argument_futures[argument["id"]])))
+                else:
+                    raise NotImplementedError
+            return Future(
+                program_id=ProgramID.loads(future["program_id"]),
+                function_name=Identifier.loads(future["function_name"]),
+                arguments=Vec[Argument, u8](args)
+            )
+
+        res: dict[int, Optional[Future]] = dict.fromkeys(transition_output_future_ids)
+        for future in futures:
+            if future["transition_output_future_id"] is not None:
+                res[future["transition_output_future_id"]] = build(future)
+        return res
+
+    # transition db id -> transition
+    async def load_transitions(self, transitions: list[dict[str, Any]]) -> dict[int, Transition]:
+        if not transitions:
+            return {}
+        transition_db_ids = [t["id"] for t in transitions]
+        transition_inputs = await self._fetch(
+            "SELECT ti.transition_id, ti.type, ti.index, tip.plaintext_hash, tip.plaintext, "
+            "tipr.ciphertext_hash, tipr.ciphertext, tir.serial_number, tir.tag, tie.commitment "
+            "FROM transition_input ti "
+            "LEFT JOIN transition_input_public tip ON tip.transition_input_id = ti.id "
+            "LEFT JOIN transition_input_private tipr ON tipr.transition_input_id = ti.id "
+            "LEFT JOIN transition_input_record tir ON tir.transition_input_id = ti.id "
+            "LEFT JOIN transition_input_external_record tie ON tie.transition_input_id = ti.id "
+            "WHERE ti.transition_id = ANY(%s::int[]) "
+            "ORDER BY ti.transition_id, ti.index",
+            (transition_db_ids,)
+        )
+        transition_outputs = await self._fetch(
+            "SELECT t.transition_id, t.type, t.index, top.plaintext_hash, top.plaintext, "
+            "topr.ciphertext_hash, topr.ciphertext, tor.commitment AS record_commitment, tor.checksum, "
+            "tor.record_ciphertext, toe.commitment AS external_record_commitment, tof.id AS future_id, tof.future_hash "
+            "FROM transition_output t "
+            "LEFT JOIN transition_output_public top ON top.transition_output_id = t.id "
+            "LEFT JOIN transition_output_private topr ON topr.transition_output_id = t.id "
+            "LEFT JOIN transition_output_record tor ON tor.transition_output_id = t.id "
+            "LEFT JOIN transition_output_external_record toe ON toe.transition_output_id = t.id "
+            "LEFT JOIN transition_output_future tof ON tof.transition_output_id = t.id "
+            "WHERE t.transition_id = ANY(%s::int[]) "
+            "ORDER BY t.transition_id, t.index",
+            (transition_db_ids,)
+        )
+        futures = await self.load_futures([
+            o["future_id"] for o in transition_outputs
+            if o["type"] == TransitionOutput.Type.Future.name and o["future_id"] is not None
+        ])
+
+        tis: dict[int, list[TransitionInput]] = defaultdict(list)
+        for transition_input in transition_inputs:
+            if transition_input["type"] == TransitionInput.Type.Public.name:
+                if transition_input["plaintext"] is None:
+                    plaintext = None
+                else:
+                    plaintext = Plaintext.load(BytesIO(transition_input["plaintext"]))
+                ti = PublicTransitionInput(
+                    plaintext_hash=Field.loads(transition_input["plaintext_hash"]),
+                    plaintext=Option[Plaintext](plaintext)
+                )
+            elif transition_input["type"] == TransitionInput.Type.Private.name:
+                if transition_input["ciphertext"] is None:
+                    ciphertext = None
+                else:
+                    ciphertext = Ciphertext.loads(transition_input["ciphertext"])
+                ti = PrivateTransitionInput(
+                    ciphertext_hash=Field.loads(transition_input["ciphertext_hash"]),
+                    ciphertext=Option[Ciphertext](ciphertext)
+                )
+            elif transition_input["type"] == TransitionInput.Type.Record.name:
+                ti = RecordTransitionInput(
+                    serial_number=Field.loads(transition_input["serial_number"]),
+                    tag=Field.loads(transition_input["tag"])
+                )
+            elif transition_input["type"] == TransitionInput.Type.ExternalRecord.name:
+                ti = ExternalRecordTransitionInput(
+                    input_commitment=Field.loads(transition_input["commitment"]),
+                )
+            else:
+                raise NotImplementedError
+            tis[transition_input["transition_id"]].append(ti)
+
+        tos: dict[int, list[TransitionOutput]] = defaultdict(list)
+        for transition_output in transition_outputs:
+            if transition_output["type"] == TransitionOutput.Type.Public.name:
+                if transition_output["plaintext"] is None:
+                    plaintext = None
+                else:
+                    plaintext = Plaintext.load(BytesIO(transition_output["plaintext"]))
+                to = PublicTransitionOutput(
+                    plaintext_hash=Field.loads(transition_output["plaintext_hash"]),
+                    plaintext=Option[Plaintext](plaintext)
+                )
+            elif transition_output["type"] == TransitionOutput.Type.Private.name:
+                if transition_output["ciphertext"] is None:
+                    ciphertext = None
+                else:
+                    ciphertext = Ciphertext.loads(transition_output["ciphertext"])
+                to = PrivateTransitionOutput(
+                    ciphertext_hash=Field.loads(transition_output["ciphertext_hash"]),
+                    ciphertext=Option[Ciphertext](ciphertext)
+                )
+            elif transition_output["type"] == TransitionOutput.Type.Record.name:
+                if transition_output["record_ciphertext"] is None:
+                    record_ciphertext = None
+                else:
+                    record_ciphertext = Record[Ciphertext].loads(transition_output["record_ciphertext"])
+                to = RecordTransitionOutput(
+                    commitment=Field.loads(transition_output["record_commitment"]),
+                    checksum=Field.loads(transition_output["checksum"]),
+                    record_ciphertext=Option[Record[Ciphertext]](record_ciphertext)
+                )
+            elif transition_output["type"] == TransitionOutput.Type.ExternalRecord.name:
+                to = ExternalRecordTransitionOutput(
+                    commitment=Field.loads(transition_output["external_record_commitment"]),
+                )
+            elif transition_output["type"] == TransitionOutput.Type.Future.name:
+                to = FutureTransitionOutput(
+                    future_hash=Field.loads(transition_output["future_hash"]),
+                    future=Option[Future](futures.get(transition_output["future_id"]))
+                )
+            else:
+                raise NotImplementedError
+            tos[transition_output["transition_id"]].append(to)
+
+        return {
+            transition["id"]: Transition(
+                id_=TransitionID.loads(transition["transition_id"]),
+                program_id=ProgramID.loads(transition["program_id"]),
+                function_name=Identifier.loads(transition["function_name"]),
+                inputs=Vec[TransitionInput, u8](tis[transition["id"]]),
+                outputs=Vec[TransitionOutput, u8](tos[transition["id"]]),
+                tpk=Group.loads(transition["tpk"]),
+                tcm=Field.loads(transition["tcm"]),
+                scm=Field.loads(transition["scm"]),
+            )
+            for transition in transitions
+        }
+
+    # expects the rows of get_confirmed_transactions
+    async def load_confirmed_transactions(self, confirmed_transactions: list[dict[str, Any]]) -> list[ConfirmedTransaction]:
+        if not confirmed_transactions:
+            return []
+        finalize_operations = await self._fetch(
+            "SELECT fo.confirmed_transaction_id, fo.type, "
+            "COALESCE(im.mapping_id, ikv.mapping_id, ukv.mapping_id, rkv.mapping_id, rm.mapping_id) AS mapping_id, "
+            "COALESCE(ikv.key_id, ukv.key_id, rkv.key_id) AS key_id, "
+            "COALESCE(ikv.value_id, ukv.value_id) AS value_id "
+            "FROM finalize_operation fo "
+            "LEFT JOIN finalize_operation_initialize_mapping im ON im.finalize_operation_id = fo.id "
+            "LEFT JOIN finalize_operation_insert_kv ikv ON ikv.finalize_operation_id = fo.id "
+            "LEFT JOIN finalize_operation_update_kv ukv ON ukv.finalize_operation_id = fo.id "
+            "LEFT JOIN finalize_operation_remove_kv rkv ON rkv.finalize_operation_id = fo.id "
+            "LEFT JOIN finalize_operation_remove_mapping rm ON rm.finalize_operation_id = fo.id "
+            "WHERE fo.confirmed_transaction_id = ANY(%s::int[]) "
+            "ORDER BY fo.confirmed_transaction_id, fo.index",
+            ([ct["confirmed_transaction_id"] for ct in confirmed_transactions],)
+        )
+        fos: dict[int, list[FinalizeOperation]] = defaultdict(list)
+        for finalize_operation in finalize_operations:
+            if finalize_operation["type"] == FinalizeOperation.Type.InitializeMapping.name:
+                fo = InitializeMapping(mapping_id=Field.loads(finalize_operation["mapping_id"]))
+            elif finalize_operation["type"] == FinalizeOperation.Type.InsertKeyValue.name:
+                fo = InsertKeyValue(
+                    mapping_id=Field.loads(finalize_operation["mapping_id"]),
+                    key_id=Field.loads(finalize_operation["key_id"]),
+                    value_id=Field.loads(finalize_operation["value_id"]),
+                )
+            elif finalize_operation["type"] == FinalizeOperation.Type.UpdateKeyValue.name:
+                fo = UpdateKeyValue(
+                    mapping_id=Field.loads(finalize_operation["mapping_id"]),
+                    key_id=Field.loads(finalize_operation["key_id"]),
+                    value_id=Field.loads(finalize_operation["value_id"]),
+                )
+            elif finalize_operation["type"] == FinalizeOperation.Type.RemoveKeyValue.name:
+                fo = RemoveKeyValue(
+                    mapping_id=Field.loads(finalize_operation["mapping_id"]),
+                    key_id=Field.loads(finalize_operation["key_id"]),
+                )
+            elif finalize_operation["type"] == FinalizeOperation.Type.ReplaceMapping.name:
+                fo = ReplaceMapping(mapping_id=Field.loads(finalize_operation["mapping_id"]))
+            elif finalize_operation["type"] == FinalizeOperation.Type.RemoveMapping.name:
+                fo = RemoveMapping(mapping_id=Field.loads(finalize_operation["mapping_id"]))
+            else:
+                raise NotImplementedError
+            fos[finalize_operation["confirmed_transaction_id"]].append(fo)
+
+        accepted_deploy_ids = [
+            ct["transaction_deploy_id"] for ct in confirmed_transactions
+            if ct["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedDeploy.name
+        ]
+        programs: dict[int, dict[str, Any]] = {}
+        if accepted_deploy_ids:
+            for program in await self._fetch(
+                "SELECT transaction_deploy_id, raw_data, owner, signature FROM program "
+                "WHERE transaction_deploy_id = ANY(%s::int[])",
+                (accepted_deploy_ids,)
+            ):
+                programs[program["transaction_deploy_id"]] = program
+
+        execute_ids = [ct["transaction_execute_id"] for ct in confirmed_transactions if ct.get("transaction_execute_id") is not None]
+        fee_ids = [ct["fee_id"] for ct in confirmed_transactions if ct["fee_id"] is not None]
+        transition_rows = await self._fetch(
+            "SELECT * FROM transition WHERE transaction_execute_id = ANY(%s::int[]) "
+            "UNION ALL "
+            "SELECT * FROM transition WHERE fee_id = ANY(%s::int[]) "
+            "ORDER BY index",
+            (execute_ids, fee_ids)
+        )
+        transitions = await self.load_transitions(transition_rows)
+        execute_transitions: dict[int, list[Transition]] = defaultdict(list)
+        fee_transitions: dict[int, Transition] = {}
+        for transition in transition_rows:
+            if transition["transaction_execute_id"] is not None:
+                execute_transitions[transition["transaction_execute_id"]].append(transitions[transition["id"]])
+            else:
+                fee_transitions[transition["fee_id"]] = transitions[transition["id"]]
+
+        def get_fee(fee_dict: dict[str, Any]) -> Fee:
+            if fee_dict["fee_id"] not in fee_transitions:
+                raise ValueError("fee transition not found")
+            proof = None
+            if fee_dict["fee_proof"] is not None:
+                proof = Proof.loads(fee_dict["fee_proof"])
+            return Fee(
+                transition=fee_transitions[fee_dict["fee_id"]],
+                global_state_root=StateRoot.loads(fee_dict["fee_global_state_root"]),
+                proof=Option[Proof](proof),
+            )
+
+        ctxs: list[ConfirmedTransaction] = []
+        for confirmed_transaction in confirmed_transactions:
+            f = fos[confirmed_transaction["confirmed_transaction_id"]]
+            transaction = confirmed_transaction
+            # TODO: store full program on rejected deploy so we dont need dummy data - should we?
+            match confirmed_transaction["confirmed_transaction_type"]:
+                case ConfirmedTransaction.Type.AcceptedDeploy.name | ConfirmedTransaction.Type.RejectedDeploy.name:
+                    deploy_transaction = transaction
+                    if confirmed_transaction["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedDeploy.name:
+                        program_data = programs.get(deploy_transaction["transaction_deploy_id"])
+                        if program_data is None:
+                            raise RuntimeError("database inconsistent")
+                        deployment = Deployment(
+                            edition=u16(deploy_transaction["edition"]),
+                            program=Program.load(BytesIO(program_data["raw_data"])),
+                            verifying_keys=Vec[Tuple[Identifier, VerifyingKey, Certificate], u16].load(BytesIO(deploy_transaction["verifying_keys"])),
+                        )
+                        tx = DeployTransaction(
+                            id_=TransactionID.loads(transaction["transaction_id"]),
+                            deployment=deployment,
+                            fee=get_fee(transaction),
+                            owner=ProgramOwner(
+                                address=Address.loads(program_data["owner"]),
+                                signature=Signature.loads(program_data["signature"])
+                            )
+                        )
+                    else:
+                        deployment = Deployment(
+                            edition=u16(deploy_transaction["edition"]),
+                            program=Program(
+                                id_=ProgramID.loads("placeholder.aleo"),
+                                imports=Vec[Import, u8]([]),
+                                mappings={},
+                                structs={},
+                                records={},
+                                closures={},
+                                functions={},
+                                identifiers=[],
+                            ),
+                            verifying_keys=Vec[Tuple[Identifier, VerifyingKey, Certificate], u16]([])
+                        )
+                        tx = DeployTransaction(
+                            id_=TransactionID.loads(transaction["transaction_id"]),
+                            deployment=deployment,
+                            fee=get_fee(transaction),
+                            owner=ProgramOwner(
+                                address=Address.loads(deploy_transaction["owner"]),
+                                signature=Signature(
+                                    challenge=Scalar(0),
+                                    response=Scalar(0),
+                                    compute_key=ComputeKey(
+                                        pk_sig=Group(0),
+                                        pr_sig=Group(0),
+                                    )
+                                )
+                            )
+                        )
+                    ctx = AcceptedDeploy(
+                        index=u32(confirmed_transaction["index"]),
+                        transaction=tx,
+                        finalize=Vec[FinalizeOperation, u16](f),
+                    )
+                case ConfirmedTransaction.Type.AcceptedExecute.name | ConfirmedTransaction.Type.RejectedExecute.name:
+                    execute_transaction = transaction
+                    tss = execute_transitions[execute_transaction["transaction_execute_id"]]
+                    if transaction["fee_id"] is None:
+                        fee = None
+                    else:
+                        fee = get_fee(transaction)
+                    if execute_transaction["proof"] is None:
+                        proof = None
+                    else:
+                        proof = Proof.loads(execute_transaction["proof"])
+                    if confirmed_transaction["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedExecute.name:
+                        ctx = AcceptedExecute(
+                            index=u32(confirmed_transaction["index"]),
+                            transaction=ExecuteTransaction(
+                                id_=TransactionID.loads(transaction["transaction_id"]),
+                                execution=Execution(
+                                    transitions=Vec[Transition, u8](tss),
+                                    global_state_root=StateRoot.loads(execute_transaction["global_state_root"]),
+                                    proof=Option[Proof](proof),
+                                ),
+                                fee=Option[Fee](fee),
+                            ),
+                            finalize=Vec[FinalizeOperation, u16](f),
+                        )
+                    else:
+                        if fee is None:
+                            raise ValueError("fee is None")
+                        ctx = RejectedExecute(
+                            index=u32(confirmed_transaction["index"]),
+                            transaction=FeeTransaction(
+                                id_=TransactionID.loads(transaction["transaction_id"]),
+                                fee=fee,
+                            ),
+                            rejected=RejectedExecution(
+                                execution=Execution(
+                                    transitions=Vec[Transition, u8](tss),
+                                    global_state_root=StateRoot.loads(execute_transaction["global_state_root"]),
+                                    proof=Option[Proof](proof),
+                                )
+                            ),
+                            finalize=Vec[FinalizeOperation, u16](f),
+                        )
+                case _:
+                    raise NotImplementedError
+            ctxs.append(ctx)
+        return ctxs
+
+    async def _load_genesis_ratify(self) -> GenesisRatify:
+        cur = self.cur
+        await cur.execute("SELECT * FROM committee_history WHERE height = %s", (0,))
+        committee_history = await cur.fetchone()
+        if committee_history is None:
+            raise RuntimeError("database inconsistent")
+        await cur.execute("SELECT * FROM committee_history_member WHERE committee_id = %s", (committee_history["id"],))
+        committee_history_members = await cur.fetchall()
+        members: list[Tuple[Address, u64, bool_, u8]] = []
+        for committee_history_member in committee_history_members:
+            members.append(Tuple[Address, u64, bool_, u8]((
+                Address.loads(committee_history_member["address"]),
+                u64(committee_history_member["stake"]),
+                bool_(committee_history_member["is_open"]),
+                u8(committee_history_member["commission"]),
+            )))
+        committee = Committee(
+            id_=Field.loads(committee_history["committee_id"]),
+            starting_round=u64(committee_history["starting_round"]),
+            members=Vec[Tuple[Address, u64, bool_, u8], u16](members),
+            total_stake=u64(committee_history["total_stake"]),
+        )
+        await cur.execute("SELECT * FROM ratification_genesis_balance")
+        public_balances = await cur.fetchall()
+        balances: list[Tuple[Address, u64]] = []
+        for public_balance in public_balances:
+            balances.append(Tuple[Address, u64]((Address.loads(public_balance["address"]), u64(public_balance["amount"]))))
+        await cur.execute("SELECT * FROM ratification_genesis_bonded")
+        bonded_balances = await cur.fetchall()
+        bonded: list[Tuple[Address, Address, Address, u64]] = []
+        for bonded_balance in bonded_balances:
+            bonded.append(
+                Tuple[Address, Address, Address, u64]((
+                    Address.loads(bonded_balance["staker"]),
+                    Address.loads(bonded_balance["validator"]),
+                    Address.loads(bonded_balance["withdrawal"]),
+                    u64(bonded_balance["amount"])
+                ))
+            )
+        return GenesisRatify(
+            committee=committee,
+            public_balances=Vec[Tuple[Address, u64], u16](balances),
+            bonded_balances=Vec[Tuple[Address, Address, Address, u64], u16](bonded),
+        )
+
+    async def load_blocks(self, blocks: list[dict[str, Any]]) -> list[Block]:
+        if not blocks:
+            return []
+        block_db_ids = [b["id"] for b in blocks]
+
+        confirmed_transactions = await self._fetch(
+            "SELECT ct.block_id, ct.id AS confirmed_transaction_id, ct.type AS confirmed_transaction_type, ct.index, "
+            "ct.reject_reason, t.transaction_id, t.type AS transaction_type, "
+            "td.id AS transaction_deploy_id, td.edition, td.verifying_keys, td.program_id, td.owner, "
+            "te.id AS transaction_execute_id, te.global_state_root, te.proof, "
+            "f.id AS fee_id, f.global_state_root AS fee_global_state_root, f.proof AS fee_proof "
+            "FROM confirmed_transaction ct "
+            "JOIN transaction t ON t.confirmed_transaction_id = ct.id "
+            "LEFT JOIN LATERAL ("
+            "    SELECT id, edition, verifying_keys, program_id, owner FROM transaction_deploy "
+            "    WHERE transaction_id = t.id ORDER BY id LIMIT 1"
+            ") td ON true "
+            "LEFT JOIN LATERAL ("
+            "    SELECT id, global_state_root, proof FROM transaction_execute WHERE transaction_id = t.id ORDER BY id LIMIT 1"
+            ") te ON true "
+            "LEFT JOIN LATERAL ("
+            "    SELECT id, global_state_root, proof FROM fee WHERE transaction_id = t.id ORDER BY id LIMIT 1"
+            ") f ON true "
+            "WHERE ct.block_id = ANY(%s::int[]) "
+            "ORDER BY ct.block_id, ct.index",
+            (block_db_ids,)
+        )
+        block_ctxs: dict[int, list[ConfirmedTransaction]] = defaultdict(list)
+        for row, ctx in zip(confirmed_transactions, await self.load_confirmed_transactions(confirmed_transactions)):
+            block_ctxs[row["block_id"]].append(ctx)
+
+        block_rs: dict[int, list[Ratify]] = defaultdict(list)
+        for ratification in await self._fetch(
+            "SELECT * FROM ratification WHERE block_id = ANY(%s::int[]) ORDER BY block_id, index",
+            (block_db_ids,)
+        ):
+            match ratification["type"]:
+                case Ratify.Type.Genesis.name:
+                    r = await self._load_genesis_ratify()
+                case Ratify.Type.BlockReward.name:
+                    r = BlockRewardRatify(
+                        amount=u64(ratification["amount"]),
+                    )
+                case Ratify.Type.PuzzleReward.name:
+                    r = PuzzleRewardRatify(
+                        amount=u64(ratification["amount"]),
+                    )
+                case _:
+                    raise NotImplementedError
+            block_rs[ratification["block_id"]].append(r)
+
+        block_solutions: dict[int, list[Solution]] = {}
+        for solution in await self._fetch(
+            "SELECT ps.block_id, s.id, s.puzzle_solution_id, s.address, s.counter, s.target, s.epoch_hash "
+            "FROM puzzle_solution ps "
+            "LEFT JOIN solution s ON s.puzzle_solution_id = ps.id "
+            "WHERE ps.block_id = ANY(%s::int[]) "
+            "ORDER BY ps.block_id, s.id",
+            (block_db_ids,)
+        ):
+            ss = block_solutions.setdefault(solution["block_id"], [])
+            if solution["id"] is None:
+                continue
+            ss.append(Solution(
+                partial_solution=PartialSolution(
+                    solution_id=solution["puzzle_solution_id"],
+                    epoch_hash=solution["epoch_hash"],
+                    address=Address.loads(solution["address"]),
+                    counter=u64(solution["counter"]),
+                ),
+                target=u64(solution["target"]),
+            ))
+
+        authorities: dict[int, dict[str, Any]] = {}
+        block_vertices: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        for row in await self._fetch(
+            "SELECT a.block_id, a.type AS authority_type, a.signature AS authority_signature, dv.id, dv.round, "
+            "dv.batch_id, dv.author, dv.timestamp, dv.author_signature, dv.committee_id "
+            "FROM authority a "
+            "LEFT JOIN dag_vertex dv ON dv.authority_id = a.id "
+            "WHERE a.block_id = ANY(%s::int[]) "
+            "ORDER BY a.block_id, dv.index",
+            (block_db_ids,)
+        ):
+            authorities.setdefault(row["block_id"], row)
+            if row["id"] is not None:
+                block_vertices[row["block_id"]].append(row)
+
+        vertex_tids: dict[int, list[TransmissionID]] = defaultdict(list)
+        vertex_db_ids = [v["id"] for vs in block_vertices.values() for v in vs]
+        if vertex_db_ids:
+            for tid in await self._fetch(
+                "SELECT vertex_id, type, commitment, transaction_id FROM dag_vertex_transmission_id "
+                "WHERE vertex_id = ANY(%s::bigint[]) ORDER BY vertex_id, index",
+                (vertex_db_ids,)
+            ):
+                if tid["type"] == TransmissionID.Type.Ratification:
+                    vertex_tids[tid["vertex_id"]].append(RatificationTransmissionID())
+                elif tid["type"] == TransmissionID.Type.Solution:
+                    vertex_tids[tid["vertex_id"]].append(SolutionTransmissionID(id_=SolutionID.loads(tid["commitment"])))
+                elif tid["type"] == TransmissionID.Type.Transaction:
+                    vertex_tids[tid["vertex_id"]].append(TransactionTransmissionID(id_=TransactionID.loads(tid["transaction_id"])))
+
+        aborted_solution_ids: dict[int, list[SolutionID]] = defaultdict(list)
+        aborted_transaction_ids: dict[int, list[TransactionID]] = defaultdict(list)
+        for aborted in await self._fetch(
+            "SELECT * FROM ("
+            "    SELECT block_id, 'solution' AS type, solution_id AS aborted_id, id "
+            "    FROM block_aborted_solution_id WHERE block_id = ANY(%s::int[]) "
+            "    UNION ALL "
+            "    SELECT block_id, 'transaction' AS type, transaction_id AS aborted_id, id "
+            "    FROM block_aborted_transaction_id WHERE block_id = ANY(%s::int[])"
+            ") a ORDER BY id",
+            (block_db_ids, block_db_ids)
+        ):
+            if aborted["type"] == "solution":
+                aborted_solution_ids[aborted["block_id"]].append(SolutionID.loads(aborted["aborted_id"]))
+            else:
+                aborted_transaction_ids[aborted["block_id"]].append(TransactionID.loads(aborted["aborted_id"]))
+
+        res: list[Block] = []
+        for block in blocks:
+            authority = authorities.get(block["id"])
+            if authority is None:
+                raise RuntimeError("database inconsistent")
+            if authority["authority_type"] == Authority.Type.Beacon.name:
+                auth = BeaconAuthority(
+                    signature=Signature.loads(authority["authority_signature"]),
+                )
+            elif authority["authority_type"] == Authority.Type.Quorum.name:
+                subdags: dict[u64, Vec[BatchCertificate, u16]] = defaultdict(lambda: Vec[BatchCertificate, u16]([]))
+                for dag_vertex in block_vertices[block["id"]]:
+                    # signatures and previous certificate ids are not stored, see the insert path
+                    certificate = BatchCertificate(
+                        batch_header=BatchHeader(
+                            batch_id=Field.loads(dag_vertex["batch_id"]),
+                            author=Address.loads(dag_vertex["author"]),
+                            round_=u64(dag_vertex["round"]),
+                            timestamp=i64(dag_vertex["timestamp"]),
+                            committee_id=Field.loads(dag_vertex["committee_id"]),
+                            transmission_ids=Vec[TransmissionID, u32](vertex_tids[dag_vertex["id"]]),
+                            previous_certificate_ids=Vec[Field, u16]([]),
+                            signature=Signature.loads(dag_vertex["author_signature"]),
+                        ),
+                        signatures=Vec[Signature, u16]([]),
+                    )
+                    subdags[certificate.batch_header.round].append(certificate)
+                auth = QuorumAuthority(subdag=Subdag(subdag=subdags))
+            else:
+                raise NotImplementedError
+
+            if block["id"] in block_solutions:
+                puzzle_solution = PuzzleSolutions(solutions=Vec[Solution, u8](block_solutions[block["id"]]))
+            else:
+                puzzle_solution = None
+
+            res.append(Block(
+                block_hash=BlockHash.loads(block['block_hash']),
+                previous_hash=BlockHash.loads(block['previous_hash']),
+                header=DatabaseBlock._get_block_header(block),
+                authority=auth,
+                transactions=Transactions(
+                    transactions=Vec[ConfirmedTransaction, u32](block_ctxs[block["id"]]),
+                ),
+                ratifications=Ratifications(ratifications=Vec[Ratify, u32](block_rs[block["id"]])),
+                solutions=Solutions(solutions=Option[PuzzleSolutions](puzzle_solution)),
+                aborted_solution_ids=Vec[SolutionID, u32](aborted_solution_ids[block["id"]]),
+                aborted_transactions_ids=Vec[TransactionID, u32](aborted_transaction_ids[block["id"]]),
+            ))
+        return res
+
+
 class DatabaseBlock(DatabaseBase):
 
     @staticmethod
@@ -35,151 +646,11 @@ class DatabaseBlock(DatabaseBase):
             )
         )
 
-    @staticmethod
-    @profile
-    async def _load_future(conn: psycopg.AsyncConnection[dict[str, Any]], transition_output_db_id: Optional[int],
-                           future_argument_db_id: Optional[int]) -> Optional[Future]:
-        async with conn.cursor() as cur:
-            if transition_output_db_id:
-                await cur.execute(
-                    "SELECT id, program_id, function_name FROM future WHERE type = 'Output' AND "
-                    "transition_output_future_id = %s",
-                    (transition_output_db_id,)
-                )
-            elif future_argument_db_id:
-                await cur.execute(
-                    "SELECT id, program_id, function_name FROM future WHERE type = 'Argument' AND "
-                    "future_argument_id = %s",
-                    (future_argument_db_id,)
-                )
-            else:
-                raise ValueError("transition_output_db_id or future_argument_db_id must be set")
-            if (res := await cur.fetchone()) is None:
-                if transition_output_db_id:
-                    return None
-                raise RuntimeError("failed to insert row into database")
-            future_db_id = res["id"]
-            program_id = res["program_id"]
-            function_name = res["function_name"]
-            await cur.execute(
-                "SELECT id, type, plaintext FROM future_argument WHERE future_id = %s",
-                (future_db_id,)
-            )
-            arguments: list[Argument] = []
-            for res in await cur.fetchall():
-                if res["type"] == "Plaintext":
-                    arguments.append(PlaintextArgument(
-                        plaintext=Plaintext.load(BytesIO(res["plaintext"]))
-                    ))
-                elif res["type"] == "Future":
-                    arguments.append(FutureArgument(
-                        future=await DatabaseBlock._load_future(conn, None, res["id"]) # type: ignore
-                    ))
-                else:
-                    raise NotImplementedError
-            return Future(
-                program_id=ProgramID.loads(program_id),
-                function_name=Identifier.loads(function_name),
-                arguments=Vec[Argument, u8](arguments)
-            )
-
     @staticmethod
     @profile
     async def _get_transition_from_dict(transition: dict[str, Any], conn: psycopg.AsyncConnection[dict[str, Any]]):
         async with conn.cursor() as cur:
-            await cur.execute("SELECT * FROM get_transition_inputs(%s)", (transition["id"],))
-            transition_inputs = await cur.fetchall()
-            tis: list[tuple[TransitionInput, int]] = []
-            for transition_input in transition_inputs:
-                if transition_input["type"] == TransitionInput.Type.Public.name:
-                    if transition_input["plaintext"] is None:
-                        plaintext = None
-                    else:
-                        plaintext = Plaintext.load(BytesIO(transition_input["plaintext"]))
-                    tis.append((PublicTransitionInput(
-                        plaintext_hash=Field.loads(transition_input["plaintext_hash"]),
-                        plaintext=Option[Plaintext](plaintext)
-                    ), transition_input["index"]))
-                elif transition_input["type"] == TransitionInput.Type.Private.name:
-                    if transition_input["ciphertext"] is None:
-                        ciphertext = None
-                    else:
-                        ciphertext = Ciphertext.loads(transition_input["ciphertext"])
-                    tis.append((PrivateTransitionInput(
-                        ciphertext_hash=Field.loads(transition_input["ciphertext_hash"]),
-                        ciphertext=Option[Ciphertext](ciphertext)
-                    ), transition_input["index"]))
-                elif transition_input["type"] == TransitionInput.Type.Record.name:
-                    tis.append((RecordTransitionInput(
-                        serial_number=Field.loads(transition_input["serial_number"]),
-                        tag=Field.loads(transition_input["tag"])
-                    ), transition_input["index"]))
-                elif transition_input["type"] == TransitionInput.Type.ExternalRecord.name:
-                    tis.append((ExternalRecordTransitionInput(
-                        input_commitment=Field.loads(transition_input["commitment"]),
-                    ), transition_input["index"]))
-                else:
-                    raise NotImplementedError
-            tis.sort(key=lambda x: x[1])
-            transition_inputs = [x[0] for x in tis]
-
-            await cur.execute("SELECT * FROM get_transition_outputs(%s)", (transition["id"],))
-            transition_outputs = await cur.fetchall()
-            tos: list[tuple[TransitionOutput, int]] = []
-            for transition_output in transition_outputs:
-                if transition_output["type"] == TransitionOutput.Type.Public.name:
-                    if transition_output["plaintext"] is None:
-                        plaintext = None
-                    else:
-                        plaintext = Plaintext.load(BytesIO(transition_output["plaintext"]))
-                    tos.append((PublicTransitionOutput(
-                        plaintext_hash=Field.loads(transition_output["plaintext_hash"]),
-                        plaintext=Option[Plaintext](plaintext)
-                    ), transition_output["index"]))
-                elif transition_output["type"] == TransitionOutput.Type.Private.name:
-                    if transition_output["ciphertext"] is None:
-                        ciphertext = None
-                    else:
-                        ciphertext = Ciphertext.loads(transition_output["ciphertext"])
-                    tos.append((PrivateTransitionOutput(
-                        ciphertext_hash=Field.loads(transition_output["ciphertext_hash"]),
-                        ciphertext=Option[Ciphertext](ciphertext)
-                    ), transition_output["index"]))
-                elif transition_output["type"] == TransitionOutput.Type.Record.name:
-                    if transition_output["record_ciphertext"] is None:
-                        record_ciphertext = None
-                    else:
-                        record_ciphertext = Record[Ciphertext].loads(transition_output["record_ciphertext"])
-                    tos.append((RecordTransitionOutput(
-                        commitment=Field.loads(transition_output["record_commitment"]),
-                        checksum=Field.loads(transition_output["checksum"]),
-                        record_ciphertext=Option[Record[Ciphertext]](record_ciphertext)
-                    ), transition_output["index"]))
-                elif transition_output["type"] == TransitionOutput.Type.ExternalRecord.name:
-                    tos.append((ExternalRecordTransitionOutput(
-                        commitment=Field.loads(transition_output["external_record_commitment"]),
-                    ), transition_output["index"]))
-                elif transition_output["type"] == TransitionOutput.Type.Future.name:
-                    future = await DatabaseBlock._load_future(conn, transition_output["future_id"], None)
-                    tos.append((FutureTransitionOutput(
-                        future_hash=Field.loads(transition_output["future_hash"]),
-                        future=Option[Future](future)
-                    ), transition_output["index"]))
-                else:
-                    raise NotImplementedError
-            tos.sort(key=lambda x: x[1])
-            transition_outputs = [x[0] for x in tos]
-
-            return Transition(
-                id_=TransitionID.loads(transition["transition_id"]),
-                program_id=ProgramID.loads(transition["program_id"]),
-                function_name=Identifier.loads(transition["function_name"]),
-                inputs=Vec[TransitionInput, u8](transition_inputs),
-                outputs=Vec[TransitionOutput, u8](transition_outputs),
-                tpk=Group.loads(transition["tpk"]),
-                tcm=Field.loads(transition["tcm"]),
-                scm=Field.loads(transition["scm"]),
-            )
+            return (await _BlockLoader(cur).load_transitions([transition]))[transition["id"]]
 
     async def get_transaction_reject_reason(self, transaction_id: TransactionID | str) -> Optional[str]:
         async with self.pool.connection() as conn:
@@ -490,14 +961,18 @@ class DatabaseBlock(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def get_unconfirmed_transactions_range(self, start: int, end: int) -> list[Transaction]:
+    async def get_unconfirmed_transactions_range(self, start: int, end: int,
+                                                 cursor: Optional[tuple[int, str]] = None) -> list[Transaction]:
+        # cursor is (first_seen, transaction_id) of the last transaction on the previous page
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    before = "AND (first_seen, transaction_id) < (%s, %s) " if cursor is not None else ""
                     await cur.execute(
                         "SELECT transaction_id FROM transaction WHERE confirmed_transaction_id IS NULL "
-                        "ORDER BY first_seen DESC LIMIT %s OFFSET %s",
-                        (end - start, start)
+                        f"{before}"
+                        "ORDER BY first_seen DESC, transaction_id DESC LIMIT %s OFFSET %s",
+                        (*(cursor or ()), end - start, start)
                     )
                     transaction_ids = await cur.fetchall()
                     if not transaction_ids:
@@ -516,191 +991,7 @@ class DatabaseBlock(DatabaseBase):
     @staticmethod
     async def get_confirmed_transaction_from_dict(conn: psycopg.AsyncConnection[dict[str, Any]], confirmed_transaction: dict[str, Any]) -> ConfirmedTransaction:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT * FROM get_finalize_operations(%s)", (confirmed_transaction["confirmed_transaction_id"],))
-            finalize_operations = await cur.fetchall()
-            f: list[FinalizeOperation] = []
-            for finalize_operation in finalize_operations:
-                if finalize_operation["type"] == FinalizeOperation.Type.InitializeMapping.name:
-                    f.append(InitializeMapping(mapping_id=Field.loads(finalize_operation["mapping_id"])))
-                elif finalize_operation["type"] == FinalizeOperation.Type.InsertKeyValue.name:
-                    f.append(InsertKeyValue(
-                        mapping_id=Field.loads(finalize_operation["mapping_id"]),
-                        key_id=Field.loads(finalize_operation["key_id"]),
-                        value_id=Field.loads(finalize_operation["value_id"]),
-                    ))
-                elif finalize_operation["type"] == FinalizeOperation.Type.UpdateKeyValue.name:
-                    f.append(UpdateKeyValue(
-                        mapping_id=Field.loads(finalize_operation["mapping_id"]),
-                        key_id=Field.loads(finalize_operation["key_id"]),
-                        value_id=Field.loads(finalize_operation["value_id"]),
-                    ))
-                elif finalize_operation["type"] == FinalizeOperation.Type.RemoveKeyValue.name:
-                    f.append(RemoveKeyValue(
-                        mapping_id=Field.loads(finalize_operation["mapping_id"]),
-                        key_id=Field.loads(finalize_operation["key_id"]),
-                    ))
-                elif finalize_operation["type"] == FinalizeOperation.Type.ReplaceMapping.name:
-                    f.append(ReplaceMapping(mapping_id=Field.loads(finalize_operation["mapping_id"])))
-                elif finalize_operation["type"] == FinalizeOperation.Type.RemoveMapping.name:
-                    f.append(RemoveMapping(mapping_id=Field.loads(finalize_operation["mapping_id"])))
-                else:
-                    raise NotImplementedError
-
-            transaction = confirmed_transaction
-            # TODO: store full program on rejected deploy so we dont need dummy data - should we?
-            match confirmed_transaction["confirmed_transaction_type"]:
-                case ConfirmedTransaction.Type.AcceptedDeploy.name | ConfirmedTransaction.Type.RejectedDeploy.name:
-                    deploy_transaction = transaction
-                    if confirmed_transaction["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedDeploy.name:
-                        await cur.execute(
-                            "SELECT raw_data, owner, signature FROM program WHERE transaction_deploy_id = %s",
-                            (deploy_transaction["transaction_deploy_id"],)
-                        )
-                        program_data = await cur.fetchone()
-                        if program_data is None:
-                            raise RuntimeError("database inconsistent")
-                        program = program_data["raw_data"]
-                        deployment = Deployment(
-                            edition=u16(deploy_transaction["edition"]),
-                            program=Program.load(BytesIO(program)),
-                            verifying_keys=Vec[Tuple[Identifier, VerifyingKey, Certificate], u16].load(BytesIO(deploy_transaction["verifying_keys"])),
-                        )
-                    else:
-                        deployment = Deployment(
-                            edition=u16(deploy_transaction["edition"]),
-                            program=Program(
-                                id_=ProgramID.loads("placeholder.aleo"),
-                                imports=Vec[Import, u8]([]),
-                                mappings={},
-                                structs={},
-                                records={},
-                                closures={},
-                                functions={},
-                                identifiers=[],
-                            ),
-                            verifying_keys=Vec[Tuple[Identifier, VerifyingKey, Certificate], u16]([])
-                        )
-                        program_data = None
-                    fee_dict = transaction
-                    if not fee_dict:
-                        raise RuntimeError("database inconsistent")
-                    await cur.execute(
-                        "SELECT * FROM transition WHERE fee_id = %s",
-                        (fee_dict["fee_id"],)
-                    )
-                    fee_transition = await cur.fetchone()
-                    if fee_transition is None:
-                        raise ValueError("fee transition not found")
-                    proof = None
-                    if fee_dict["fee_proof"] is not None:
-                        proof = Proof.loads(fee_dict["fee_proof"])
-                    fee = Fee(
-                        transition=await DatabaseBlock._get_transition_from_dict(fee_transition, conn),
-                        global_state_root=StateRoot.loads(fee_dict["fee_global_state_root"]),
-                        proof=Option[Proof](proof),
-                    )
-                    if confirmed_transaction["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedDeploy.name:
-                        program_data = cast(dict[str, Any], program_data)
-                        tx = DeployTransaction(
-                            id_=TransactionID.loads(transaction["transaction_id"]),
-                            deployment=deployment,
-                            fee=fee,
-                            owner=ProgramOwner(
-                                address=Address.loads(program_data["owner"]),
-                                signature=Signature.loads(program_data["signature"])
-                            )
-                        )
-                    else:
-                        tx = DeployTransaction(
-                            id_=TransactionID.loads(transaction["transaction_id"]),
-                            deployment=deployment,
-                            fee=fee,
-                            owner=ProgramOwner(
-                                address=Address.loads(deploy_transaction["owner"]),
-                                signature=Signature(
-                                    challenge=Scalar(0),
-                                    response=Scalar(0),
-                                    compute_key=ComputeKey(
-                                        pk_sig=Group(0),
-                                        pr_sig=Group(0),
-                                    )
-                                )
-                            )
-                        )
-                    ctx = AcceptedDeploy(
-                        index=u32(confirmed_transaction["index"]),
-                        transaction=tx,
-                        finalize=Vec[FinalizeOperation, u16](f),
-                    )
-                case ConfirmedTransaction.Type.AcceptedExecute.name | ConfirmedTransaction.Type.RejectedExecute.name:
-                    execute_transaction = transaction
-                    await cur.execute(
-                        "SELECT * FROM transition WHERE transaction_execute_id = %s",
-                        (execute_transaction["transaction_execute_id"],)
-                    )
-                    transitions = await cur.fetchall()
-                    tss: list[Transition] = []
-                    for transition in transitions:
-                        tss.append(await DatabaseBlock._get_transition_from_dict(transition, conn))
-                    fee = transaction
-                    if fee["fee_id"] is None:
-                        fee = None
-                    else:
-                        await cur.execute(
-                            "SELECT * FROM transition WHERE fee_id = %s",
-                            (fee["fee_id"],)
-                        )
-                        fee_transition = await cur.fetchone()
-                        if fee_transition is None:
-                            print(transaction)
-                            raise ValueError("fee transition not found")
-                        proof = None
-                        if fee["fee_proof"] is not None:
-                            proof = Proof.loads(fee["fee_proof"])
-                        fee = Fee(
-                            transition=await DatabaseBlock._get_transition_from_dict(fee_transition, conn),
-                            global_state_root=StateRoot.loads(fee["fee_global_state_root"]),
-                            proof=Option[Proof](proof),
-                        )
-                    if execute_transaction["proof"] is None:
-                        proof = None
-                    else:
-                        proof = Proof.loads(execute_transaction["proof"])
-                    if confirmed_transaction["confirmed_transaction_type"] == ConfirmedTransaction.Type.AcceptedExecute.name:
-                        ctx = AcceptedExecute(
-                            index=u32(confirmed_transaction["index"]),
-                            transaction=ExecuteTransaction(
-                                id_=TransactionID.loads(transaction["transaction_id"]),
-                                execution=Execution(
-                                    transitions=Vec[Transition, u8](tss),
-                                    global_state_root=StateRoot.loads(execute_transaction["global_state_root"]),
-                                    proof=Option[Proof](proof),
-                                ),
-                                fee=Option[Fee](fee),
-                            ),
-                            finalize=Vec[FinalizeOperation, u16](f),
-                        )
-                    else:
-                        if fee is None:
-                            raise ValueError("fee is None")
-                        ctx = RejectedExecute(
-                            index=u32(confirmed_transaction["index"]),
-                            transaction=FeeTransaction(
-                                id_=TransactionID.loads(transaction["transaction_id"]),
-                                fee=fee,
-                            ),
-                            rejected=RejectedExecution(
-                                execution=Execution(
-                                    transitions=Vec[Transition, u8](tss),
-                                    global_state_root=StateRoot.loads(execute_transaction["global_state_root"]),
-                                    proof=Option[Proof](proof),
-                                )
-                            ),
-                            finalize=Vec[FinalizeOperation, u16](f),
-                        )
-                case _:
-                    raise NotImplementedError
-            return ctx
+            return (await _BlockLoader(cur).load_confirmed_transactions([confirmed_transaction]))[0]
 
     async def get_confirmed_transaction(self, transaction_id: str) -> Optional[ConfirmedTransaction]:
         async with self.pool.connection() as conn:
@@ -763,232 +1054,35 @@ class DatabaseBlock(DatabaseBase):
     @staticmethod
     @profile
     async def _get_full_block(block: dict[str, Any], conn: psycopg.AsyncConnection[dict[str, Any]]):
+        if block.get("raw_data") is not None:
+            return DatabaseBlock._load_raw_block(block["raw_data"])
         async with conn.cursor() as cur:
-            await cur.execute("SELECT * FROM get_confirmed_transactions(%s)", (block["id"],))
-            confirmed_transactions = await cur.fetchall()
-            ctxs: list[ConfirmedTransaction] = []
-            for confirmed_transaction in confirmed_transactions:
-                ctxs.append(await DatabaseBlock.get_confirmed_transaction_from_dict(conn, confirmed_transaction))
-            await cur.execute("SELECT * FROM ratification WHERE block_id = %s ORDER BY index", (block["id"],))
-            ratifications = await cur.fetchall()
-            rs: list[Ratify] = []
-            for ratification in ratifications:
-                match ratification["type"]:
-                    case Ratify.Type.Genesis.name:
-                        await cur.execute("SELECT * FROM committee_history WHERE height = %s", (0,))
-                        committee_history = await cur.fetchone()
-                        if committee_history is None:
-                            raise RuntimeError("database inconsistent")
-                        await cur.execute("SELECT * FROM committee_history_member WHERE committee_id = %s", (committee_history["id"],))
-                        committee_history_members = await cur.fetchall()
-                        members: list[Tuple[Address, u64, bool_, u8]] = []
-                        for committee_history_member in committee_history_members:
-                            members.append(Tuple[Address, u64, bool_, u8]((
-                                Address.loads(committee_history_member["address"]),
-                                u64(committee_history_member["stake"]),
-                                bool_(committee_history_member["is_open"]),
-                                u8(committee_history_member["commission"]),
-                            )))
-                        committee = Committee(
-                            id_=Field.loads(committee_history["committee_id"]),
-                            starting_round=u64(committee_history["starting_round"]),
-                            members=Vec[Tuple[Address, u64, bool_, u8], u16](members),
-                            total_stake=u64(committee_history["total_stake"]),
-                        )
-                        await cur.execute("SELECT * FROM ratification_genesis_balance")
-                        public_balances = await cur.fetchall()
-                        balances: list[Tuple[Address, u64]] = []
-                        for public_balance in public_balances:
-                            balances.append(Tuple[Address, u64]((Address.loads(public_balance["address"]), u64(public_balance["amount"]))))
-                        await cur.execute("SELECT * FROM ratification_genesis_bonded")
-                        bonded_balances = await cur.fetchall()
-                        bonded: list[Tuple[Address, Address, Address, u64]] = []
-                        for bonded_balance in bonded_balances:
-                            bonded.append(
-                                Tuple[Address, Address, Address, u64]((
-                                    Address.loads(bonded_balance["staker"]),
-                                    Address.loads(bonded_balance["validator"]),
-                                    Address.loads(bonded_balance["withdrawal"]),
-                                    u64(bonded_balance["amount"])
-                                ))
-                            )
-                        rs.append(GenesisRatify(
-                            committee=committee,
-                            public_balances=Vec[Tuple[Address, u64], u16](balances),
-                            bonded_balances=Vec[Tuple[Address, Address, Address, u64], u16](bonded),
-                        ))
-                    case Ratify.Type.BlockReward.name:
-                        rs.append(BlockRewardRatify(
-                            amount=u64(ratification["amount"]),
-                        ))
-                    case Ratify.Type.PuzzleReward.name:
-                        rs.append(PuzzleRewardRatify(
-                            amount=u64(ratification["amount"]),
-                        ))
-                    case _:
-                        raise NotImplementedError
-
-            await cur.execute("SELECT * FROM puzzle_solution WHERE block_id = %s", (block["id"],))
-            puzzle_solution = await cur.fetchone()
-            if puzzle_solution is not None:
-                await cur.execute(
-                    "SELECT * FROM solution WHERE puzzle_solution_id = %s",
-                    (puzzle_solution["id"],)
-                )
-                solutions = await cur.fetchall()
-                ss: list[Solution] = []
-                for solution in solutions:
-                    ss.append(Solution(
-                        partial_solution=PartialSolution(
-                            solution_id=solution["puzzle_solution_id"],
-                            epoch_hash=solution["epoch_hash"],
-                            address=Address.loads(solution["address"]),
-                            counter=u64(solution["counter"]),
-                        ),
-                        target=u64(solution["target"]),
-                    ))
-                puzzle_solution = PuzzleSolutions(solutions=Vec[Solution, u8](ss))
-            else:
-                puzzle_solution = None
-
-            await cur.execute("SELECT * FROM authority WHERE block_id = %s", (block["id"],))
-            authority = await cur.fetchone()
-            if authority is None:
-                raise RuntimeError("database inconsistent")
-            if authority["type"] == Authority.Type.Beacon.name:
-                auth = BeaconAuthority(
-                    signature=Signature.loads(authority["signature"]),
-                )
-            elif authority["type"] == Authority.Type.Quorum.name:
-                await cur.execute(
-                    "SELECT * FROM dag_vertex WHERE authority_id = %s ORDER BY index",
-                    (authority["id"],)
-                )
-                dag_vertices = await cur.fetchall()
-                certificates: list[BatchCertificate] = []
-                for dag_vertex in dag_vertices:
-                    # await cur.execute(
-                    #     "SELECT * FROM dag_vertex_signature WHERE vertex_id = %s ORDER BY index",
-                    #     (dag_vertex["id"],)
-                    # )
-                    # dag_vertex_signatures = await cur.fetchall()
-
-                    signatures: list[Signature] = []
-                    # for signature in dag_vertex_signatures:
-                    #     signatures.append(Signature.loads(signature["signature"]))
-
-                    # await cur.execute(
-                    #     "SELECT previous_vertex_id FROM dag_vertex_adjacency WHERE vertex_id = %s ORDER BY index",
-                    #     (dag_vertex["id"],)
-                    # )
-                    # previous_ids = [x["previous_vertex_id"] for x in await cur.fetchall()]
-
-                    # TODO: use batch id after next reset - do we still want to keep this? would be way too expensive
-                    # await cur.execute(
-                    #     "SELECT batch_certificate_id FROM dag_vertex v "
-                    #     "JOIN UNNEST(%s) WITH ORDINALITY q(id, ord) ON q.id = v.id "
-                    #     "ORDER BY ord",
-                    #     (previous_ids,)
-                    # )
-                    # previous_cert_ids = [x["batch_certificate_id"] for x in await cur.fetchall()]
-                    previous_cert_ids: list[str] = []
-
-                    await cur.execute(
-                        "SELECT * FROM dag_vertex_transmission_id WHERE vertex_id = %s ORDER BY index",
-                        (dag_vertex["id"],)
-                    )
-                    tids: list[TransmissionID] = []
-                    for tid in await cur.fetchall():
-                        if tid["type"] == TransmissionID.Type.Ratification:
-                            tids.append(RatificationTransmissionID())
-                        elif tid["type"] == TransmissionID.Type.Solution:
-                            tids.append(SolutionTransmissionID(id_=SolutionID.loads(tid["commitment"])))
-                        elif tid["type"] == TransmissionID.Type.Transaction:
-                            tids.append(TransactionTransmissionID(id_=TransactionID.loads(tid["transaction_id"])))
-
-                    certificates.append(
-                        BatchCertificate(
-                            batch_header=BatchHeader(
-                                batch_id=Field.loads(dag_vertex["batch_id"]),
-                                author=Address.loads(dag_vertex["author"]),
-                                round_=u64(dag_vertex["round"]),
-                                timestamp=i64(dag_vertex["timestamp"]),
-                                committee_id=Field.loads(dag_vertex["committee_id"]),
-                                transmission_ids=Vec[TransmissionID, u32](tids),
-                                previous_certificate_ids=Vec[Field, u16]([Field.loads(x) for x in previous_cert_ids]),
-                                signature=Signature.loads(dag_vertex["author_signature"]),
-                            ),
-                            signatures=Vec[Signature, u16](signatures),
-                        )
-                    )
-                subdags: dict[u64, Vec[BatchCertificate, u16]] = defaultdict(lambda: Vec[BatchCertificate, u16]([]))
-                for certificate in certificates:
-                    subdags[certificate.batch_header.round].append(certificate)
-                subdag = Subdag(
-                    subdag=subdags
-                )
-                auth = QuorumAuthority(subdag=subdag)
-            else:
-                raise NotImplementedError
+            return (await _BlockLoader(cur).load_blocks([block]))[0]
 
-            await cur.execute("SELECT * FROM block_aborted_solution_id WHERE block_id = %s", (block["id"],))
-            aborted_solution_ids = await cur.fetchall()
-            aborted_solution_ids = [SolutionID.loads(x["solution_id"]) for x in aborted_solution_ids]
-
-            await cur.execute("SELECT * FROM block_aborted_transaction_id WHERE block_id = %s", (block["id"],))
-            aborted_transaction_ids = await cur.fetchall()
-            aborted_transaction_ids = [TransactionID.loads(x["transaction_id"]) for x in aborted_transaction_ids]
+    @staticmethod
+    def _load_raw_block(data: bytes) -> Block:
+        return Block.load(BytesIO(zlib.decompress(data)))
 
-            return Block(
-                block_hash=BlockHash.loads(block['block_hash']),
-                previous_hash=BlockHash.loads(block['previous_hash']),
-                header=DatabaseBlock._get_block_header(block),
-                authority=auth,
-                transactions=Transactions(
-                    transactions=Vec[ConfirmedTransaction, u32](ctxs),
-                ),
-                ratifications=Ratifications(ratifications=Vec[Ratify, u32](rs)),
-                solutions=Solutions(solutions=Option[PuzzleSolutions](puzzle_solution)),
-                aborted_solution_ids=Vec[SolutionID, u32](aborted_solution_ids),
-                aborted_transactions_ids=Vec[TransactionID, u32](aborted_transaction_ids),
-            )
+    @staticmethod
+    def dump_raw_block(block: Block) -> bytes:
+        return zlib.compress(block.dump())
 
     @staticmethod
     async def get_full_block_range(start: int, end: int, conn: psycopg.AsyncConnection[dict[str, Any]]):
         async with conn.cursor() as cur:
             await cur.execute(
-                "SELECT * FROM block WHERE height <= %s AND height > %s ORDER BY height DESC",
+                "SELECT b.*, r.data AS raw_data FROM block b "
+                "LEFT JOIN block_raw r ON r.height = b.height "
+                "WHERE b.height <= %s AND b.height > %s ORDER BY b.height DESC",
                 (start, end)
             )
             blocks = await cur.fetchall()
-            return [await DatabaseBlock._get_full_block(block, conn) for block in blocks]
-
-    @staticmethod
-    async def _get_fast_block(block: dict[str, Any], conn: psycopg.AsyncConnection[dict[str, Any]]) -> dict[str, Any]:
-        async with conn.cursor() as cur:
-            await cur.execute(
-                "SELECT COUNT(*) FROM confirmed_transaction WHERE block_id = %s",
-                (block["id"],)
-            )
-            if (res := await cur.fetchone()) is None:
-                transaction_count = 0
-            else:
-                transaction_count = res["count"]
-            await cur.execute(
-                "SELECT COUNT(*) FROM solution s "
-                "JOIN puzzle_solution ps on s.puzzle_solution_id = ps.id "
-                "WHERE ps.block_id = %s",
-                (block["id"],)
-            )
-            if (res := await cur.fetchone()) is None:
-                partial_solution_count = 0
-            else:
-                partial_solution_count = res["count"]
-            return {
-                **block,
-                "transaction_count": transaction_count,
-                "partial_solution_count": partial_solution_count,
-            }
+            # only blocks missing from the raw store need to be rebuilt
+            rebuilt = iter(await _BlockLoader(cur).load_blocks([b for b in blocks if b["raw_data"] is None]))
+            return [
+                next(rebuilt) if b["raw_data"] is None else DatabaseBlock._load_raw_block(b["raw_data"])
+                for b in blocks
+            ]
 
     @staticmethod
     async def _get_fast_block_range(start: int, end: int, conn: psycopg.AsyncConnection[dict[str, Any]]):
@@ -997,8 +1091,8 @@ class DatabaseBlock(DatabaseBase):
                 "SELECT * FROM block WHERE height <= %s AND height > %s ORDER BY height DESC",
                 (start, end)
             )
-            blocks = await cur.fetchall()
-            return [await DatabaseBlock._get_fast_block(block, conn) for block in blocks]
+            # transaction_count and partial_solution_count are kept on the block row
+            return await cur.fetchall()
 
     async def get_latest_height(self) -> Optional[int]:
         async with self.pool.connection() as conn:
@@ -1027,11 +1121,28 @@ class DatabaseBlock(DatabaseBase):
                     raise
 
 
+    async def get_chain_tip(self) -> Optional[tuple[int, str, int]]: # (height, block_hash, timestamp)
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await cur.execute("SELECT height, block_hash, timestamp FROM block ORDER BY height DESC LIMIT 1")
+                    result = await cur.fetchone()
+                    if result is None:
+                        return None
+                    return result['height'], result['block_hash'], result['timestamp']
+                except Exception as e:
+                    await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                    raise
+
     async def get_latest_block(self):
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    await cur.execute("SELECT * FROM block ORDER BY height DESC LIMIT 1")
+                    await cur.execute(
+                        "SELECT b.*, r.data AS raw_data FROM block b "
+                        "LEFT JOIN block_raw r ON r.height = b.height "
+                        "ORDER BY b.height DESC LIMIT 1"
+                    )
                     block = await cur.fetchone()
                     if block is None:
                         raise RuntimeError("no blocks in database")
@@ -1070,7 +1181,12 @@ class DatabaseBlock(DatabaseBase):
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    await cur.execute("SELECT * FROM block WHERE height = %s", (height,))
+                    await cur.execute(
+                        "SELECT b.*, r.data AS raw_data FROM block b "
+                        "LEFT JOIN block_raw r ON r.height = b.height "
+                        "WHERE b.height = %s",
+                        (height,)
+                    )
                     block = await cur.fetchone()
                     if block is None:
                         return None
@@ -1109,7 +1225,12 @@ class DatabaseBlock(DatabaseBase):
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    await cur.execute("SELECT * FROM block WHERE block_hash = %s", (str(block_hash),))
+                    await cur.execute(
+                        "SELECT b.*, r.data AS raw_data FROM block b "
+                        "LEFT JOIN block_raw r ON r.height = b.height "
+                        "WHERE b.block_hash = %s",
+                        (str(block_hash),)
+                    )
                     block = await cur.fetchone()
                     if block is None:
                         return None
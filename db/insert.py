@@ -4,7 +4,7 @@ from __future__ import annotations
 import os
 import signal
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 
 import psycopg.sql
 from redis.asyncio import Redis
@@ -12,9 +12,13 @@ from redis.asyncio import Redis
 from aleo_types import *
 from disasm.utils import value_type_to_mode_type_str, plaintext_type_to_str
 from explorer.types import Message as ExplorerMessage
-from util.global_cache import global_mapping_cache
-from .base import DatabaseBase, profile
+from util.global_cache import global_mapping_cache, global_program_cache, MappingKeyCache
+from .address import DatabaseAddress
+from .base import DatabaseBase, RedisWriter, profile
+from .block import DatabaseBlock
+from .mapping import MappingWriter
 from .util import DatabaseUtil
+from .validator import DatabaseValidator
 
 
 class _SupplyTracker:
@@ -37,6 +41,212 @@ class _SupplyTracker:
         self.supply -= delta
 
 
+class _BlockWriter:
+    """Buffers rows for one block (or one unconfirmed transaction) and writes each table with a single COPY.
+
+    Ids of rows that are referenced by other buffered rows are taken from the table sequences in bulk, so the
+    whole row tree can be built in memory before anything is sent to the database.
+    """
+
+    columns: dict[str, tuple[str, ...]] = {
+        "transition": ("id", "transition_id", "transaction_execute_id", "fee_id", "program_id", "function_name",
+                       "tpk", "tcm", "index", "scm"),
+        "transition_input": ("id", "transition_id", "type", "index"),
+        "transition_input_public": ("transition_input_id", "plaintext_hash", "plaintext"),
+        "transition_input_private": ("transition_input_id", "ciphertext_hash", "ciphertext"),
+        "transition_input_record": ("transition_input_id", "serial_number", "tag"),
+        "transition_input_external_record": ("transition_input_id", "commitment"),
+        "transition_output": ("id", "transition_id", "type", "index"),
+        "transition_output_public": ("transition_output_id", "plaintext_hash", "plaintext"),
+        "transition_output_private": ("transition_output_id", "ciphertext_hash", "ciphertext"),
+        "transition_output_record": ("transition_output_id", "commitment", "checksum", "record_ciphertext"),
+        "transition_output_external_record": ("transition_output_id", "commitment"),
+        "transition_output_future": ("id", "transition_output_id", "future_hash"),
+        "future": ("id", "type", "transition_output_future_id", "future_argument_id", "program_id", "function_name"),
+        "future_argument": ("id", "future_id", "type", "plaintext"),
+        "address_transition": ("address", "transition_id"),
+        "finalize_operation": ("id", "confirmed_transaction_id", "type", "index"),
+        "finalize_operation_initialize_mapping": ("finalize_operation_id", "mapping_id"),
+        "finalize_operation_insert_kv": ("finalize_operation_id", "mapping_id", "key_id", "value_id"),
+        "finalize_operation_update_kv": ("finalize_operation_id", "mapping_id", "key_id", "value_id"),
+        "finalize_operation_remove_kv": ("finalize_operation_id", "mapping_id", "key_id"),
+        "finalize_operation_replace_mapping": ("finalize_operation_id", "mapping_id"),
+        "finalize_operation_remove_mapping": ("finalize_operation_id", "mapping_id"),
+        "ratification": ("block_id", "index", "type", "amount"),
+        "ratification_genesis_balance": ("address", "amount"),
+        "block_aborted_transaction_id": ("block_id", "transaction_id"),
+        "block_aborted_solution_id": ("block_id", "solution_id"),
+        "address_activity": ("address", "block_id", "height", "timestamp", "transition_id", "program_id",
+                             "function_name", "direction"),
+    }
+    # flush order follows foreign keys; futures and their arguments reference each other so they are
+    # additionally flushed level by level
+    table_order = list(columns.keys())
+
+    def __init__(self):
+        self.rows: dict[tuple[int, str], list[tuple[Any, ...]]] = defaultdict(list)
+        self.ids: dict[str, deque[int]] = defaultdict(deque)
+        self.transition_ids: set[str] = set()
+        # transitions already in the database, see load_existing_transitions
+        self.existing_transition_ids: set[str] = set()
+        self.function_calls: dict[tuple[str, str], int] = defaultdict(int)
+
+    def add(self, table: str, row: tuple[Any, ...], level: int = 0):
+        self.rows[(level, table)].append(row)
+
+    async def reserve_ids(self, cur: psycopg.AsyncCursor[dict[str, Any]], counts: dict[str, int]):
+        counts = {k: v for k, v in counts.items() if v > 0}
+        if not counts:
+            return
+        await cur.execute(
+            "SELECT t.name, nextval(pg_get_serial_sequence(t.name, 'id')) AS id "
+            "FROM unnest(%s::text[], %s::int[]) AS t(name, n), generate_series(1, t.n) "
+            "ORDER BY id",
+            (list(counts.keys()), list(counts.values()))
+        )
+        for row in await cur.fetchall():
+            self.ids[row["name"]].append(row["id"])
+
+    async def load_existing_transitions(self, cur: psycopg.AsyncCursor[dict[str, Any]], transition_ids: list[str]):
+        if not transition_ids:
+            return
+        await cur.execute(
+            "SELECT transition_id FROM transition WHERE transition_id = ANY(%s::text[])", (transition_ids,)
+        )
+        self.existing_transition_ids.update(row["transition_id"] for row in await cur.fetchall())
+
+    async def next_id(self, cur: psycopg.AsyncCursor[dict[str, Any]], table: str) -> int:
+        if not self.ids[table]:
+            # reservation was short (or skipped), fall back to a small batch
+            await self.reserve_ids(cur, {table: 16})
+        return self.ids[table].popleft()
+
+    @staticmethod
+    def count_future_rows(future: Future, counts: dict[str, int]):
+        counts["future"] += 1
+        for argument in future.arguments:
+            counts["future_argument"] += 1
+            if isinstance(argument, FutureArgument):
+                _BlockWriter.count_future_rows(argument.future, counts)
+
+    @staticmethod
+    def count_transition_rows(transitions: list[Transition], counts: dict[str, int], transition_ids: list[str]):
+        for transition in transitions:
+            transition_ids.append(str(transition.id))
+            counts["transition"] += 1
+            counts["transition_input"] += len(transition.inputs)
+            counts["transition_output"] += len(transition.outputs)
+            for output in transition.outputs:
+                if isinstance(output, FutureTransitionOutput):
+                    counts["transition_output_future"] += 1
+                    if output.future.value is not None:
+                        _BlockWriter.count_future_rows(output.future.value, counts)
+
+    @staticmethod
+    def count_transaction_rows(transaction: Transaction, confirmed_transaction: Optional[ConfirmedTransaction],
+                               counts: dict[str, int], transition_ids: list[str]):
+        if isinstance(transaction, DeployTransaction):
+            transitions = [cast(Fee, transaction.fee).transition]
+        elif isinstance(transaction, ExecuteTransaction):
+            transitions = list(transaction.execution.transitions)
+            fee = cast(Option[Fee], transaction.fee)
+            if fee.value is not None:
+                transitions.append(fee.value.transition)
+        elif isinstance(transaction, FeeTransaction):
+            transitions = [cast(Fee, transaction.fee).transition]
+            if isinstance(confirmed_transaction, RejectedExecute):
+                transitions.extend(cast(RejectedExecution, confirmed_transaction.rejected).execution.transitions)
+        else:
+            raise NotImplementedError
+        _BlockWriter.count_transition_rows(transitions, counts, transition_ids)
+
+    @staticmethod
+    def _future_addresses(future: Future, addresses: set[str]):
+        for argument in future.arguments:
+            if isinstance(argument, PlaintextArgument):
+                plaintext = argument.plaintext
+                if isinstance(plaintext, LiteralPlaintext) and plaintext.literal.type == Literal.Type.Address:
+                    addresses.add(str(plaintext.literal.primitive))
+                elif isinstance(plaintext, StructPlaintext):
+                    addresses.update(DatabaseUtil.get_addresses_from_struct(plaintext))
+            elif isinstance(argument, FutureArgument):
+                _BlockWriter._future_addresses(argument.future, addresses)
+
+    def add_address_activity(self, block_db_id: int, block: Block):
+        # one row per (address, transition) with the same addresses as address_transition; direction is "input" for
+        # public inputs, "output" for finalize arguments or "both". Written from the block itself as transitions of
+        # transactions seen unconfirmed earlier are not inserted again.
+        for confirmed_transaction in block.transactions:
+            transaction = confirmed_transaction.transaction
+            if isinstance(transaction, ExecuteTransaction):
+                transitions = list(transaction.execution.transitions)
+                fee = cast(Option[Fee], transaction.fee)
+                if fee.value is not None:
+                    transitions.append(fee.value.transition)
+            elif isinstance(transaction, (DeployTransaction, FeeTransaction)):
+                transitions = [cast(Fee, transaction.fee).transition]
+                if isinstance(confirmed_transaction, RejectedExecute):
+                    transitions.extend(cast(RejectedExecution, confirmed_transaction.rejected).execution.transitions)
+            else:
+                raise NotImplementedError
+            for transition in transitions:
+                inputs: set[str] = set()
+                for transition_input in transition.inputs:
+                    if isinstance(transition_input, PublicTransitionInput) and transition_input.plaintext.value is not None:
+                        plaintext = transition_input.plaintext.value
+                        if isinstance(plaintext, LiteralPlaintext) and plaintext.literal.type == Literal.Type.Address:
+                            inputs.add(str(plaintext.literal.primitive))
+                        elif isinstance(plaintext, StructPlaintext):
+                            inputs.update(DatabaseUtil.get_addresses_from_struct(plaintext))
+                outputs: set[str] = set()
+                for transition_output in transition.outputs:
+                    if isinstance(transition_output, FutureTransitionOutput) and transition_output.future.value is not None:
+                        self._future_addresses(transition_output.future.value, outputs)
+                for address in inputs | outputs:
+                    if address not in outputs:
+                        direction = "input"
+                    elif address not in inputs:
+                        direction = "output"
+                    else:
+                        direction = "both"
+                    self.add("address_activity", (
+                        address, block_db_id, block.height, block.header.metadata.timestamp, str(transition.id),
+                        str(transition.program_id), str(transition.function_name), direction
+                    ))
+
+    async def flush(self, cur: psycopg.AsyncCursor[dict[str, Any]]):
+        for level, table in sorted(self.rows.keys(), key=lambda x: (x[0], self.table_order.index(x[1]))):
+            rows = self.rows[(level, table)]
+            if not rows:
+                continue
+            async with cur.copy(
+                psycopg.sql.SQL("COPY {} ({}) FROM STDIN").format(
+                    psycopg.sql.Identifier(table),
+                    psycopg.sql.SQL(", ").join(map(psycopg.sql.Identifier, self.columns[table]))
+                )
+            ) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+        self.rows.clear()
+
+        if self.function_calls:
+            program_ids = list(set(program_id for program_id, _ in self.function_calls.keys()))
+            await cur.execute(
+                "SELECT id, program_id FROM program WHERE program_id = ANY(%s::text[])", (program_ids,)
+            )
+            program_db_ids: dict[str, int] = {x["program_id"]: x["id"] for x in await cur.fetchall()}
+            if len(program_db_ids) != len(program_ids):
+                raise RuntimeError("program in transition does not exist - unconfirmed transaction?")
+            calls = [(program_db_ids[program_id], name, count) for (program_id, name), count in self.function_calls.items()]
+            await cur.execute(
+                "UPDATE program_function pf SET called = pf.called + c.count "
+                "FROM unnest(%s::int[], %s::text[], %s::int[]) AS c(program_id, name, count) "
+                "WHERE pf.program_id = c.program_id AND pf.name = c.name",
+                ([x[0] for x in calls], [x[1] for x in calls], [x[2] for x in calls])
+            )
+            self.function_calls.clear()
+
+
 class DatabaseInsert(DatabaseBase):
 
     def __init__(self, *args, **kwargs): # type: ignore
@@ -54,97 +264,40 @@ class DatabaseInsert(DatabaseBase):
         ]
 
     @staticmethod
-    async def _insert_future(conn: psycopg.AsyncConnection[dict[str, Any]], future: Future,
-                             transition_output_future_db_id: Optional[int] = None, argument_db_id: Optional[int] = None,):
-        async with conn.cursor() as cur:
-            if transition_output_future_db_id:
-                await cur.execute(
-                    "INSERT INTO future (type, transition_output_future_id, program_id, function_name) "
-                    "VALUES ('Output', %s, %s, %s) RETURNING id",
-                    (transition_output_future_db_id, str(future.program_id), str(future.function_name))
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("failed to insert row into database")
-                future_db_id = res["id"]
-                await cur.execute(
-                    "SELECT t.id FROM transition t "
-                    "JOIN transition_output o on t.id = o.transition_id "
-                    "JOIN transition_output_future tof on o.id = tof.transition_output_id "
-                    "WHERE tof.id = %s",
-                    (transition_output_future_db_id,)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("database inconsistent")
-                transition_db_id = res["id"]
-            elif argument_db_id:
-                await cur.execute(
-                    "INSERT INTO future (type, future_argument_id, program_id, function_name) "
-                    "VALUES ('Argument', %s, %s, %s) RETURNING id",
-                    (argument_db_id, str(future.program_id), str(future.function_name))
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("failed to insert row into database")
-                future_db_id = res["id"]
-                while True:
-                    await cur.execute(
-                        "SELECT f.id, f.transition_output_future_id, f.future_argument_id FROM future f "
-                        "JOIN future_argument a on f.id = a.future_id "
-                        "WHERE a.id = %s",
-                        (argument_db_id,)
-                    )
-                    if (res := await cur.fetchone()) is None:
-                        raise RuntimeError("database inconsistent")
-                    if res["transition_output_future_id"]:
-                        transition_output_future_db_id = res["transition_output_future_id"]
-                        break
-                    argument_db_id = res["future_argument_id"]
-                await cur.execute(
-                    "SELECT t.id FROM transition t "
-                    "JOIN transition_output o on t.id = o.transition_id "
-                    "JOIN transition_output_future tof on o.id = tof.transition_output_id "
-                    "WHERE tof.id = %s",
-                    (transition_output_future_db_id,)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("database inconsistent")
-                transition_db_id = res["id"]
+    async def _insert_future(cur: psycopg.AsyncCursor[dict[str, Any]], writer: _BlockWriter, future: Future,
+                             transition_db_id: int, transition_output_future_db_id: Optional[int] = None,
+                             argument_db_id: Optional[int] = None, level: int = 0):
+        future_db_id = await writer.next_id(cur, "future")
+        if transition_output_future_db_id:
+            writer.add("future", (future_db_id, "Output", transition_output_future_db_id, None,
+                                  str(future.program_id), str(future.function_name)), level)
+        elif argument_db_id:
+            writer.add("future", (future_db_id, "Argument", None, argument_db_id,
+                                  str(future.program_id), str(future.function_name)), level)
+        else:
+            raise ValueError("transition_output_db_id or argument_db_id must be set")
+        for argument in future.arguments:
+            argument_db_id = await writer.next_id(cur, "future_argument")
+            if isinstance(argument, PlaintextArgument):
+                plaintext = argument.plaintext
+                writer.add("future_argument", (argument_db_id, future_db_id, argument.type.name, plaintext.dump()), level)
+                if isinstance(plaintext, LiteralPlaintext) and plaintext.literal.type == Literal.Type.Address:
+                    address = str(plaintext.literal.primitive)
+                    writer.add("address_transition", (address, transition_db_id))
+                elif isinstance(plaintext, StructPlaintext):
+                    addresses = DatabaseUtil.get_addresses_from_struct(plaintext)
+                    for address in addresses:
+                        writer.add("address_transition", (address, transition_db_id))
+
+            elif isinstance(argument, FutureArgument):
+                writer.add("future_argument", (argument_db_id, future_db_id, argument.type.name, None), level)
+                await DatabaseInsert._insert_future(cur, writer, argument.future, transition_db_id,
+                                                    argument_db_id=argument_db_id, level=level + 1)
             else:
-                raise ValueError("transition_output_db_id or argument_db_id must be set")
-            for argument in future.arguments:
-                if isinstance(argument, PlaintextArgument):
-                    plaintext = argument.plaintext
-                    await cur.execute(
-                        "INSERT INTO future_argument (future_id, type, plaintext) VALUES (%s, %s, %s)",
-                        (future_db_id, argument.type.name, plaintext.dump())
-                    )
-                    if isinstance(plaintext, LiteralPlaintext) and plaintext.literal.type == Literal.Type.Address:
-                        address = str(plaintext.literal.primitive)
-                        await cur.execute(
-                            "INSERT INTO address_transition (address, transition_id) VALUES (%s, %s)",
-                            (address, transition_db_id)
-                        )
-                    elif isinstance(plaintext, StructPlaintext):
-                        addresses = DatabaseUtil.get_addresses_from_struct(plaintext)
-                        for address in addresses:
-                            await cur.execute(
-                                "INSERT INTO address_transition (address, transition_id) VALUES (%s, %s)",
-                                (address, transition_db_id)
-                            )
-
-                elif isinstance(argument, FutureArgument):
-                    await cur.execute(
-                        "INSERT INTO future_argument (future_id, type) VALUES (%s, %s) RETURNING id",
-                        (future_db_id, argument.type.name)
-                    )
-                    if (res := await cur.fetchone()) is None:
-                        raise RuntimeError("failed to insert row into database")
-                    argument_db_id = res["id"]
-                    await DatabaseInsert._insert_future(conn, argument.future, argument_db_id=argument_db_id)
-                else:
-                    raise NotImplementedError
+                raise NotImplementedError
 
     @staticmethod
-    async def _update_address_stats(redis_conn: Redis[str], transaction: Transaction):
+    def _update_address_stats(redis_writer: RedisWriter, transaction: Transaction):
 
         if isinstance(transaction, DeployTransaction):
             transitions = [cast(Fee, transaction.fee).transition]
@@ -187,156 +340,105 @@ class DatabaseInsert(DatabaseBase):
 
                 if transfer_from != transfer_to:
                     if transfer_from is not None:
-                        await redis_conn.hincrby("address_transfer_out", transfer_from, amount) # type: ignore
+                        redis_writer.hincrby("address_transfer_out", transfer_from, amount) # type: ignore
                     if transfer_to is not None:
-                        await redis_conn.hincrby("address_transfer_in", transfer_to, amount) # type: ignore
+                        redis_writer.hincrby("address_transfer_in", transfer_to, amount) # type: ignore
 
                 if fee_from is not None:
-                    await redis_conn.hincrby("address_fee", fee_from, amount) # type: ignore
+                    redis_writer.hincrby("address_fee", fee_from, amount) # type: ignore
 
     @staticmethod
-    async def _insert_transition(conn: psycopg.AsyncConnection[dict[str, Any]], redis_conn: Redis[str],
+    async def _insert_transition(conn: psycopg.AsyncConnection[dict[str, Any]], writer: _BlockWriter,
                                  exe_tx_db_id: Optional[int], fee_db_id: Optional[int],
                                  transition: Transition, ts_index: int, is_rejected: bool = False, should_exist: bool = False):
         async with conn.cursor() as cur:
-            await cur.execute(
-                "SELECT id FROM transition WHERE transition_id = %s", (str(transition.id),)
-            )
-            if await cur.fetchone() is not None:
+            transition_id = str(transition.id)
+            if transition_id in writer.transition_ids or transition_id in writer.existing_transition_ids:
                 if not is_rejected or not should_exist:
                     raise RuntimeError("transition already exists in database")
                 else:
                     return
-            await cur.execute(
-                "INSERT INTO transition (transition_id, transaction_execute_id, fee_id, program_id, "
-                "function_name, tpk, tcm, index, scm) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
-                (str(transition.id), exe_tx_db_id, fee_db_id, str(transition.program_id),
-                 str(transition.function_name), str(transition.tpk), str(transition.tcm), ts_index, str(transition.scm))
-            )
-            if (res := await cur.fetchone()) is None:
-                raise RuntimeError("failed to insert row into database")
-            transition_db_id = res["id"]
+            writer.transition_ids.add(transition_id)
+            transition_db_id = await writer.next_id(cur, "transition")
+            writer.add("transition", (
+                transition_db_id, transition_id, exe_tx_db_id, fee_db_id, str(transition.program_id),
+                str(transition.function_name), str(transition.tpk), str(transition.tcm), ts_index, str(transition.scm)
+            ))
 
             transition_input: TransitionInput
             for input_index, transition_input in enumerate(transition.inputs):
-                await cur.execute(
-                    "INSERT INTO transition_input (transition_id, type, index) VALUES (%s, %s, %s) RETURNING id",
-                    (transition_db_id, transition_input.type.name, input_index)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("failed to insert row into database")
-                transition_input_db_id = res["id"]
+                transition_input_db_id = await writer.next_id(cur, "transition_input")
+                writer.add("transition_input", (transition_input_db_id, transition_db_id, transition_input.type.name, input_index))
                 if isinstance(transition_input, PublicTransitionInput):
-                    await cur.execute(
-                        "INSERT INTO transition_input_public (transition_input_id, plaintext_hash, plaintext) "
-                        "VALUES (%s, %s, %s)",
-                        (transition_input_db_id, str(transition_input.plaintext_hash),
-                         transition_input.plaintext.dump_nullable())
-                    )
+                    writer.add("transition_input_public", (
+                        transition_input_db_id, str(transition_input.plaintext_hash),
+                        transition_input.plaintext.dump_nullable()
+                    ))
                     if transition_input.plaintext.value is not None:
                         plaintext = transition_input.plaintext.value
                         if isinstance(plaintext, LiteralPlaintext) and plaintext.literal.type == Literal.Type.Address:
                             address = str(plaintext.literal.primitive)
-                            await cur.execute(
-                                "INSERT INTO address_transition (address, transition_id) VALUES (%s, %s)",
-                                (address, transition_db_id)
-                            )
+                            writer.add("address_transition", (address, transition_db_id))
                         elif isinstance(plaintext, StructPlaintext):
                             addresses = DatabaseUtil.get_addresses_from_struct(plaintext)
                             for address in addresses:
-                                await cur.execute(
-                                    "INSERT INTO address_transition (address, transition_id) VALUES (%s, %s)",
-                                    (address, transition_db_id)
-                                )
+                                writer.add("address_transition", (address, transition_db_id))
                 elif isinstance(transition_input, PrivateTransitionInput):
-                    await cur.execute(
-                        "INSERT INTO transition_input_private (transition_input_id, ciphertext_hash, ciphertext) "
-                        "VALUES (%s, %s, %s)",
-                        (transition_input_db_id, str(transition_input.ciphertext_hash),
-                         transition_input.ciphertext.dumps())
-                    )
+                    writer.add("transition_input_private", (
+                        transition_input_db_id, str(transition_input.ciphertext_hash),
+                        transition_input.ciphertext.dumps()
+                    ))
                 elif isinstance(transition_input, RecordTransitionInput):
-                    await cur.execute(
-                        "INSERT INTO transition_input_record (transition_input_id, serial_number, tag) "
-                        "VALUES (%s, %s, %s)",
-                        (transition_input_db_id, str(transition_input.serial_number),
-                         str(transition_input.tag))
-                    )
+                    writer.add("transition_input_record", (
+                        transition_input_db_id, str(transition_input.serial_number), str(transition_input.tag)
+                    ))
                 elif isinstance(transition_input, ExternalRecordTransitionInput):
-                    await cur.execute(
-                        "INSERT INTO transition_input_external_record (transition_input_id, commitment) "
-                        "VALUES (%s, %s)",
-                        (transition_input_db_id, str(transition_input.input_commitment))
-                    )
+                    writer.add("transition_input_external_record", (
+                        transition_input_db_id, str(transition_input.input_commitment)
+                    ))
 
                 else:
                     raise NotImplementedError
 
             transition_output: TransitionOutput
             for output_index, transition_output in enumerate(transition.outputs):
-                await cur.execute(
-                    "INSERT INTO transition_output (transition_id, type, index) VALUES (%s, %s, %s) RETURNING id",
-                    (transition_db_id, transition_output.type.name, output_index)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise RuntimeError("failed to insert row into database")
-                transition_output_db_id = res["id"]
+                transition_output_db_id = await writer.next_id(cur, "transition_output")
+                writer.add("transition_output", (transition_output_db_id, transition_db_id, transition_output.type.name, output_index))
                 if isinstance(transition_output, PublicTransitionOutput):
-                    await cur.execute(
-                        "INSERT INTO transition_output_public (transition_output_id, plaintext_hash, plaintext) "
-                        "VALUES (%s, %s, %s)",
-                        (transition_output_db_id, str(transition_output.plaintext_hash),
-                         transition_output.plaintext.dump_nullable())
-                    )
+                    writer.add("transition_output_public", (
+                        transition_output_db_id, str(transition_output.plaintext_hash),
+                        transition_output.plaintext.dump_nullable()
+                    ))
                 elif isinstance(transition_output, PrivateTransitionOutput):
-                    await cur.execute(
-                        "INSERT INTO transition_output_private (transition_output_id, ciphertext_hash, ciphertext) "
-                        "VALUES (%s, %s, %s)",
-                        (transition_output_db_id, str(transition_output.ciphertext_hash),
-                         transition_output.ciphertext.dumps())
-                    )
+                    writer.add("transition_output_private", (
+                        transition_output_db_id, str(transition_output.ciphertext_hash),
+                        transition_output.ciphertext.dumps()
+                    ))
                 elif isinstance(transition_output, RecordTransitionOutput):
-                    await cur.execute(
-                        "INSERT INTO transition_output_record (transition_output_id, commitment, checksum, record_ciphertext) "
-                        "VALUES (%s, %s, %s, %s)",
-                        (transition_output_db_id, str(transition_output.commitment),
-                         str(transition_output.checksum), transition_output.record_ciphertext.dumps())
-                    )
+                    writer.add("transition_output_record", (
+                        transition_output_db_id, str(transition_output.commitment),
+                        str(transition_output.checksum), transition_output.record_ciphertext.dumps()
+                    ))
                 elif isinstance(transition_output, ExternalRecordTransitionOutput):
-                    await cur.execute(
-                        "INSERT INTO transition_output_external_record (transition_output_id, commitment) "
-                        "VALUES (%s, %s)",
-                        (transition_output_db_id, str(transition_output.commitment))
-                    )
+                    writer.add("transition_output_external_record", (
+                        transition_output_db_id, str(transition_output.commitment)
+                    ))
                 elif isinstance(transition_output, FutureTransitionOutput):
-                    await cur.execute(
-                        "INSERT INTO transition_output_future (transition_output_id, future_hash) "
-                        "VALUES (%s, %s) RETURNING id",
-                        (transition_output_db_id, str(transition_output.future_hash))
-                    )
-                    if (res := await cur.fetchone()) is None:
-                        raise Exception("failed to insert row into database")
-                    transition_output_future_db_id = res["id"]
+                    transition_output_future_db_id = await writer.next_id(cur, "transition_output_future")
+                    writer.add("transition_output_future", (
+                        transition_output_future_db_id, transition_output_db_id, str(transition_output.future_hash)
+                    ))
                     if transition_output.future.value is not None:
-                        await DatabaseInsert._insert_future(conn, transition_output.future.value, transition_output_future_db_id)
+                        await DatabaseInsert._insert_future(cur, writer, transition_output.future.value, transition_db_id,
+                                                            transition_output_future_db_id)
                 else:
                     raise NotImplementedError
 
-            await cur.execute(
-                "SELECT id FROM program WHERE program_id = %s", (str(transition.program_id),)
-            )
-            if (res := await cur.fetchone()) is None:
-                raise RuntimeError("program in transition does not exist - unconfirmed transaction?")
-            program_db_id = res["id"]
-            await cur.execute(
-                "UPDATE program_function SET called = called + 1 WHERE program_id = %s AND name = %s",
-                (program_db_id, str(transition.function_name))
-            )
+            writer.function_calls[(str(transition.program_id), str(transition.function_name))] += 1
 
 
     @staticmethod
-    async def _insert_deploy_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], redis: Redis[str],
+    async def _insert_deploy_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], writer: _BlockWriter,
                                          deployment: Deployment, owner: ProgramOwner, fee: Fee, transaction_db_id: int,
                                          is_unconfirmed: bool = False, is_rejected: bool = False, fee_should_exist: bool = False):
         async with conn.cursor() as cur:
@@ -371,10 +473,10 @@ class DatabaseInsert(DatabaseBase):
                 raise RuntimeError("failed to insert row into database")
             fee_db_id = res["id"]
 
-            await DatabaseInsert._insert_transition(conn, redis, None, fee_db_id, fee.transition, 0, is_rejected, fee_should_exist)
+            await DatabaseInsert._insert_transition(conn, writer, None, fee_db_id, fee.transition, 0, is_rejected, fee_should_exist)
 
     @staticmethod
-    async def _insert_execute_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], redis: Redis[str],
+    async def _insert_execute_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], writer: _BlockWriter,
                                           execution: Execution, fee: Optional[Fee], transaction_db_id: int,
                                           is_rejected: bool = False, ts_should_exist: bool = False):
         async with conn.cursor() as cur:
@@ -397,7 +499,7 @@ class DatabaseInsert(DatabaseBase):
             execute_transaction_db_id = res["id"]
 
             for ts_index, transition in enumerate(execution.transitions):
-                await DatabaseInsert._insert_transition(conn, redis, execute_transaction_db_id, None, transition, ts_index, is_rejected, ts_should_exist)
+                await DatabaseInsert._insert_transition(conn, writer, execute_transaction_db_id, None, transition, ts_index, is_rejected, ts_should_exist)
 
             if fee:
                 await cur.execute(
@@ -408,10 +510,11 @@ class DatabaseInsert(DatabaseBase):
                 if (res := await cur.fetchone()) is None:
                     raise RuntimeError("failed to insert row into database")
                 fee_db_id = res["id"]
-                await DatabaseInsert._insert_transition(conn, redis, None, fee_db_id, fee.transition, 0, is_rejected, ts_should_exist)
+                await DatabaseInsert._insert_transition(conn, writer, None, fee_db_id, fee.transition, 0, is_rejected, ts_should_exist)
 
     @staticmethod
-    async def _insert_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], redis: Redis[str], transaction: Transaction,
+    async def _insert_transaction(conn: psycopg.AsyncConnection[dict[str, Any]], redis_writer: RedisWriter, writer: _BlockWriter,
+                                  transaction: Transaction,
                                   confirmed_transaction: Optional[ConfirmedTransaction] = None, ct_index: Optional[int] = None,
                                   ignore_deploy_txids: Optional[list[str]] = None, confirmed_transaction_db_id: Optional[int] = None,
                                   reject_reasons: Optional[list[Optional[str]]] = None):
@@ -499,7 +602,7 @@ class DatabaseInsert(DatabaseBase):
                                 "UPDATE transaction SET transaction_id = %s, original_transaction_id = %s, type = 'Fee' WHERE id = %s",
                                 (str(transaction.id), original_transaction_id, transaction_db_id)
                             )
-                            await DatabaseInsert._insert_deploy_transaction(conn, redis, rejected_deployment.deploy, rejected_deployment.program_owner, fee, transaction_db_id, is_rejected=True, fee_should_exist=True)
+                            await DatabaseInsert._insert_deploy_transaction(conn, writer, rejected_deployment.deploy, rejected_deployment.program_owner, fee, transaction_db_id, is_rejected=True, fee_should_exist=True)
 
                     elif isinstance(confirmed_transaction, RejectedExecute):
                         rejected_execution = cast(RejectedExecution, confirmed_transaction.rejected)
@@ -519,7 +622,7 @@ class DatabaseInsert(DatabaseBase):
                                 "UPDATE transaction SET transaction_id = %s, original_transaction_id = %s, type = 'Fee' WHERE id = %s",
                                 (str(transaction.id), original_transaction_id, transaction_db_id)
                             )
-                            await DatabaseInsert._insert_execute_transaction(conn, redis, rejected_execution.execution,
+                            await DatabaseInsert._insert_execute_transaction(conn, writer, rejected_execution.execution,
                                                                              cast(Fee, transaction.fee),
                                                                              transaction_db_id, is_rejected=True,
                                                                              ts_should_exist=True)
@@ -539,22 +642,22 @@ class DatabaseInsert(DatabaseBase):
 
                 if isinstance(transaction, DeployTransaction): # accepted deploy / unconfirmed
                     await DatabaseInsert._insert_deploy_transaction(
-                        conn, redis, transaction.deployment, transaction.owner, cast(Fee, transaction.fee), transaction_db_id,
+                        conn, writer, transaction.deployment, transaction.owner, cast(Fee, transaction.fee), transaction_db_id,
                         is_unconfirmed=(confirmed_transaction is None)
                     )
 
                 elif isinstance(transaction, ExecuteTransaction): # accepted execute / unconfirmed
-                    await DatabaseInsert._insert_execute_transaction(conn, redis, transaction.execution,
+                    await DatabaseInsert._insert_execute_transaction(conn, writer, transaction.execution,
                                                                      cast(Option[Fee], transaction.fee).value,
                                                                      transaction_db_id)
 
                 elif isinstance(transaction, FeeTransaction) and not prior_tx: # first seen rejected tx
                     if isinstance(confirmed_transaction, RejectedDeploy):
                         rejected_deployment = cast(RejectedDeployment, confirmed_transaction.rejected)
-                        await DatabaseInsert._insert_deploy_transaction(conn, redis, rejected_deployment.deploy, rejected_deployment.program_owner, cast(Fee, transaction.fee), transaction_db_id, is_rejected=True)
+                        await DatabaseInsert._insert_deploy_transaction(conn, writer, rejected_deployment.deploy, rejected_deployment.program_owner, cast(Fee, transaction.fee), transaction_db_id, is_rejected=True)
                     elif isinstance(confirmed_transaction, RejectedExecute):
                         rejected_execution = cast(RejectedExecution, confirmed_transaction.rejected)
-                        await DatabaseInsert._insert_execute_transaction(conn, redis, rejected_execution.execution,
+                        await DatabaseInsert._insert_execute_transaction(conn, writer, rejected_execution.execution,
                                                                          cast(Fee, transaction.fee), transaction_db_id,
                                                                          is_rejected=True)
 
@@ -580,6 +683,7 @@ class DatabaseInsert(DatabaseBase):
                         raise RuntimeError("database inconsistent")
                     deploy_transaction_db_id = res["id"]
                     await DatabaseInsert._save_program(cur, transaction.deployment.program, deploy_transaction_db_id, transaction)
+                    global_program_cache.invalidate(redis_writer, str(transaction.deployment.program.id))
 
                 elif isinstance(confirmed_transaction, AcceptedExecute):
                     if reject_reasons[ct_index] is not None:
@@ -591,7 +695,7 @@ class DatabaseInsert(DatabaseBase):
                     await cur.execute("UPDATE confirmed_transaction SET reject_reason = %s WHERE id = %s",
                                       (reject_reasons[ct_index], confirmed_transaction_db_id))
 
-                await DatabaseInsert._update_address_stats(redis, transaction)
+                DatabaseInsert._update_address_stats(redis_writer, transaction)
 
     async def save_builtin_program(self, program: Program):
         async with self.pool.connection() as conn:
@@ -660,6 +764,7 @@ class DatabaseInsert(DatabaseBase):
     @profile
     async def _update_committee_bonded_delegated_map(
         self,
+        redis_writer: RedisWriter,
         committee_members: dict[Address, tuple[u64, bool_, u8]],
         stakers: dict[Address, tuple[Address, u64]],
         delegated: dict[Address, u64],
@@ -695,10 +800,7 @@ class DatabaseInsert(DatabaseBase):
                 "key": key,
                 "value": value,
             }
-        await self.redis.execute_command("MULTI")
-        await self.redis.delete("credits.aleo:committee")
-        await self.redis.hset("credits.aleo:committee", mapping={k: json.dumps(v) for k, v in committee_mapping.items()})
-        await self.redis.execute_command("EXEC")
+        redis_writer.replace_hash("credits.aleo:committee", {k: json.dumps(v) for k, v in committee_mapping.items()})
 
         global_mapping_cache[bonded_mapping_id] = {}
         bonded_mapping: dict[str, dict[str, str]] = {}
@@ -726,10 +828,7 @@ class DatabaseInsert(DatabaseBase):
                 "key": key,
                 "value": value,
             }
-        await self.redis.execute_command("MULTI")
-        await self.redis.delete("credits.aleo:bonded")
-        await self.redis.hset("credits.aleo:bonded", mapping={k: json.dumps(v) for k, v in bonded_mapping.items()})
-        await self.redis.execute_command("EXEC")
+        redis_writer.replace_hash("credits.aleo:bonded", {k: json.dumps(v) for k, v in bonded_mapping.items()})
 
         global_mapping_cache[delegated_mapping_id] = {}
         delegated_mapping: dict[str, dict[str, str]] = {}
@@ -745,10 +844,7 @@ class DatabaseInsert(DatabaseBase):
                 "key": key,
                 "value": value,
             }
-        await self.redis.execute_command("MULTI")
-        await self.redis.delete("credits.aleo:delegated")
-        await self.redis.hset("credits.aleo:delegated", mapping={k: json.dumps(v) for k, v in delegated_mapping.items()})
-        await self.redis.execute_command("EXEC")
+        redis_writer.replace_hash("credits.aleo:delegated", {k: json.dumps(v) for k, v in delegated_mapping.items()})
 
     @staticmethod
     async def _save_committee_history(cur: psycopg.AsyncCursor[dict[str, Any]], height: int, committee: Committee):
@@ -777,20 +873,20 @@ class DatabaseInsert(DatabaseBase):
                 delegated[validator] = amount
         return delegated
 
-    async def _pre_ratify(self, cur: psycopg.AsyncCursor[dict[str, Any]], ratification: GenesisRatify,
-                          supply_tracker: _SupplyTracker):
+    async def _pre_ratify(self, cur: psycopg.AsyncCursor[dict[str, Any]], mapping_writer: MappingWriter,
+                          ratification: GenesisRatify, supply_tracker: _SupplyTracker):
         from interpreter.interpreter import global_mapping_cache
         committee = ratification.committee
         await DatabaseInsert._save_committee_history(cur, 0, committee)
 
         account_mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "account"))
-        global_mapping_cache[account_mapping_id] = {}
+        global_mapping_cache.key_cache("credits.aleo", "account", account_mapping_id)
         bonded_mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "bonded"))
         global_mapping_cache[bonded_mapping_id] = {}
         withdraw_mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "withdraw"))
-        global_mapping_cache[withdraw_mapping_id] = {}
+        global_mapping_cache.key_cache("credits.aleo", "withdraw", withdraw_mapping_id)
         metadata_mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "metadata"))
-        global_mapping_cache[metadata_mapping_id] = {}
+        global_mapping_cache.key_cache("credits.aleo", "metadata", metadata_mapping_id)
 
         bonded_balances = ratification.bonded_balances
         stakers: dict[Address, tuple[Address, u64]] = {}
@@ -799,7 +895,7 @@ class DatabaseInsert(DatabaseBase):
         delegated: dict[Address, u64] = self._stakers_to_delegated(stakers)
 
         committee_members = {address: (amount, is_open, commission) for address, amount, is_open, commission in committee.members}
-        await self._update_committee_bonded_delegated_map(committee_members, stakers, delegated)
+        await self._update_committee_bonded_delegated_map(mapping_writer.redis, committee_members, stakers, delegated)
 
         public_balances = ratification.public_balances
         operations: list[dict[str, Any]] = []
@@ -903,17 +999,28 @@ class DatabaseInsert(DatabaseBase):
         })
 
         from interpreter.interpreter import execute_operations
-        await execute_operations(cast("Database", self), cur, operations)
+        await execute_operations(cast("Database", self), cur, mapping_writer, operations)
 
     @staticmethod
-    async def _get_committee_mapping_unchecked(redis_conn: Redis[str]) -> dict[Address, tuple[bool_, u8]]:
-        data = await redis_conn.hgetall("credits.aleo:committee")
-        committee_members: dict[Address, tuple[bool_, u8]] = {}
+    async def _get_limited_mapping_unchecked(redis_conn: Redis[str], mapping: str) -> list[tuple[Plaintext, Value]]:
+        mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", mapping))
+        cached = global_mapping_cache.get(mapping_id)
+        if cached is not None and not isinstance(cached, MappingKeyCache):
+            # redis only gets the block's changes when its pipeline runs at the end of the block
+            return [(v["key"], v["value"]) for v in cached.values()]
+        data = await redis_conn.hgetall(f"credits.aleo:{mapping}")
+        res: list[tuple[Plaintext, Value]] = []
         for d in data.values():
             d = json.loads(d)
-            key = cast(LiteralPlaintext, Plaintext.load(BytesIO(bytes.fromhex(d["key"]))))
-            value = cast(PlaintextValue, Value.load(BytesIO(bytes.fromhex(d["value"]))))
-            plaintext = cast(StructPlaintext, value.plaintext)
+            res.append((Plaintext.load(BytesIO(bytes.fromhex(d["key"]))), Value.load(BytesIO(bytes.fromhex(d["value"])))))
+        return res
+
+    @staticmethod
+    async def _get_committee_mapping_unchecked(redis_conn: Redis[str]) -> dict[Address, tuple[bool_, u8]]:
+        committee_members: dict[Address, tuple[bool_, u8]] = {}
+        for key, value in await DatabaseInsert._get_limited_mapping_unchecked(redis_conn, "committee"):
+            key = cast(LiteralPlaintext, key)
+            plaintext = cast(StructPlaintext, cast(PlaintextValue, value).plaintext)
             is_open = cast(LiteralPlaintext, plaintext["is_open"])
             commission = cast(LiteralPlaintext, plaintext["commission"])
             committee_members[cast(Address, key.literal.primitive)] = (
@@ -924,24 +1031,16 @@ class DatabaseInsert(DatabaseBase):
 
     @staticmethod
     async def _get_delegated_mapping_unchecked(redis_conn: Redis[str]) -> dict[Address, u64]:
-        data = await redis_conn.hgetall("credits.aleo:delegated")
         delegators: dict[Address, u64] = {}
-        for d in data.values():
-            d = json.loads(d)
-            key = cast(LiteralPlaintext, Plaintext.load(BytesIO(bytes.fromhex(d["key"]))))
-            value = cast(PlaintextValue, Value.load(BytesIO(bytes.fromhex(d["value"]))))
-            plaintext = cast(LiteralPlaintext, value.plaintext)
+        for key, value in await DatabaseInsert._get_limited_mapping_unchecked(redis_conn, "delegated"):
+            key = cast(LiteralPlaintext, key)
+            plaintext = cast(LiteralPlaintext, cast(PlaintextValue, value).plaintext)
             delegators[cast(Address, key.literal.primitive)] = cast(u64, plaintext.literal.primitive)
         return delegators
 
     async def get_bonded_mapping_unchecked(self) -> dict[Address, tuple[Address, u64]]:
-        data = await self.redis.hgetall("credits.aleo:bonded")
-
         stakers: dict[Address, tuple[Address, u64]] = {}
-        for d in data.values():
-            d = json.loads(d)
-            key = Plaintext.load(BytesIO(bytes.fromhex(d["key"])))
-            value = Value.load(BytesIO(bytes.fromhex(d["value"])))
+        for key, value in await self._get_limited_mapping_unchecked(self.redis, "bonded"):
             plaintext = cast(PlaintextValue, value).plaintext
             validator = cast(StructPlaintext, plaintext)["validator"]
             amount = cast(StructPlaintext, plaintext)["microcredits"]
@@ -1011,6 +1110,65 @@ class DatabaseInsert(DatabaseBase):
 
         return new_stakers, stake_rewards
 
+    @staticmethod
+    async def _add_speed_buckets(cur: psycopg.AsyncCursor[dict[str, Any]], block: Block, addresses: list[str]):
+        await cur.execute("SELECT proof_target FROM block WHERE height = %s", (block.height - 1,))
+        if (res := await cur.fetchone()) is None:
+            raise RuntimeError("failed to retrieve previous proof target")
+        proof_target = res["proof_target"]
+        bucket = block.header.metadata.timestamp // DatabaseAddress.speed_bucket_size * DatabaseAddress.speed_bucket_size
+        solution_counts: dict[str, int] = defaultdict(int)
+        for address in addresses:
+            solution_counts[address] += 1
+        await cur.execute(
+            "INSERT INTO prover_speed_bucket (address, bucket, solution_count, weighted_target) "
+            "SELECT address, %s, solution_count, solution_count * %s::numeric "
+            "FROM unnest(%s::text[], %s::int[]) AS r(address, solution_count) "
+            "ON CONFLICT (address, bucket) DO UPDATE SET "
+            "solution_count = prover_speed_bucket.solution_count + EXCLUDED.solution_count, "
+            "weighted_target = prover_speed_bucket.weighted_target + EXCLUDED.weighted_target",
+            (bucket, proof_target, list(solution_counts.keys()), list(solution_counts.values()))
+        )
+        await cur.execute(
+            "INSERT INTO network_speed_bucket (bucket, solution_count, weighted_target) "
+            "VALUES (%s, %s, %s::numeric * %s) "
+            "ON CONFLICT (bucket) DO UPDATE SET "
+            "solution_count = network_speed_bucket.solution_count + EXCLUDED.solution_count, "
+            "weighted_target = network_speed_bucket.weighted_target + EXCLUDED.weighted_target",
+            (bucket, len(addresses), proof_target, len(addresses))
+        )
+
+    @staticmethod
+    async def _add_participation_buckets(cur: psycopg.AsyncCursor[dict[str, Any]], block: Block, authors: set[str]):
+        # runs after the ratifications so the committee of this height is already saved
+        await cur.execute(
+            "SELECT COUNT(*) FROM committee_history_member chm "
+            "JOIN committee_history ch ON chm.committee_id = ch.id "
+            "WHERE ch.height = %s",
+            (block.height,)
+        )
+        if (res := await cur.fetchone()) is None:
+            raise RuntimeError("failed to retrieve committee size")
+        committee_size = res["count"]
+        size = DatabaseValidator.participation_bucket_size
+        bucket = block.header.metadata.timestamp // size * size
+        await cur.execute(
+            "INSERT INTO validator_participation_bucket (address, bucket, block_count) "
+            "SELECT address, %s, 1 FROM unnest(%s::text[]) AS r(address) "
+            "ON CONFLICT (address, bucket) DO UPDATE SET "
+            "block_count = validator_participation_bucket.block_count + 1",
+            (bucket, list(authors))
+        )
+        await cur.execute(
+            "INSERT INTO network_participation_bucket (bucket, block_count, participant_count, committee_size) "
+            "VALUES (%s, 1, %s, %s) "
+            "ON CONFLICT (bucket) DO UPDATE SET "
+            "block_count = network_participation_bucket.block_count + 1, "
+            "participant_count = network_participation_bucket.participant_count + EXCLUDED.participant_count, "
+            "committee_size = network_participation_bucket.committee_size + EXCLUDED.committee_size",
+            (bucket, len(authors), committee_size)
+        )
+
     @staticmethod
     @profile
     def _next_committee_members(committee_members: dict[Address, tuple[u64, bool_, u8]],
@@ -1041,28 +1199,16 @@ class DatabaseInsert(DatabaseBase):
         return delegated
 
     @profile
-    async def _post_ratify(self, cur: psycopg.AsyncCursor[dict[str, Any]], redis_conn: Redis[str], height: int, round_: int,
-                           ratifications: list[Ratify], address_puzzle_rewards: dict[str, int], supply_tracker: _SupplyTracker):
+    async def _post_ratify(self, cur: psycopg.AsyncCursor[dict[str, Any]], redis_conn: Redis[str],
+                           mapping_writer: MappingWriter, height: int, round_: int, ratifications: list[Ratify],
+                           address_puzzle_rewards: dict[str, int], supply_tracker: _SupplyTracker):
         from interpreter.interpreter import global_mapping_cache
 
         for ratification in ratifications:
             if isinstance(ratification, BlockRewardRatify):
                 committee = await self._get_committee_mapping_unchecked(redis_conn)
                 delegated = await self._get_delegated_mapping_unchecked(redis_conn)
-                mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "bonded"))
-                if mapping_id in global_mapping_cache:
-                    data = global_mapping_cache[mapping_id]
-                    stakers: dict[Address, tuple[Address, u64]] = {}
-                    for v in data.values():
-                        key = cast(LiteralPlaintext, v["key"])
-                        value = v["value"]
-                        address = cast(Address, key.literal.primitive)
-                        bond_state = cast(StructPlaintext, cast(PlaintextValue, value).plaintext)
-                        validator = cast(Address, cast(LiteralPlaintext, bond_state["validator"]).literal.primitive)
-                        amount = cast(u64, cast(LiteralPlaintext, bond_state["microcredits"]).literal.primitive)
-                        stakers[address] = validator, amount
-                else:
-                    stakers = await self.get_bonded_mapping_unchecked()
+                stakers = await self.get_bonded_mapping_unchecked()
 
                 committee_members = self._committee_delegated_to_members(committee, delegated)
 
@@ -1070,14 +1216,12 @@ class DatabaseInsert(DatabaseBase):
                 delegated = self._next_delegated(stakers)
                 committee_members = self._next_committee_members(committee_members, stakers)
 
-                pipe = self.redis.pipeline()
                 for address, amount in stake_rewards.items():
-                    pipe.hincrby("address_stake_reward", str(address), amount)
+                    mapping_writer.redis.hincrby("address_stake_reward", str(address), amount)
                     supply_tracker.mint(amount)
                     supply_tracker.tally_block_reward(amount)
-                await pipe.execute()
 
-                await self._update_committee_bonded_delegated_map(committee_members, stakers, delegated)
+                await self._update_committee_bonded_delegated_map(mapping_writer.redis, committee_members, stakers, delegated)
                 starting_round = u64(round_)
                 members = Vec[Tuple[Address, u64, bool_, u8], u16]([
                     Tuple[Address, u64, bool_, u8]((address, amount, is_open, commission)) for address, (amount, is_open, commission) in committee_members.items()
@@ -1095,15 +1239,19 @@ class DatabaseInsert(DatabaseBase):
                 account_mapping_id = Field.loads(cached_get_mapping_id("credits.aleo", "account"))
 
                 if account_mapping_id not in global_mapping_cache:
-                    from interpreter.finalizer import mapping_cache_read
-                    global_mapping_cache[account_mapping_id] = await mapping_cache_read(cast("Database", self), "credits.aleo", "account")
+                    global_mapping_cache.key_cache("credits.aleo", "account", account_mapping_id)
+                current_balances = global_mapping_cache[account_mapping_id]
 
-                current_balances: dict[Field, dict[str, Any]] = global_mapping_cache[account_mapping_id]
+                reward_keys: dict[str, tuple[LiteralPlaintext, Field]] = {}
+                for address in address_puzzle_rewards.keys():
+                    key = LiteralPlaintext(literal=Literal(type_=Literal.Type.Address, primitive=Address.loads(address)))
+                    reward_keys[address] = key, Field.loads(cached_get_key_id("credits.aleo", "account", key.dump()))
+                if isinstance(current_balances, MappingKeyCache):
+                    await current_balances.load(cast("Database", self), cur, [key_id for _, key_id in reward_keys.values()])
 
                 operations: list[dict[str, Any]] = []
                 for address, amount in address_puzzle_rewards.items():
-                    key = LiteralPlaintext(literal=Literal(type_=Literal.Type.Address, primitive=Address.loads(address)))
-                    key_id = Field.loads(cached_get_key_id("credits.aleo", "account", key.dump()))
+                    key, key_id = reward_keys[address]
                     if key_id not in current_balances:
                         current_balance = u64()
                     else:
@@ -1118,7 +1266,7 @@ class DatabaseInsert(DatabaseBase):
                     new_value = current_balance + u64(amount)
                     value = PlaintextValue(plaintext=LiteralPlaintext(literal=Literal(type_=Literal.Type.U64, primitive=new_value)))
                     value_id = Field.loads(aleo_explorer_rust.get_value_id(str(key_id), value.dump()))
-                    global_mapping_cache[account_mapping_id][key_id] = {
+                    current_balances[key_id] = {
                         "key": key,
                         "value": value,
                     }
@@ -1137,18 +1285,24 @@ class DatabaseInsert(DatabaseBase):
                     supply_tracker.mint(amount)
                     supply_tracker.tally_puzzle_reward(amount)
                 from interpreter.interpreter import execute_operations
-                await execute_operations(cast("Database", self), cur, operations)
+                await execute_operations(cast("Database", self), cur, mapping_writer, operations)
 
     @staticmethod
     async def _backup_redis_hash_key(redis_conn: Redis[str], keys: list[str], height: int):
         if height != 0:
+            pipe = redis_conn.pipeline(transaction=False)
             for key in keys:
+                pipe.exists(f"{key}:rollback_backup:{height}")
+            backup_exists = await pipe.execute()
+            pipe = redis_conn.pipeline(transaction=True)
+            for key, exists in zip(keys, backup_exists):
                 backup_key = f"{key}:rollback_backup:{height}"
-                if await redis_conn.exists(backup_key) == 0:
-                    if await redis_conn.exists(key) == 1:
-                        await redis_conn.copy(key, backup_key) # type: ignore[arg-type]
+                if exists == 0:
+                    # no-op when the key doesn't exist yet
+                    pipe.copy(key, backup_key) # type: ignore[arg-type]
                 else:
-                    await redis_conn.copy(backup_key, key, replace=True) # type: ignore[arg-type]
+                    pipe.copy(backup_key, key, replace=True) # type: ignore[arg-type]
+            await pipe.execute()
 
     async def _redis_cleanup(self, redis_conn: Redis[str], keys: list[str], height: int, rollback: bool):
         if height != 0:
@@ -1157,18 +1311,20 @@ class DatabaseInsert(DatabaseBase):
             if self.redis_last_history_time + 43200 < now:
                 self.redis_last_history_time = now
                 history = True
+            pipe = redis_conn.pipeline(transaction=True)
             for key in keys:
                 backup_key = f"{key}:rollback_backup:{height}"
                 if rollback:
-                    if await redis_conn.exists(backup_key) == 1:
-                        await redis_conn.copy(backup_key, key, replace=True)
+                    # no-op when there is no backup
+                    pipe.copy(backup_key, key, replace=True) # type: ignore[arg-type]
                 else:
                     if history:
                         history_key = f"{key}:history:{height - 1}"
-                        await redis_conn.rename(backup_key, history_key)
-                        await redis_conn.expire(history_key, 60 * 60 * 24 * 3)
+                        pipe.rename(backup_key, history_key)
+                        pipe.expire(history_key, 60 * 60 * 24 * 3)
                     else:
-                        await redis_conn.delete(backup_key)
+                        pipe.delete(backup_key)
+            await pipe.execute()
 
     @profile
     async def _save_block(self, block: Block):
@@ -1210,6 +1366,8 @@ class DatabaseInsert(DatabaseBase):
                         # TODO: use data from fee calculation
                         # block_reward += await block.get_total_priority_fee(cast("Database", self))
 
+                        redis_writer = RedisWriter()
+                        mapping_writer = MappingWriter(redis_writer)
                         for ratification in block.ratifications:
                             if isinstance(ratification, BlockRewardRatify):
                                 # TODO: remove this
@@ -1220,17 +1378,23 @@ class DatabaseInsert(DatabaseBase):
                                 if ratification.amount != puzzle_reward:
                                     raise RuntimeError("invalid puzzle reward")
                             elif isinstance(ratification, GenesisRatify):
-                                await self._pre_ratify(cur, ratification, supply_tracker)
+                                await self._pre_ratify(cur, mapping_writer, ratification, supply_tracker)
 
                         from interpreter.interpreter import finalize_block
-                        reject_reasons = await finalize_block(cast("Database", self), cur, block)
+                        reject_reasons = await finalize_block(cast("Database", self), cur, mapping_writer, block)
+
+                        if block.solutions.value is None:
+                            partial_solution_count = 0
+                        else:
+                            partial_solution_count = len(block.solutions.value.solutions)
 
                         await cur.execute(
                             "INSERT INTO block (height, block_hash, previous_hash, previous_state_root, transactions_root, "
                             "finalize_root, ratifications_root, solutions_root, subdag_root, round, cumulative_weight, "
                             "cumulative_proof_target, coinbase_target, proof_target, last_coinbase_target, "
-                            "last_coinbase_timestamp, timestamp, block_reward, coinbase_reward, total_supply) "
-                            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                            "last_coinbase_timestamp, timestamp, block_reward, coinbase_reward, total_supply, "
+                            "transaction_count, partial_solution_count, transition_count, total_fee) "
+                            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
                             "RETURNING id",
                             (block.height, str(block.block_hash), str(block.previous_hash), str(block.header.previous_state_root),
                              str(block.header.transactions_root), str(block.header.finalize_root), str(block.header.ratifications_root),
@@ -1238,11 +1402,20 @@ class DatabaseInsert(DatabaseBase):
                              block.header.metadata.cumulative_weight, block.header.metadata.cumulative_proof_target,
                              block.header.metadata.coinbase_target, block.header.metadata.proof_target,
                              block.header.metadata.last_coinbase_target, block.header.metadata.last_coinbase_timestamp,
-                             block.header.metadata.timestamp, block_reward, coinbase_reward, supply_tracker.supply)
+                             block.header.metadata.timestamp, block_reward, coinbase_reward, supply_tracker.supply,
+                             len(block.transactions.transactions), partial_solution_count, block.transactions.transition_count,
+                             block.transactions.total_fee)
                         ) # total supply will be rewritten after everything
                         if (res := await cur.fetchone()) is None:
                             raise RuntimeError("failed to insert row into database")
                         block_db_id = res["id"]
+                        await DatabaseBase.ensure_partitions(cur, block.height)
+
+                        if os.environ.get("BLOCK_RAW_STORE"):
+                            await cur.execute(
+                                "INSERT INTO block_raw (height, block_hash, block_id, data) VALUES (%s, %s, %s, %s)",
+                                (block.height, str(block.block_hash), block_db_id, DatabaseBlock.dump_raw_block(block))
+                            )
 
                         # dag_transmission_ids: tuple[dict[str, int], dict[str, int]] = {}, {}
 
@@ -1343,6 +1516,17 @@ class DatabaseInsert(DatabaseBase):
                                 for row in subdag_copy_data:
                                     await copy.write_row(row)
 
+                        writer = _BlockWriter()
+                        id_counts: dict[str, int] = defaultdict(int)
+                        transition_ids: list[str] = []
+                        for confirmed_transaction in block.transactions:
+                            id_counts["finalize_operation"] += len(confirmed_transaction.finalize)
+                            _BlockWriter.count_transaction_rows(
+                                confirmed_transaction.transaction, confirmed_transaction, id_counts, transition_ids
+                            )
+                        await writer.reserve_ids(cur, id_counts)
+                        await writer.load_existing_transitions(cur, transition_ids)
+
                         ignore_deploy_txids: list[str] = []
                         program_name_seen: dict[str, str] = {}
                         for confirmed_transaction in block.transactions:
@@ -1369,78 +1553,50 @@ class DatabaseInsert(DatabaseBase):
 
                             transaction = confirmed_transaction.transaction
 
-                            await self._insert_transaction(conn, self.redis, transaction, confirmed_transaction, ct_index, ignore_deploy_txids,
-                                                           confirmed_transaction_db_id, reject_reasons)
+                            await self._insert_transaction(conn, redis_writer, writer, transaction, confirmed_transaction, ct_index,
+                                                           ignore_deploy_txids, confirmed_transaction_db_id, reject_reasons)
 
-                            update_copy_data: list[tuple[int, str, str, str]] = []
                             for index, finalize_operation in enumerate(confirmed_transaction.finalize):
-                                await cur.execute(
-                                    "INSERT INTO finalize_operation (confirmed_transaction_id, type, index) "
-                                    "VALUES (%s, %s, %s) RETURNING id",
-                                    (confirmed_transaction_db_id, finalize_operation.type.name, index)
-                                )
-                                if (res := await cur.fetchone()) is None:
-                                    raise RuntimeError("failed to insert row into database")
-                                finalize_operation_db_id: int = res["id"]
+                                finalize_operation_db_id = await writer.next_id(cur, "finalize_operation")
+                                writer.add("finalize_operation", (
+                                    finalize_operation_db_id, confirmed_transaction_db_id, finalize_operation.type.name, index
+                                ))
                                 if isinstance(finalize_operation, InitializeMapping):
-                                    await cur.execute(
-                                        "INSERT INTO finalize_operation_initialize_mapping (finalize_operation_id, "
-                                        "mapping_id) VALUES (%s, %s)",
-                                        (finalize_operation_db_id, str(finalize_operation.mapping_id))
-                                    )
+                                    writer.add("finalize_operation_initialize_mapping", (
+                                        finalize_operation_db_id, str(finalize_operation.mapping_id)
+                                    ))
                                 elif isinstance(finalize_operation, InsertKeyValue):
-                                    await cur.execute(
-                                        "INSERT INTO finalize_operation_insert_kv (finalize_operation_id, "
-                                        "mapping_id, key_id, value_id) VALUES (%s, %s, %s, %s)",
-                                        (finalize_operation_db_id, str(finalize_operation.mapping_id),
-                                         str(finalize_operation.key_id), str(finalize_operation.value_id))
-                                    )
+                                    writer.add("finalize_operation_insert_kv", (
+                                        finalize_operation_db_id, str(finalize_operation.mapping_id),
+                                        str(finalize_operation.key_id), str(finalize_operation.value_id)
+                                    ))
                                 elif isinstance(finalize_operation, UpdateKeyValue):
-                                    update_copy_data.append((
+                                    writer.add("finalize_operation_update_kv", (
                                         finalize_operation_db_id, str(finalize_operation.mapping_id),
                                         str(finalize_operation.key_id), str(finalize_operation.value_id)
                                     ))
                                 elif isinstance(finalize_operation, RemoveKeyValue):
-                                    await cur.execute(
-                                        "INSERT INTO finalize_operation_remove_kv (finalize_operation_id, "
-                                        "mapping_id, key_id) VALUES (%s, %s, %s)",
-                                        (finalize_operation_db_id, str(finalize_operation.mapping_id),
-                                         str(finalize_operation.key_id))
-                                    )
+                                    writer.add("finalize_operation_remove_kv", (
+                                        finalize_operation_db_id, str(finalize_operation.mapping_id),
+                                        str(finalize_operation.key_id)
+                                    ))
                                 elif isinstance(finalize_operation, ReplaceMapping):
-                                    await cur.execute(
-                                        "INSERT INTO finalize_operation_replace_mapping (finalize_operation_id, "
-                                        "mapping_id) VALUES (%s, %s)",
-                                        (finalize_operation_db_id, str(finalize_operation.mapping_id))
-                                    )
+                                    writer.add("finalize_operation_replace_mapping", (
+                                        finalize_operation_db_id, str(finalize_operation.mapping_id)
+                                    ))
                                 elif isinstance(finalize_operation, RemoveMapping):
-                                    await cur.execute(
-                                        "INSERT INTO finalize_operation_remove_mapping (finalize_operation_id, "
-                                        "mapping_id) VALUES (%s, %s)",
-                                        (finalize_operation_db_id, str(finalize_operation.mapping_id))
-                                    )
-                            if update_copy_data:
-                                async with cur.copy("COPY finalize_operation_update_kv (finalize_operation_id, mapping_id, key_id, value_id) FROM STDIN") as copy:
-                                    for row in update_copy_data:
-                                        await copy.write_row(row)
+                                    writer.add("finalize_operation_remove_mapping", (
+                                        finalize_operation_db_id, str(finalize_operation.mapping_id)
+                                    ))
 
                         for index, ratify in enumerate(block.ratifications):
                             if isinstance(ratify, GenesisRatify):
-                                await cur.execute(
-                                    "INSERT INTO ratification (block_id, index, type) VALUES (%s, %s, %s)",
-                                    (block_db_id, index, ratify.type.name)
-                                )
+                                writer.add("ratification", (block_db_id, index, ratify.type.name, None))
                                 public_balances = ratify.public_balances
                                 for address, balance in public_balances:
-                                    await cur.execute(
-                                        "INSERT INTO ratification_genesis_balance (address, amount) VALUES (%s, %s)",
-                                        (str(address), balance)
-                                    )
+                                    writer.add("ratification_genesis_balance", (str(address), balance))
                             elif isinstance(ratify, (BlockRewardRatify, PuzzleRewardRatify)):
-                                await cur.execute(
-                                    "INSERT INTO ratification (block_id, index, type, amount) VALUES (%s, %s, %s, %s)",
-                                    (block_db_id, index, ratify.type.name, ratify.amount)
-                                )
+                                writer.add("ratification", (block_db_id, index, ratify.type.name, ratify.amount))
                             else:
                                 raise NotImplementedError
 
@@ -1480,26 +1636,28 @@ class DatabaseInsert(DatabaseBase):
                                     for row in copy_data:
                                         await copy.write_row(row)
                                 for address, reward in address_puzzle_rewards.items():
-                                    pipe = self.redis.pipeline()
-                                    pipe.hincrby("address_puzzle_reward", address, reward)
-                                    await pipe.execute()
+                                    redis_writer.hincrby("address_puzzle_reward", address, reward)
+                                await self._add_speed_buckets(cur, block, [row[1] for row in copy_data])
 
                         for aborted in block.aborted_transactions_ids:
-                            await cur.execute(
-                                "INSERT INTO block_aborted_transaction_id (block_id, transaction_id) VALUES (%s, %s)",
-                                (block_db_id, str(aborted))
-                            )
+                            writer.add("block_aborted_transaction_id", (block_db_id, str(aborted)))
 
                         for aborted in block.aborted_solution_ids:
-                            await cur.execute(
-                                "INSERT INTO block_aborted_solution_id (block_id, solution_id) VALUES (%s, %s)",
-                                (block_db_id, str(aborted))
-                            )
+                            writer.add("block_aborted_solution_id", (block_db_id, str(aborted)))
+
+                        writer.add_address_activity(block_db_id, block)
+
+                        await writer.flush(cur)
 
                         await self._post_ratify(
-                            cur, self.redis, block.height, block.round, block.ratifications.ratifications,
+                            cur, self.redis, mapping_writer, block.height, block.round, block.ratifications.ratifications,
                             address_puzzle_rewards, supply_tracker
                         )
+                        await self._add_participation_buckets(cur, block, {row[3] for row in subdag_copy_data})
+
+                        await mapping_writer.flush(cur)
+                        global_mapping_cache.trim()
+                        await redis_writer.execute(self.redis)
 
                         if os.environ.get("DEBUG_MAPPING_DUMP", False):
                             async def read_redis_mapping(key: str) -> list[tuple[str, str]]:
@@ -1595,15 +1753,18 @@ class DatabaseInsert(DatabaseBase):
 
                         signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
                         await self._redis_cleanup(self.redis, self.redis_keys, block.height, False)
-
-                        await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseBlockAdded, block.header.metadata.height))
                     except Exception as e:
+                        # cached mapping values may include writes that are about to be rolled back
+                        global_mapping_cache.clear()
+                        DatabaseBase.forget_partitions()
                         signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
                         await self._redis_cleanup(self.redis, self.redis_keys, block.height, True)
                         signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGINT})
                         await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                         raise
             signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGINT})
+        # only announced once committed, listeners read the block right away
+        await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseBlockAdded, block))
 
     async def cleanup_unconfirmed_transactions(self):
         async with self.pool.connection() as conn:
@@ -1620,7 +1781,18 @@ class DatabaseInsert(DatabaseBase):
         async with self.pool.connection() as conn:
             if isinstance(transaction, FeeTransaction):
                 raise RuntimeError("rejected transaction cannot be unconfirmed")
-            await self._insert_transaction(conn, self.redis, transaction)
+            async with conn.transaction():
+                async with conn.cursor() as cur:
+                    writer = _BlockWriter()
+                    redis_writer = RedisWriter()
+                    id_counts: dict[str, int] = defaultdict(int)
+                    transition_ids: list[str] = []
+                    _BlockWriter.count_transaction_rows(transaction, None, id_counts, transition_ids)
+                    await writer.reserve_ids(cur, id_counts)
+                    await writer.load_existing_transitions(cur, transition_ids)
+                    await self._insert_transaction(conn, redis_writer, writer, transaction)
+                    await writer.flush(cur)
+                    await redis_writer.execute(self.redis)
 
     async def save_feedback(self, contact: str, content: str):
         async with self.pool.connection() as conn:
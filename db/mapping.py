@@ -1,11 +1,98 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
+
 import psycopg
 import psycopg.sql
 
 from aleo_types import *
 from explorer.types import Message as ExplorerMessage
-from .base import DatabaseBase
+from .base import DatabaseBase, RedisWriter
+
+
+class MappingWriter:
+    """
+    Collects the mapping writes of a block. mapping_value gets one upsert or delete per touched key and
+    mapping_history is written in one COPY with the previous_id chains worked out in memory, then
+    mapping_history_last_id is updated once per key. Changes to the mappings kept in redis go to the block's
+    RedisWriter.
+    """
+
+    def __init__(self, redis: RedisWriter):
+        self.redis = redis
+        # (mapping_id, key_id) -> (value_id, key, value), None when the key ends up removed
+        self.values: dict[tuple[str, str], Optional[tuple[str, bytes, bytes]]] = {}
+        # mapping_id, height, key_id, key, value, from_transaction
+        self.history: list[tuple[str, int, str, bytes, Optional[bytes], bool]] = []
+
+    def update(self, mapping_id: str, key_id: str, value_id: str, key: bytes, value: bytes):
+        self.values[(mapping_id, key_id)] = (value_id, key, value)
+
+    def remove(self, mapping_id: str, key_id: str):
+        self.values[(mapping_id, key_id)] = None
+
+    def add_history(self, mapping_id: str, height: int, key_id: str, key: bytes, value: Optional[bytes],
+                    from_transaction: bool):
+        self.history.append((mapping_id, height, key_id, key, value, from_transaction))
+
+    async def flush(self, cur: psycopg.AsyncCursor[dict[str, Any]]):
+        mapping_ids = list({k[0] for k in self.values} | {h[0] for h in self.history})
+        if not mapping_ids:
+            return
+        await cur.execute("SELECT id, mapping_id FROM mapping WHERE mapping_id = ANY(%s::text[])", (mapping_ids,))
+        mapping_db_ids: dict[str, int] = {r["mapping_id"]: r["id"] for r in await cur.fetchall()}
+        for mapping_id in mapping_ids:
+            if mapping_id not in mapping_db_ids:
+                raise ValueError(f"mapping {mapping_id} not found")
+
+        removed = [(mapping_db_ids[m], k) for (m, k), v in self.values.items() if v is None]
+        if removed:
+            await cur.execute(
+                "DELETE FROM mapping_value mv USING unnest(%s::int[], %s::text[]) AS r(mapping_id, key_id) "
+                "WHERE mv.mapping_id = r.mapping_id AND mv.key_id = r.key_id",
+                ([r[0] for r in removed], [r[1] for r in removed])
+            )
+        updated = [(mapping_db_ids[m], k, v) for (m, k), v in self.values.items() if v is not None]
+        if updated:
+            await cur.execute(
+                "INSERT INTO mapping_value (mapping_id, key_id, value_id, key, value) "
+                "SELECT * FROM unnest(%s::int[], %s::text[], %s::text[], %s::bytea[], %s::bytea[]) "
+                "ON CONFLICT (mapping_id, key_id) DO UPDATE SET value_id = excluded.value_id, value = excluded.value",
+                ([u[0] for u in updated], [u[1] for u in updated], [u[2][0] for u in updated],
+                 [u[2][1] for u in updated], [u[2][2] for u in updated])
+            )
+
+        if self.history:
+            key_ids = list({h[2] for h in self.history})
+            await cur.execute(
+                "SELECT key_id, last_history_id FROM mapping_history_last_id WHERE key_id = ANY(%s::text[])",
+                (key_ids,)
+            )
+            last_ids: dict[str, Optional[int]] = {r["key_id"]: r["last_history_id"] for r in await cur.fetchall()}
+            await cur.execute(
+                "SELECT nextval(pg_get_serial_sequence('mapping_history', 'id')) AS id FROM generate_series(1, %s)",
+                (len(self.history),)
+            )
+            history_ids = sorted(r["id"] for r in await cur.fetchall())
+            async with cur.copy(
+                "COPY mapping_history (id, mapping_id, height, key_id, key, value, from_transaction, previous_id) "
+                "FROM STDIN"
+            ) as copy:
+                for history_id, (mapping_id, height, key_id, key, value, from_transaction) in zip(history_ids, self.history):
+                    await copy.write_row((
+                        history_id, mapping_db_ids[mapping_id], height, key_id, key, value, from_transaction,
+                        last_ids.get(key_id)
+                    ))
+                    last_ids[key_id] = history_id
+            await cur.execute(
+                "INSERT INTO mapping_history_last_id (key_id, last_history_id) "
+                "SELECT * FROM unnest(%s::text[], %s::bigint[]) "
+                "ON CONFLICT (key_id) DO UPDATE SET last_history_id = excluded.last_history_id",
+                (key_ids, [last_ids[k] for k in key_ids])
+            )
+
+        self.values.clear()
+        self.history.clear()
 
 
 class DatabaseMapping(DatabaseBase):
@@ -44,6 +131,35 @@ class DatabaseMapping(DatabaseBase):
             async with conn.cursor() as cur:
                 return await self.get_mapping_cache_with_cur(cur, program_name, mapping_name)
 
+    async def get_mapping_values_with_cur(self, cur: psycopg.AsyncCursor[dict[str, Any]], program_name: str,
+                                          mapping_name: str, key_ids: list[str]) -> dict[str, tuple[bytes, bytes]]:
+        # returns raw (key, value) of the keys that exist, missing keys are left out
+        if program_name == "credits.aleo" and mapping_name in ["committee", "bonded", "delegated"]:
+            data = await self.redis.hmget(f"{program_name}:{mapping_name}", key_ids)
+            result: dict[str, tuple[bytes, bytes]] = {}
+            for key_id, d in zip(key_ids, data):
+                if d is not None:
+                    d = json.loads(d)
+                    result[key_id] = bytes.fromhex(d["key"]), bytes.fromhex(d["value"])
+            return result
+        mapping_id = cached_get_mapping_id(program_name, mapping_name)
+        try:
+            await cur.execute(
+                "SELECT key_id, key, value FROM mapping_value mv "
+                "JOIN mapping m on mv.mapping_id = m.id "
+                "WHERE m.mapping_id = %s AND mv.key_id = ANY(%s::text[])",
+                (mapping_id, key_ids)
+            )
+            return {x["key_id"]: (x["key"], x["value"]) for x in await cur.fetchall()}
+        except Exception as e:
+            await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+            raise
+
+    async def get_mapping_values(self, program_name: str, mapping_name: str, key_ids: list[str]) -> dict[str, tuple[bytes, bytes]]:
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                return await self.get_mapping_values_with_cur(cur, program_name, mapping_name, key_ids)
+
     async def get_mapping_value(self, program_id: str, mapping: str, key_id: str) -> Optional[bytes]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
@@ -69,6 +185,42 @@ class DatabaseMapping(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
+    async def get_mapping_values_by_key_ids(self, program_id: str, keys: list[tuple[str, str]]
+                                            ) -> dict[tuple[str, str], Optional[bytes]]:
+        # (mapping, key_id) -> raw value, with one query for the database mappings and one pipeline for the redis ones
+        result: dict[tuple[str, str], Optional[bytes]] = {k: None for k in keys}
+        redis_keys = [
+            (mapping, key_id) for mapping, key_id in keys
+            if program_id == "credits.aleo" and mapping in ["committee", "bonded", "delegated"]
+        ]
+        db_key_ids = [key_id for mapping, key_id in keys if (mapping, key_id) not in redis_keys]
+        if redis_keys:
+            pipe = self.redis.pipeline(transaction=False)
+            for mapping, key_id in redis_keys:
+                pipe.hget(f"{program_id}:{mapping}", key_id)
+            for k, data in zip(redis_keys, await pipe.execute()):
+                if data is not None:
+                    result[k] = bytes.fromhex(json.loads(data)["value"])
+        if not db_key_ids:
+            return result
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await cur.execute(
+                        "SELECT m.mapping, mv.key_id, mv.value FROM mapping_value mv "
+                        "JOIN mapping m on mv.mapping_id = m.id "
+                        "WHERE m.program_id = %s AND mv.key_id = ANY(%s::text[])",
+                        (program_id, db_key_ids)
+                    )
+                    for row in await cur.fetchall():
+                        k = (row["mapping"], row["key_id"])
+                        if k in result:
+                            result[k] = row["value"]
+                    return result
+                except Exception as e:
+                    await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                    raise
+
     async def get_mapping_size(self, program_id: str, mapping: str) -> int:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
@@ -172,100 +324,38 @@ class DatabaseMapping(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def update_mapping_key_value(self, cur: psycopg.AsyncCursor[dict[str, Any]], program_name: str,
-                                       mapping_name: str, mapping_id: str, key_id: str, value_id: str,
-                                       key: bytes, value: bytes, height: int, from_transaction: bool):
+    async def update_mapping_key_value(self, writer: MappingWriter, program_name: str, mapping_name: str,
+                                       mapping_id: str, key_id: str, value_id: str, key: bytes, value: bytes,
+                                       height: int, from_transaction: bool):
         try:
             limited_tracking = program_name == "credits.aleo" and mapping_name in ["committee", "bonded", "delegated"]
             if limited_tracking:
-                conn = self.redis
                 data = {
                     "key": key.hex(),
                     "value": value.hex(),
                 }
-                await conn.hset(f"{program_name}:{mapping_name}", key_id, json.dumps(data))
+                writer.redis.hset(f"{program_name}:{mapping_name}", key_id, json.dumps(data))
 
             if not limited_tracking or from_transaction:
-                await cur.execute("SELECT id FROM mapping WHERE mapping_id = %s", (mapping_id,))
-                mapping = await cur.fetchone()
-                if mapping is None:
-                    raise ValueError(f"mapping {mapping_id} not found")
-                mapping_id = mapping['id']
-
                 if not limited_tracking:
-                    await cur.execute(
-                        "INSERT INTO mapping_value (mapping_id, key_id, value_id, key, value) "
-                        "VALUES (%s, %s, %s, %s, %s) "
-                        "ON CONFLICT (mapping_id, key_id) DO UPDATE SET value_id = %s, value = %s",
-                        (mapping_id, key_id, value_id, key, value, value_id, value)
-                    )
-
-                await cur.execute(
-                    "SELECT last_history_id FROM mapping_history_last_id WHERE key_id = %s",
-                    (key_id,)
-                )
-                previous_id = res['last_history_id'] if (res := await cur.fetchone()) is not None else None
-
-                await cur.execute(
-                    "INSERT INTO mapping_history (mapping_id, height, key_id, key, value, from_transaction, previous_id) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s) "
-                    "RETURNING id",
-                    (mapping_id, height, key_id, key, value, from_transaction, previous_id)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise ValueError("failed to insert mapping history")
-                latest_id = res['id']
-                await cur.execute(
-                    "INSERT INTO mapping_history_last_id (key_id, last_history_id) VALUES (%s, %s) "
-                    "ON CONFLICT (key_id) DO UPDATE SET last_history_id = %s",
-                    (key_id, latest_id, latest_id)
-                )
+                    writer.update(mapping_id, key_id, value_id, key, value)
+                writer.add_history(mapping_id, height, key_id, key, value, from_transaction)
 
         except Exception as e:
             await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
             raise
 
-    async def remove_mapping_key_value(self, cur: psycopg.AsyncCursor[dict[str, Any]], program_name: str,
-                                       mapping_name: str, mapping_id: str, key_id: str, key: bytes, height: int,
-                                       from_transaction: bool):
+    async def remove_mapping_key_value(self, writer: MappingWriter, program_name: str, mapping_name: str,
+                                       mapping_id: str, key_id: str, key: bytes, height: int, from_transaction: bool):
         try:
             limited_tracking = program_name == "credits.aleo" and mapping_name in ["committee", "bonded", "delegated"]
             if limited_tracking:
-                conn = self.redis
-                await conn.hdel(f"{program_name}:{mapping_name}", key_id)
+                writer.redis.hdel(f"{program_name}:{mapping_name}", key_id)
 
             if not limited_tracking or from_transaction:
-                await cur.execute("SELECT id FROM mapping WHERE mapping_id = %s", (mapping_id,))
-                mapping = await cur.fetchone()
-                if mapping is None:
-                    raise ValueError(f"mapping {mapping_id} not found")
-                mapping_id = mapping['id']
                 if not limited_tracking:
-                    await cur.execute(
-                        "DELETE FROM mapping_value WHERE mapping_id = %s AND key_id = %s",
-                        (mapping_id, key_id)
-                    )
-
-                await cur.execute(
-                    "SELECT last_history_id FROM mapping_history_last_id WHERE key_id = %s",
-                    (key_id,)
-                )
-                previous_id = res['last_history_id'] if (res := await cur.fetchone()) is not None else None
-
-                await cur.execute(
-                    "INSERT INTO mapping_history (mapping_id, height, key_id, key, value, from_transaction, previous_id) "
-                    "VALUES (%s, %s, %s, %s, NULL, %s, %s) "
-                    "RETURNING id",
-                    (mapping_id, height, key_id, key, from_transaction, previous_id)
-                )
-                if (res := await cur.fetchone()) is None:
-                    raise ValueError("failed to insert mapping history")
-                latest_id = res['id']
-                await cur.execute(
-                    "INSERT INTO mapping_history_last_id (key_id, last_history_id) VALUES (%s, %s) "
-                    "ON CONFLICT (key_id) DO UPDATE SET last_history_id = %s",
-                    (key_id, latest_id, latest_id)
-                )
+                    writer.remove(mapping_id, key_id)
+                writer.add_history(mapping_id, height, key_id, key, None, from_transaction)
 
         except Exception as e:
             await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
@@ -361,4 +451,39 @@ class DatabaseMapping(DatabaseBase):
                     return res['value']
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
-                    raise
\ No newline at end of file
+                    raise
+
+    async def get_mapping_snapshot(self, height: int, program_id: Optional[str] = None, mapping: Optional[str] = None,
+                                   batch_size: int = 10000) -> AsyncIterator[list[dict[str, Any]]]:
+        # (program_id, mapping, key_id, key, value) of every key present at `height`, in batches from a server side
+        # cursor ordered by (mapping_id, key_id) so the DISTINCT ON walks mapping_history_mapping_id_key_id_id_index
+        # without sorting; limited tracking mappings only record transaction writes and can't be rebuilt this way
+        if program_id == "credits.aleo" and mapping in ["committee", "bonded", "delegated"]:
+            raise ValueError(f"{program_id}/{mapping} history is incomplete")
+        where = [
+            psycopg.sql.SQL("mh.height <= {}").format(psycopg.sql.Literal(height)),
+            psycopg.sql.SQL("NOT (m.program_id = 'credits.aleo' AND m.mapping IN ('committee', 'bonded', 'delegated'))"),
+        ]
+        if program_id is not None:
+            where.append(psycopg.sql.SQL("m.program_id = {}").format(psycopg.sql.Literal(program_id)))
+        if mapping is not None:
+            where.append(psycopg.sql.SQL("m.mapping = {}").format(psycopg.sql.Literal(mapping)))
+        query = psycopg.sql.SQL(
+            "SELECT program_id, mapping, key_id, key, value FROM ("
+            "SELECT DISTINCT ON (mh.mapping_id, mh.key_id) m.program_id, m.mapping, mh.mapping_id, mh.key_id, mh.key, mh.value "
+            "FROM mapping_history mh JOIN mapping m ON mh.mapping_id = m.id "
+            "WHERE {} "
+            "ORDER BY mh.mapping_id, mh.key_id, mh.id DESC"
+            ") s WHERE value IS NOT NULL"
+        ).format(psycopg.sql.SQL(" AND ").join(where))
+        async with self.pool.connection() as conn:
+            # named cursors live in a transaction, the pool connections are autocommit
+            async with conn.transaction():
+                async with conn.cursor(name="mapping_snapshot") as cur:
+                    try:
+                        await cur.execute(query)
+                        while rows := await cur.fetchmany(batch_size):
+                            yield rows
+                    except Exception as e:
+                        await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                        raise
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from collections import defaultdict
 from typing import Awaitable, LiteralString
 
 import psycopg
@@ -9,7 +11,9 @@ import psycopg.sql
 from aleo_types import *
 from explorer.types import Message as ExplorerMessage
 from .base import DatabaseBase
+from .address import DatabaseAddress
 from .block import DatabaseBlock
+from .validator import DatabaseValidator
 
 
 class DatabaseMigrate(DatabaseBase):
@@ -20,6 +24,15 @@ class DatabaseMigrate(DatabaseBase):
             (1, self.migrate_1_add_rejected_original_id),
             (2, self.migrate_2_set_on_delete_cascade),
             (3, self.migrate_3_fix_finalize_operation_function),
+            (4, self.migrate_4_add_block_raw),
+            (5, self.migrate_5_add_block_counters),
+            (6, self.migrate_6_add_keyset_pagination_indexes),
+            (7, self.migrate_7_add_address_activity),
+            (8, self.migrate_8_add_speed_buckets),
+            (9, self.migrate_9_add_participation_buckets),
+            (10, self.migrate_10_partition_address_activity),
+            (11, self.migrate_11_add_mapping_history_snapshot_index),
+            (12, self.migrate_12_partition_mapping_history),
         ]
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
@@ -91,3 +104,319 @@ WHERE tables.oid = pg_trigger.tgrelid
     @staticmethod
     async def migrate_3_fix_finalize_operation_function(conn: psycopg.AsyncConnection[dict[str, Any]]):
         await conn.execute(cast(LiteralString, open("migration_3.sql").read()))
+
+    @staticmethod
+    async def migrate_4_add_block_raw(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS block_raw ("
+            "    height integer PRIMARY KEY,"
+            "    block_hash text NOT NULL UNIQUE,"
+            "    block_id integer NOT NULL REFERENCES block (id) ON DELETE CASCADE,"
+            "    data bytea NOT NULL"
+            ")"
+        )
+        # data is already zlib compressed, don't let TOAST try again
+        await conn.execute("ALTER TABLE block_raw ALTER COLUMN data SET STORAGE EXTERNAL")
+
+    @staticmethod
+    async def migrate_5_add_block_counters(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "ALTER TABLE block "
+                "ADD COLUMN transaction_count integer NOT NULL DEFAULT 0, "
+                "ADD COLUMN partial_solution_count integer NOT NULL DEFAULT 0, "
+                "ADD COLUMN transition_count integer NOT NULL DEFAULT 0, "
+                "ADD COLUMN total_fee numeric(20,0) NOT NULL DEFAULT 0"
+            )
+            await cur.execute(
+                "UPDATE block b SET transaction_count = c.count FROM ("
+                "    SELECT block_id, COUNT(*) FROM confirmed_transaction GROUP BY block_id"
+                ") c WHERE c.block_id = b.id"
+            )
+            await cur.execute(
+                "UPDATE block b SET partial_solution_count = c.count FROM ("
+                "    SELECT ps.block_id, COUNT(*) FROM solution s "
+                "    JOIN puzzle_solution ps ON s.puzzle_solution_id = ps.id "
+                "    GROUP BY ps.block_id"
+                ") c WHERE c.block_id = b.id"
+            )
+            await cur.execute(
+                "UPDATE block b SET transition_count = c.count FROM ("
+                "    SELECT ct.block_id, COUNT(*) FROM transition ts "
+                "    LEFT JOIN transaction_execute te ON ts.transaction_execute_id = te.id "
+                "    LEFT JOIN fee f ON ts.fee_id = f.id "
+                "    JOIN transaction t ON t.id = COALESCE(te.transaction_id, f.transaction_id) "
+                "    JOIN confirmed_transaction ct ON t.confirmed_transaction_id = ct.id "
+                "    GROUP BY ct.block_id"
+                ") c WHERE c.block_id = b.id"
+            )
+
+        # fee amounts only exist as serialized plaintext inputs of the fee transitions
+        total_fees: dict[int, int] = defaultdict(int)
+        async with conn.cursor(name="migrate_5_fee") as cur:
+            await cur.execute(
+                "SELECT ct.block_id, ts.function_name, ti.index, tip.plaintext FROM transition ts "
+                "JOIN fee f ON ts.fee_id = f.id "
+                "JOIN transaction t ON t.id = f.transaction_id "
+                "JOIN confirmed_transaction ct ON t.confirmed_transaction_id = ct.id "
+                "JOIN transition_input ti ON ti.transition_id = ts.id "
+                "JOIN transition_input_public tip ON tip.transition_input_id = ti.id "
+                "WHERE tip.plaintext IS NOT NULL"
+            )
+            async for row in cur:
+                # see Fee.amount
+                fee_start_index = 0 if row["function_name"] == "fee_public" else 1
+                if row["index"] not in (fee_start_index, fee_start_index + 1):
+                    continue
+                plaintext = Plaintext.load(BytesIO(row["plaintext"]))
+                if not isinstance(plaintext, LiteralPlaintext) or not isinstance(plaintext.literal.primitive, int):
+                    raise RuntimeError("bad transition data")
+                total_fees[row["block_id"]] += int(plaintext.literal.primitive)
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "UPDATE block b SET total_fee = f.total_fee "
+                "FROM unnest(%s::int[], %s::numeric[]) f(block_id, total_fee) WHERE f.block_id = b.id",
+                (list(total_fees.keys()), list(total_fees.values()))
+            )
+
+    @staticmethod
+    async def migrate_6_add_keyset_pagination_indexes(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        await conn.execute("CREATE INDEX IF NOT EXISTS transition_program_id_id_index ON transition (program_id, id)")
+        await conn.execute("CREATE INDEX IF NOT EXISTS solution_address_id_index ON solution (address, id)")
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS transaction_unconfirmed_first_seen_index "
+            "ON transaction (first_seen, transaction_id) WHERE confirmed_transaction_id IS NULL"
+        )
+
+    @staticmethod
+    async def migrate_7_add_address_activity(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS address_activity ("
+            "    id bigserial PRIMARY KEY,"
+            "    address text NOT NULL,"
+            "    block_id integer NOT NULL REFERENCES block (id) ON DELETE CASCADE,"
+            "    height integer NOT NULL,"
+            "    timestamp bigint NOT NULL,"
+            "    transition_id text NOT NULL,"
+            "    program_id text NOT NULL,"
+            "    function_name text NOT NULL,"
+            "    direction text"
+            ")"
+        )
+        # existing rows only know that the address is in the transition, direction is left null for them
+        await conn.execute(
+            "INSERT INTO address_activity (address, block_id, height, timestamp, transition_id, program_id, function_name) "
+            "SELECT DISTINCT at.address, b.id, b.height, b.timestamp, ts.transition_id, ts.program_id, ts.function_name "
+            "FROM address_transition at "
+            "JOIN transition ts ON ts.id = at.transition_id "
+            "LEFT JOIN transaction_execute te ON ts.transaction_execute_id = te.id "
+            "LEFT JOIN fee f ON ts.fee_id = f.id "
+            "JOIN transaction t ON t.id = COALESCE(te.transaction_id, f.transaction_id) "
+            "JOIN confirmed_transaction ct ON t.confirmed_transaction_id = ct.id "
+            "JOIN block b ON ct.block_id = b.id "
+            "ORDER BY b.height"
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS address_activity_address_height_index "
+            "ON address_activity (address, height DESC, id DESC)"
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS address_activity_address_program_id_height_index "
+            "ON address_activity (address, program_id, height DESC, id DESC)"
+        )
+        await conn.execute("CREATE INDEX IF NOT EXISTS address_activity_block_id_index ON address_activity (block_id)")
+
+    @staticmethod
+    async def migrate_8_add_speed_buckets(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS prover_speed_bucket ("
+            "    address text NOT NULL,"
+            "    bucket bigint NOT NULL,"
+            "    solution_count integer NOT NULL,"
+            "    weighted_target numeric NOT NULL,"
+            "    PRIMARY KEY (address, bucket)"
+            ")"
+        )
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS network_speed_bucket ("
+            "    bucket bigint PRIMARY KEY,"
+            "    solution_count integer NOT NULL,"
+            "    weighted_target numeric NOT NULL"
+            ")"
+        )
+        async with conn.cursor() as cur:
+            await DatabaseAddress.rollup_speed_buckets(cur, 0)
+
+    @staticmethod
+    async def migrate_9_add_participation_buckets(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS validator_participation_bucket ("
+            "    address text NOT NULL,"
+            "    bucket bigint NOT NULL,"
+            "    block_count integer NOT NULL,"
+            "    PRIMARY KEY (address, bucket)"
+            ")"
+        )
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS network_participation_bucket ("
+            "    bucket bigint PRIMARY KEY,"
+            "    block_count integer NOT NULL,"
+            "    participant_count integer NOT NULL,"
+            "    committee_size integer NOT NULL"
+            ")"
+        )
+        async with conn.cursor() as cur:
+            await DatabaseValidator.rollup_participation_buckets(cur, 0)
+
+    @staticmethod
+    async def migrate_10_partition_address_activity(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        # the new table takes over the names of the old indexes and the id sequence
+        await conn.execute("ALTER TABLE address_activity RENAME TO address_activity_unpartitioned")
+        await conn.execute("ALTER TABLE address_activity_unpartitioned DROP CONSTRAINT address_activity_pkey")
+        await conn.execute("DROP INDEX address_activity_address_height_index")
+        await conn.execute("DROP INDEX address_activity_address_program_id_height_index")
+        await conn.execute("DROP INDEX address_activity_block_id_index")
+        await conn.execute("ALTER SEQUENCE address_activity_id_seq OWNED BY NONE")
+        await conn.execute(
+            "CREATE TABLE address_activity ("
+            "    id bigint NOT NULL DEFAULT nextval('address_activity_id_seq'),"
+            "    address text NOT NULL,"
+            "    block_id integer NOT NULL REFERENCES block (id) ON DELETE CASCADE,"
+            "    height integer NOT NULL,"
+            "    timestamp bigint NOT NULL,"
+            "    transition_id text NOT NULL,"
+            "    program_id text NOT NULL,"
+            "    function_name text NOT NULL,"
+            "    direction text,"
+            "    PRIMARY KEY (id, height)"
+            ") PARTITION BY RANGE (height)"
+        )
+        await conn.execute("ALTER SEQUENCE address_activity_id_seq OWNED BY address_activity.id")
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT COALESCE(MAX(height), 0) AS height FROM block")
+            if (res := await cur.fetchone()) is None:
+                raise RuntimeError("failed to retrieve latest height")
+            for index in range(res["height"] // DatabaseBase.partition_size + 1):
+                await DatabaseBase.create_partition(cur, "address_activity", index)
+        await conn.execute(
+            "INSERT INTO address_activity "
+            "SELECT id, address, block_id, height, timestamp, transition_id, program_id, function_name, direction "
+            "FROM address_activity_unpartitioned"
+        )
+        await conn.execute("DROP TABLE address_activity_unpartitioned")
+        await conn.execute(
+            "CREATE INDEX address_activity_address_height_index ON address_activity (address, height DESC, id DESC)"
+        )
+        await conn.execute(
+            "CREATE INDEX address_activity_address_program_id_height_index "
+            "ON address_activity (address, program_id, height DESC, id DESC)"
+        )
+        await conn.execute("CREATE INDEX address_activity_block_id_index ON address_activity (block_id)")
+
+        # append-only columns that follow insertion order, a block range index is a fraction of the btree size
+        await conn.execute("DROP INDEX IF EXISTS dag_vertex_round_index")
+        await conn.execute("CREATE INDEX IF NOT EXISTS dag_vertex_round_brin_index ON dag_vertex USING brin (round)")
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS dag_vertex_timestamp_brin_index ON dag_vertex USING brin (timestamp)"
+        )
+
+    @staticmethod
+    async def migrate_11_add_mapping_history_snapshot_index(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        # serves the DISTINCT ON (mapping_id, key_id) of mapping snapshots in index order, and covers mapping_id lookups
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS mapping_history_mapping_id_key_id_id_index "
+            "ON mapping_history (mapping_id, key_id, id DESC)"
+        )
+        await conn.execute("DROP INDEX IF EXISTS mapping_history_mapping_id_index")
+
+    @staticmethod
+    async def migrate_12_partition_mapping_history(conn: psycopg.AsyncConnection[dict[str, Any]]):
+        # a partitioned table can't be the target of a foreign key or have a unique index without the partition key,
+        # so the previous_id self reference goes. MappingWriter links each row to mapping_history_last_id, and nothing
+        # looks rows up by previous_id.
+        await conn.execute("ALTER TABLE mapping_history RENAME TO mapping_history_unpartitioned")
+        await conn.execute(
+            "ALTER TABLE mapping_history_unpartitioned DROP CONSTRAINT mapping_history_mapping_history_id_fk"
+        )
+        await conn.execute("ALTER TABLE mapping_history_unpartitioned DROP CONSTRAINT mapping_history_mapping_id_fk")
+        await conn.execute("ALTER TABLE mapping_history_unpartitioned DROP CONSTRAINT mapping_history_pk")
+        await conn.execute("DROP INDEX mapping_history_height_index")
+        await conn.execute("DROP INDEX mapping_history_key_id_index")
+        await conn.execute("DROP INDEX mapping_history_previous_id_uindex")
+        await conn.execute("DROP INDEX mapping_history_mapping_id_key_id_id_index")
+        await conn.execute("ALTER SEQUENCE mapping_history_id_seq OWNED BY NONE")
+        await conn.execute(
+            "CREATE TABLE mapping_history ("
+            "    id bigint NOT NULL DEFAULT nextval('mapping_history_id_seq'),"
+            "    mapping_id integer NOT NULL,"
+            "    height integer NOT NULL,"
+            "    key_id text NOT NULL,"
+            "    key bytea NOT NULL,"
+            "    value bytea,"
+            "    from_transaction boolean NOT NULL,"
+            "    previous_id bigint,"
+            "    CONSTRAINT mapping_history_pk PRIMARY KEY (id, height),"
+            "    CONSTRAINT mapping_history_mapping_id_fk FOREIGN KEY (mapping_id) REFERENCES mapping (id) ON DELETE CASCADE"
+            ") PARTITION BY RANGE (height)"
+        )
+        await conn.execute("ALTER TABLE mapping_history ALTER COLUMN key_id SET STATISTICS 10000")
+        await conn.execute("ALTER SEQUENCE mapping_history_id_seq OWNED BY mapping_history.id")
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT COALESCE(MAX(height), 0) AS height FROM block")
+            if (res := await cur.fetchone()) is None:
+                raise RuntimeError("failed to retrieve latest height")
+            for index in range(res["height"] // DatabaseBase.partition_size + 1):
+                await DatabaseBase.create_partition(cur, "mapping_history", index)
+        await conn.execute(
+            "INSERT INTO mapping_history "
+            "SELECT id, mapping_id, height, key_id, key, value, from_transaction, previous_id "
+            "FROM mapping_history_unpartitioned"
+        )
+        await conn.execute("DROP TABLE mapping_history_unpartitioned")
+        await conn.execute("CREATE INDEX mapping_history_key_id_index ON mapping_history (key_id)")
+        await conn.execute(
+            "CREATE INDEX mapping_history_mapping_id_key_id_id_index ON mapping_history (mapping_id, key_id, id DESC)"
+        )
+        # rows are appended in height order, the block range index replaces the height btree
+        await conn.execute("CREATE INDEX mapping_history_height_brin_index ON mapping_history USING brin (height)")
+
+    async def backfill_block_raw(self, workers: int):
+        # blocks saved before the raw store was enabled are rebuilt from their rows. Like any rebuilt block they lack
+        # the certificate signatures and rejected deploy programs, reads just get the same block without the rebuild
+        chunk_size = 100
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "SELECT b.height FROM block b "
+                        "LEFT JOIN block_raw r ON r.height = b.height "
+                        "WHERE r.height IS NULL ORDER BY b.height"
+                    )
+                    heights = [row["height"] for row in await cur.fetchall()]
+            if not heights:
+                return
+            print(f"backfilling {len(heights)} raw blocks")
+            chunks = iter([heights[i:i + chunk_size] for i in range(0, len(heights), chunk_size)])
+
+            async def worker():
+                async with self.pool.connection() as conn:
+                    async with conn.cursor() as cur:
+                        for chunk in chunks:
+                            missing = set(chunk)
+                            blocks = await DatabaseBlock.get_full_block_range(chunk[-1], chunk[0] - 1, conn)
+                            blocks = [b for b in blocks if b.height in missing]
+                            # joined by hash, a revert and re-sync since the read may have put another block at the height
+                            await cur.execute(
+                                "INSERT INTO block_raw (height, block_hash, block_id, data) "
+                                "SELECT b.height, b.block_hash, b.id, r.data "
+                                "FROM unnest(%s::text[], %s::bytea[]) r(block_hash, data) "
+                                "JOIN block b ON b.block_hash = r.block_hash "
+                                "ON CONFLICT (height) DO NOTHING",
+                                ([str(b.block_hash) for b in blocks], [DatabaseBlock.dump_raw_block(b) for b in blocks])
+                            )
+
+            await asyncio.gather(*[worker() for _ in range(workers)])
+            print("raw block backfill finished")
+        except Exception as e:
+            await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+            raise
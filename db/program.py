@@ -41,24 +41,32 @@ class DatabaseProgram(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def get_programs(self, start: int, end: int, no_helloworld: bool = False) -> list[dict[str, Any]]:
+    async def get_programs(self, start: int, end: int, no_helloworld: bool = False,
+                           cursor: Optional[int] = None) -> list[dict[str, Any]]:
+        # cursor is the id of the last program on the previous page, start / end are relative to it
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    where = "WHERE feature_hash NOT IN (SELECT hash FROM program_filter_hash) " if no_helloworld else ""
+                    conditions: list[str] = []
+                    params: list[Any] = []
+                    if no_helloworld:
+                        conditions.append("feature_hash NOT IN (SELECT hash FROM program_filter_hash)")
+                    if cursor is not None:
+                        conditions.append("p.id < %s")
+                        params.append(cursor)
+                    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
                     await cur.execute(
-                        "SELECT p.program_id, b.height, t.transaction_id, SUM(pf.called) as called "
+                        "SELECT p.id, p.program_id, b.height, t.transaction_id, "
+                        "(SELECT SUM(pf.called) FROM program_function pf WHERE pf.program_id = p.id) AS called "
                         "FROM program p "
                         "JOIN transaction_deploy td on p.transaction_deploy_id = td.id "
                         "JOIN transaction t on td.transaction_id = t.id "
                         "JOIN confirmed_transaction ct on t.confirmed_transaction_id = ct.id "
                         "JOIN block b on ct.block_id = b.id "
-                        "JOIN program_function pf on p.id = pf.program_id "
                         f"{where}"
-                        "GROUP BY p.program_id, b.height, p.id, t.transaction_id "
                         "ORDER BY p.id DESC "
                         "LIMIT %s OFFSET %s",
-                        (end - start, start)
+                        (*params, end - start, start)
                     )
                     return await cur.fetchall()
                 except Exception as e:
@@ -81,23 +89,26 @@ class DatabaseProgram(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def get_programs_with_feature_hash(self, feature_hash: bytes, start: int, end: int) -> list[dict[str, Any]]:
+    async def get_programs_with_feature_hash(self, feature_hash: bytes, start: int, end: int,
+                                             cursor: Optional[int] = None) -> list[dict[str, Any]]:
+        # programs are inserted in deploy order, so ordering by id is ordering by height
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    after = "AND p.id > %s " if cursor is not None else ""
+                    params: tuple[Any, ...] = (feature_hash, cursor) if cursor is not None else (feature_hash,)
                     await cur.execute(
-                        "SELECT p.program_id, b.height, t.transaction_id, SUM(pf.called) as called "
+                        "SELECT p.id, p.program_id, b.height, t.transaction_id, "
+                        "(SELECT SUM(pf.called) FROM program_function pf WHERE pf.program_id = p.id) AS called "
                         "FROM program p "
                         "JOIN transaction_deploy td on p.transaction_deploy_id = td.id "
                         "JOIN transaction t on td.transaction_id = t.id "
                         "JOIN confirmed_transaction ct on t.confirmed_transaction_id = ct.id "
                         "JOIN block b on ct.block_id = b.id "
-                        "JOIN program_function pf on p.id = pf.program_id "
-                        "WHERE feature_hash = %s "
-                        "GROUP BY p.program_id, b.height, t.transaction_id "
-                        "ORDER BY b.height "
+                        f"WHERE feature_hash = %s {after}"
+                        "ORDER BY p.id "
                         "LIMIT %s OFFSET %s",
-                        (feature_hash, end - start, start)
+                        (*params, end - start, start)
                     )
                     return await cur.fetchall()
                 except Exception as e:
@@ -166,21 +177,26 @@ class DatabaseProgram(DatabaseBase):
                     raise
 
 
-    async def get_program_calls(self, program_id: str, start: int, end: int) -> list[dict[str, Any]]:
+    async def get_program_calls(self, program_id: str, start: int, end: int,
+                                cursor: Optional[int] = None) -> list[dict[str, Any]]:
+        # transitions are inserted block by block, so a descending id is a descending height and the
+        # (program_id, id) index serves any page directly when the previous page's last id is passed as cursor
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    before = "AND ts.id < %s " if cursor is not None else ""
+                    params: tuple[Any, ...] = (program_id, cursor) if cursor is not None else (program_id,)
                     await cur.execute(
-                        "SELECT b.height, b.timestamp, ts.transition_id, function_name, ct.type "
+                        "SELECT ts.id, b.height, b.timestamp, ts.transition_id, function_name, ct.type "
                         "FROM transition ts "
                         "JOIN transaction_execute te on te.id = ts.transaction_execute_id "
                         "JOIN transaction t on te.transaction_id = t.id "
                         "JOIN confirmed_transaction ct on t.confirmed_transaction_id = ct.id "
                         "JOIN block b on ct.block_id = b.id "
-                        "WHERE ts.program_id = %s "
-                        "ORDER BY b.height DESC "
+                        f"WHERE ts.program_id = %s {before}"
+                        "ORDER BY ts.id DESC "
                         "LIMIT %s OFFSET %s",
-                        (program_id, end - start, start)
+                        (*params, end - start, start)
                     )
                     return await cur.fetchall()
                 except Exception as e:
@@ -255,6 +271,23 @@ class DatabaseProgram(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
+    async def get_program_with_edition(self, program_id: str) -> Optional[tuple[bytes, int]]:
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await cur.execute(
+                        "SELECT p.raw_data, COALESCE(td.edition, 0) AS edition FROM program p "
+                        "LEFT JOIN transaction_deploy td ON p.transaction_deploy_id = td.id "
+                        "WHERE p.program_id = %s",
+                        (program_id,)
+                    )
+                    res = await cur.fetchone()
+                    if res is None:
+                        return None
+                    return res['raw_data'], res['edition']
+                except Exception as e:
+                    await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
+                    raise
 
     async def get_program_leo_source_code(self, program_id: str) -> Optional[str]:
         async with self.pool.connection() as conn:
@@ -1,32 +1,38 @@
-
 from __future__ import annotations
 
+from aleo_types import *
 from explorer.types import Message as ExplorerMessage
 from .base import DatabaseBase
 
 
 class DatabaseSearch(DatabaseBase):
 
+    # all prefix searches go through text_pattern_ops indexes and stop after `limit` matches
 
-    async def search_block_hash(self, block_hash: str) -> list[str]:
+    async def search_block_hash(self, block_hash: str, limit: int) -> list[str]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    await cur.execute("SELECT block_hash FROM block WHERE block_hash LIKE %s", (f"{block_hash}%",))
+                    await cur.execute(
+                        "SELECT block_hash FROM block WHERE block_hash LIKE %s LIMIT %s", (f"{block_hash}%", limit)
+                    )
                     result = await cur.fetchall()
                     return list(map(lambda x: x['block_hash'], result))
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def search_transaction_id(self, transaction_id: str) -> list[str]:
+    async def search_transaction_id(self, transaction_id: str, limit: int) -> list[str]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
+                    # an OR of the two LIKEs can't use either index
                     await cur.execute(
-                        "SELECT transaction_id FROM transaction "
-                        "WHERE transaction_id LIKE %s OR original_transaction_id LIKE %s",
-                        (f"{transaction_id}%", f"{transaction_id}%")
+                        "(SELECT transaction_id FROM transaction WHERE transaction_id LIKE %(prefix)s LIMIT %(limit)s) "
+                        "UNION "
+                        "(SELECT transaction_id FROM transaction WHERE original_transaction_id LIKE %(prefix)s LIMIT %(limit)s) "
+                        "LIMIT %(limit)s",
+                        {"prefix": f"{transaction_id}%", "limit": limit}
                     )
                     result = await cur.fetchall()
                     return list(map(lambda x: x['transaction_id'], result))
@@ -34,49 +40,45 @@ class DatabaseSearch(DatabaseBase):
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def search_transition_id(self, transition_id: str) -> list[str]:
+    async def search_transition_id(self, transition_id: str, limit: int) -> list[str]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    await cur.execute("SELECT transition_id FROM transition WHERE transition_id LIKE %s", (f"{transition_id}%",))
+                    await cur.execute(
+                        "SELECT transition_id FROM transition WHERE transition_id LIKE %s LIMIT %s",
+                        (f"{transition_id}%", limit)
+                    )
                     result = await cur.fetchall()
                     return list(map(lambda x: x['transition_id'], result))
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-
-    async def search_address(self, address: str) -> list[str]:
+    async def search_address(self, address: str, limit: int) -> list[str]:
+        # addresses from the program table are served by util.search_index
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
-                    puzzle_rewards = await self.redis.hgetall("address_puzzle_reward")
-                    res = set(filter(lambda x: x.startswith(address), puzzle_rewards.keys()))
                     await cur.execute(
-                        "SELECT DISTINCT owner FROM program WHERE owner LIKE %s", (f"{address}%",)
+                        "(SELECT DISTINCT address FROM solution WHERE address LIKE %(prefix)s LIMIT %(limit)s) "
+                        "UNION "
+                        "(SELECT DISTINCT address FROM address_transition WHERE address LIKE %(prefix)s LIMIT %(limit)s) "
+                        "LIMIT %(limit)s",
+                        {"prefix": f"{address}%", "limit": limit}
                     )
-                    res.update(set(map(lambda x: x['owner'], await cur.fetchall())))
-                    await cur.execute(
-                        "SELECT DISTINCT address FROM address_transition WHERE address LIKE %s", (f"{address}%",)
-                    )
-                    res.update(set(map(lambda x: x['address'], await cur.fetchall())))
-                    await cur.execute(
-                        "SELECT address FROM program WHERE address LIKE %s", (f"{address}%",)
-                    )
-                    res.update(set(map(lambda x: x['address'], await cur.fetchall())))
-                    return list(res)
+                    return list(map(lambda x: x['address'], await cur.fetchall()))
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
 
-    async def search_program(self, program_id: str) -> list[str]:
+    async def get_program_search_entries(self, after_id: int) -> list[dict[str, Any]]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 try:
                     await cur.execute(
-                        "SELECT program_id FROM program WHERE program_id LIKE %s", (f"{program_id}%",)
+                        "SELECT id, program_id, owner, address FROM program WHERE id > %s ORDER BY id", (after_id,)
                     )
-                    return list(map(lambda x: x['program_id'], await cur.fetchall()))
+                    return await cur.fetchall()
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
-                    raise
\ No newline at end of file
+                    raise
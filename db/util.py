@@ -6,8 +6,11 @@ from aleo_explorer_rust import get_value_id
 
 from aleo_types import *
 from explorer.types import Message as ExplorerMessage
+from util.global_cache import global_program_cache
+from .address import DatabaseAddress
 from .base import DatabaseBase
 from .block import DatabaseBlock
+from .validator import DatabaseValidator
 
 
 class DatabaseUtil(DatabaseBase):
@@ -194,6 +197,21 @@ class DatabaseUtil(DatabaseBase):
                             "DELETE FROM committee_history WHERE height > %s",
                             (last_backup_height,)
                         )
+                        if blocks_to_revert:
+                            # rebuild the buckets the reverted blocks contributed to from the remaining rows
+                            size = DatabaseAddress.speed_bucket_size
+                            since = min(b.header.metadata.timestamp for b in blocks_to_revert) // size * size
+                            await cur.execute("DELETE FROM prover_speed_bucket WHERE bucket >= %s", (since,))
+                            await cur.execute("DELETE FROM network_speed_bucket WHERE bucket >= %s", (since,))
+                            await DatabaseAddress.rollup_speed_buckets(cur, since)
+                            size = DatabaseValidator.participation_bucket_size
+                            since = min(b.header.metadata.timestamp for b in blocks_to_revert) // size * size
+                            await cur.execute("DELETE FROM validator_participation_bucket WHERE bucket >= %s", (since,))
+                            await cur.execute("DELETE FROM network_participation_bucket WHERE bucket >= %s", (since,))
+                            await DatabaseValidator.rollup_participation_buckets(cur, since)
+
+                        # programs deployed in the reverted blocks are gone
+                        await global_program_cache.clear(self.redis)
 
                         for redis_key in self.redis_keys:
                             backup_key = f"{redis_key}:history:{last_backup_height}"
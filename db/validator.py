@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import psycopg
+
 from aleo_types import *
 from explorer.types import Message as ExplorerMessage
 from .base import DatabaseBase
@@ -7,6 +9,67 @@ from .base import DatabaseBase
 
 class DatabaseValidator(DatabaseBase):
 
+    # validator participation is rolled up into fixed buckets of this many seconds, see rollup_participation_buckets
+    participation_bucket_size = 900
+
+    @staticmethod
+    async def rollup_participation_buckets(cur: psycopg.AsyncCursor[dict[str, Any]], since: int):
+        # a validator took part in a block if it authored any certificate in the block's subdag
+        await cur.execute(
+            "INSERT INTO validator_participation_bucket (address, bucket, block_count) "
+            "SELECT d.author, b.timestamp / %(size)s * %(size)s, COUNT(DISTINCT b.id) "
+            "FROM block b "
+            "JOIN authority a ON a.block_id = b.id "
+            "JOIN dag_vertex d ON d.authority_id = a.id "
+            "WHERE b.timestamp >= %(since)s "
+            "GROUP BY 1, 2",
+            {"size": DatabaseValidator.participation_bucket_size, "since": since}
+        )
+        await cur.execute(
+            "INSERT INTO network_participation_bucket (bucket, block_count, participant_count, committee_size) "
+            "SELECT b.timestamp / %(size)s * %(size)s, COUNT(*), SUM(p.count), SUM(c.count) "
+            "FROM block b "
+            "CROSS JOIN LATERAL ("
+            "    SELECT COUNT(DISTINCT d.author) FROM authority a "
+            "    JOIN dag_vertex d ON d.authority_id = a.id "
+            "    WHERE a.block_id = b.id"
+            ") p "
+            "CROSS JOIN LATERAL ("
+            "    SELECT COUNT(*) FROM committee_history_member chm "
+            "    JOIN committee_history ch ON chm.committee_id = ch.id "
+            "    WHERE ch.height = b.height"
+            ") c "
+            "WHERE b.timestamp >= %(since)s "
+            "GROUP BY 1",
+            {"size": DatabaseValidator.participation_bucket_size, "since": since}
+        )
+
+    @staticmethod
+    def _participation_window_start(timestamp: int, interval: int) -> int:
+        # first whole bucket inside the window, the partial bucket at the start is left out
+        size = DatabaseValidator.participation_bucket_size
+        return (timestamp - interval + size - 1) // size * size
+
+    async def _get_participation_counts(self, cur: psycopg.AsyncCursor[dict[str, Any]], timestamp: int, interval: int,
+                                        addresses: list[str]) -> Optional[tuple[dict[str, int], int]]:
+        # returns: blocks each validator took part in, total blocks; None if there are no blocks in the window
+        start = self._participation_window_start(timestamp, interval)
+        await cur.execute(
+            "SELECT SUM(block_count) AS count FROM network_participation_bucket WHERE bucket BETWEEN %s AND %s",
+            (start, timestamp)
+        )
+        res = await cur.fetchone()
+        if res is None or not res["count"]:
+            return None
+        block_count = res["count"]
+        await cur.execute(
+            "SELECT address, SUM(block_count) AS count FROM validator_participation_bucket "
+            "WHERE address = ANY(%s::text[]) AND bucket BETWEEN %s AND %s "
+            "GROUP BY address",
+            (addresses, start, timestamp)
+        )
+        return {row["address"]: row["count"] for row in await cur.fetchall()}, block_count
+
     async def get_validator_count_at_height(self, height: int) -> Optional[int]:
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
@@ -46,29 +109,12 @@ class DatabaseValidator(DatabaseBase):
                         timestamp = res["timestamp"]
                     else:
                         return []
-                    await cur.execute(
-                        "WITH va AS "
-                        "    (SELECT unnest(array_agg(DISTINCT d.author)) AS author "
-                        "     FROM BLOCK b "
-                        "     JOIN authority a ON a.block_id = b.id "
-                        "     JOIN dag_vertex d ON d.authority_id = a.id "
-                        "     WHERE b.timestamp > %s "
-                        "     GROUP BY d.authority_id) "
-                        "SELECT author, count(author) FROM va "
-                        "GROUP BY author",
-                        (timestamp - 86400,)
-                    )
-                    res = await cur.fetchall()
-                    validator_counts = {v["author"]: v["count"] for v in res}
-                    await cur.execute(
-                        "SELECT count(*) FROM block WHERE timestamp > %s",
-                        (timestamp - 86400,)
+                    counts = await self._get_participation_counts(
+                        cur, timestamp, 86400, [v["address"] for v in validators]
                     )
-                    res = await cur.fetchone()
-                    if res:
-                        block_count = res["count"]
-                    else:
+                    if counts is None:
                         return []
+                    validator_counts, block_count = counts
                     for validator in validators:
                         validator["uptime"] = validator_counts.get(validator["address"], 0) / block_count
 
@@ -87,32 +133,11 @@ class DatabaseValidator(DatabaseBase):
                         timestamp = res["timestamp"]
                     else:
                         return None
-                    await cur.execute(
-                        "WITH va AS "
-                        "    (SELECT unnest(array_agg(DISTINCT d.author)) AS author "
-                        "     FROM BLOCK b "
-                        "     JOIN authority a ON a.block_id = b.id "
-                        "     JOIN dag_vertex d ON d.authority_id = a.id "
-                        "     WHERE b.timestamp > %s "
-                        "     GROUP BY d.authority_id) "
-                        "SELECT author, count(author) FROM va "
-                        "GROUP BY author",
-                        (timestamp - 86400,)
-                    )
-                    res = await cur.fetchall()
-                    validator_counts = {v["author"]: v["count"] for v in res}
-                    if address not in validator_counts:
-                        return 0
-                    await cur.execute(
-                        "SELECT count(*) FROM block WHERE timestamp > %s",
-                        (timestamp - 86400,)
-                    )
-                    res = await cur.fetchone()
-                    if res:
-                        block_count = res["count"]
-                    else:
+                    counts = await self._get_participation_counts(cur, timestamp, 86400, [address])
+                    if counts is None:
                         return None
-                    return validator_counts[address] / block_count
+                    validator_counts, block_count = counts
+                    return validator_counts.get(address, 0) / block_count
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
@@ -147,34 +172,14 @@ class DatabaseValidator(DatabaseBase):
                     else:
                         return 0
                     await cur.execute(
-                        "WITH va AS "
-                        "    (SELECT unnest(array_agg(DISTINCT d.author)) AS author "
-                        "     FROM BLOCK b "
-                        "     JOIN authority a ON a.block_id = b.id "
-                        "     JOIN dag_vertex d ON d.authority_id = a.id "
-                        "     WHERE b.timestamp > %s "
-                        "     GROUP BY d.authority_id) "
-                        "SELECT count(author) FROM va",
-                        (timestamp - 3600,)
-                    )
-                    res = await cur.fetchone()
-                    if res:
-                        validator_count = res["count"]
-                    else:
-                        return 0
-                    await cur.execute(
-                        "SELECT count(*) FROM committee_history_member chm "
-                        "JOIN committee_history ch ON chm.committee_id = ch.id "
-                        "JOIN block b ON ch.height = b.height "
-                        "WHERE b.timestamp > %s",
-                        (timestamp - 3600,)
+                        "SELECT SUM(participant_count) AS participants, SUM(committee_size) AS committee_size "
+                        "FROM network_participation_bucket WHERE bucket >= %s",
+                        (self._participation_window_start(timestamp, 3600),)
                     )
                     res = await cur.fetchone()
-                    if res:
-                        total_validator_count = res["count"]
-                    else:
+                    if res is None or not res["committee_size"]:
                         return 0
-                    return validator_count / total_validator_count
+                    return res["participants"] / res["committee_size"]
                 except Exception as e:
                     await self.message_callback(ExplorerMessage(ExplorerMessage.Type.DatabaseError, e))
                     raise
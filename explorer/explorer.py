@@ -2,14 +2,17 @@ import asyncio
 import os
 import traceback
 from sys import stdout
+from typing import cast
 
-from aleo_types import Block, BlockHash
+from aleo_types import AcceptedDeploy, Block, BlockHash, DeployTransaction
 from api import api
 from db import Database
 from interpreter.interpreter import init_builtin_program
 # from node.light_node import LightNodeState
 from node import Network
 from node import Node
+from util.chain_tip import ChainTip
+from util.stream import publish_unconfirmed_transaction
 from webapi import webapi
 from webui import webui
 from .types import Request, Message, ExplorerRequest
@@ -44,6 +47,7 @@ class Explorer:
             return self.latest_height
         elif isinstance(request, Request.ProcessUnconfirmedTransaction):
             await self.db.save_unconfirmed_transaction(request.tx)
+            await publish_unconfirmed_transaction(self.db, request.tx)
         elif isinstance(request, Request.ProcessBlock):
             await self.add_block(request.block)
         elif isinstance(request, Request.GetBlockByHeight):
@@ -109,8 +113,14 @@ class Explorer:
                     case Message.Type.DatabaseError:
                         print("database error:", msg.data)
                     case Message.Type.DatabaseBlockAdded:
-                        # maybe do something later?
-                        pass
+                        block: Block = msg.data
+                        programs = [
+                            str(cast(DeployTransaction, ct.transaction).deployment.program.id)
+                            for ct in block.transactions if isinstance(ct, AcceptedDeploy)
+                        ]
+                        await ChainTip.publish(
+                            self.db, block.height, str(block.block_hash), block.header.metadata.timestamp, programs
+                        )
         except Exception as e:
             print("explorer error:", e)
             traceback.print_exc()
@@ -168,6 +178,10 @@ class Explorer:
             except OSError as e:
                 print("Cannot remove revert_flag:", e)
             await self.db.revert_to_last_backup()
+            # web processes hold the old tip until told otherwise, and their response caches with it
+            tip = await self.db.get_chain_tip()
+            if tip is not None:
+                await ChainTip.publish(self.db, *tip)
 
     async def check_clear(self):
         if os.path.exists("clear_flag") and os.path.isfile("clear_flag"):
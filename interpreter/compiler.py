@@ -0,0 +1,136 @@
+from collections import OrderedDict
+
+from aleo_types import *
+from util.global_cache import global_program_cache
+from .environment import Registers
+from .instruction import compile_instruction
+from .utils import compile_operand, OperandLoader
+
+OP_INSTRUCTION = 0
+OP_CONTAINS = 1
+OP_GET = 2
+OP_GET_OR_USE = 3
+OP_SET = 4
+OP_RAND_CHACHA = 5
+OP_REMOVE = 6
+OP_BRANCH_EQ = 7
+OP_BRANCH_NEQ = 8
+OP_AWAIT = 9
+OP_NOP = 10
+OP_UNSUPPORTED = 11
+
+# (opcode, original command, pre-bound arguments)
+Step = tuple[int, Command, tuple[Any, ...]]
+
+
+class MappingRef:
+    """A mapping referenced by a finalize command, with its id computed once"""
+
+    def __init__(self, program_id: ProgramID, mapping: Identifier):
+        self.program_id = program_id
+        self.mapping = mapping
+        self.program_name = str(program_id)
+        self.mapping_name = str(mapping)
+        self.mapping_id = Field.loads(cached_get_mapping_id(self.program_name, self.mapping_name))
+
+    def key_id(self, key: Plaintext) -> Field:
+        return Field.loads(cached_get_key_id(self.program_name, self.mapping_name, key.dump()))
+
+
+class CompiledFinalize:
+    """
+    A finalize block flattened into opcode tuples. Mapping ids, operand registers, branch targets and instruction
+    handlers are resolved when the block is compiled, so execute_finalizer only has to walk the list.
+    """
+
+    def __init__(self, program: Program, function_name: Identifier, finalize: Finalize):
+        self.program = program
+        self.function_name = function_name
+        self.inputs: list[tuple[str, int]] = []
+        for fi in finalize.inputs:
+            ir = fi.register
+            if not isinstance(ir, LocatorRegister):
+                raise TypeError("invalid input register type")
+            self.inputs.append((fi.finalize_type.type.name, int(ir.locator)))
+        self.steps: list[Step] = [self._compile_command(c, finalize) for c in finalize.commands]
+
+    def _mapping_ref(self, operator: CallOperator) -> MappingRef:
+        if isinstance(operator, LocatorCallOperator):
+            return MappingRef(operator.locator.id, operator.locator.resource)
+        elif isinstance(operator, ResourceCallOperator):
+            return MappingRef(self.program.id, operator.resource)
+        else:
+            raise TypeError("invalid locator type")
+
+    def _compile_command(self, c: Command, finalize: Finalize) -> Step:
+        program = self.program
+        if isinstance(c, InstructionCommand):
+            return OP_INSTRUCTION, c, (compile_instruction(c.instruction, program),)
+        elif isinstance(c, ContainsCommand):
+            return OP_CONTAINS, c, (self._mapping_ref(c.mapping), compile_operand(c.key))
+        elif isinstance(c, GetCommand):
+            return OP_GET, c, (self._mapping_ref(c.mapping), compile_operand(c.key))
+        elif isinstance(c, GetOrUseCommand):
+            return OP_GET_OR_USE, c, (self._mapping_ref(c.mapping), compile_operand(c.key), compile_operand(c.default))
+        elif isinstance(c, SetCommand):
+            return OP_SET, c, (MappingRef(program.id, c.mapping), compile_operand(c.key), compile_operand(c.value))
+        elif isinstance(c, RandChaChaCommand):
+            seed_loaders: list[OperandLoader] = [compile_operand(o) for o in c.operands]
+            return OP_RAND_CHACHA, c, (
+                seed_loaders, program.id.dump(), self.function_name.dump(), int(c.destination.locator),
+                Literal.Type(c.destination_type.value), c.destination_type.primitive_type,
+            )
+        elif isinstance(c, RemoveCommand):
+            return OP_REMOVE, c, (MappingRef(program.id, c.mapping), compile_operand(c.key))
+        elif isinstance(c, (BranchEqCommand, BranchNeqCommand)):
+            op = OP_BRANCH_EQ if isinstance(c, BranchEqCommand) else OP_BRANCH_NEQ
+            return op, c, (compile_operand(c.first), compile_operand(c.second), finalize.positions[c.position])
+        elif isinstance(c, PositionCommand):
+            return OP_NOP, c, ()
+        elif isinstance(c, AwaitCommand):
+            return OP_AWAIT, c, (c.register,)
+        return OP_UNSUPPORTED, c, ()
+
+    def load_inputs(self, inputs: list[Value]) -> Registers:
+        if len(inputs) != len(self.inputs):
+            raise TypeError("invalid number of inputs")
+        registers = Registers()
+        for (type_name, locator), i in zip(self.inputs, inputs):
+            if type_name != i.type.name:
+                raise TypeError("invalid input type")
+            registers[locator] = i
+        return registers
+
+
+class CompiledFinalizeCache:
+    """(program id, edition, function name) -> CompiledFinalize, bounded LRU"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.entries: OrderedDict[tuple[str, int, str], CompiledFinalize] = OrderedDict()
+
+    def get(self, program: Program, function_name: Identifier) -> CompiledFinalize:
+        program_id = str(program.id)
+        key = (program_id, global_program_cache.edition(program_id), str(function_name))
+        compiled = self.entries.get(key)
+        # programs not coming from the program cache (previews) are compiled separately
+        if compiled is not None and compiled.program is program:
+            self.entries.move_to_end(key)
+            return compiled
+        function = program.functions[function_name]
+        if function.finalize.value is None:
+            raise ValueError("invalid finalize function")
+        compiled = CompiledFinalize(program, function_name, function.finalize.value)
+        self.entries[key] = compiled
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return compiled
+
+
+compiled_finalize_cache = CompiledFinalizeCache()
+
+
+def get_compiled_finalize(program: Program, function_name: Identifier) -> CompiledFinalize:
+    return compiled_finalize_cache.get(program, function_name)
+
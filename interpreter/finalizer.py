@@ -7,10 +7,11 @@ import psycopg
 from aleo_types import *
 from db import Database
 from disasm.aleo import disasm_instruction, disasm_command
-from util.global_cache import MappingCacheDict, get_program
-from .environment import Registers
-from .instruction import execute_instruction
-from .utils import load_plaintext_from_operand, store_plaintext_to_register, FinalizeState, load_future_from_register
+from util.global_cache import MappingCacheDict, MappingKeyCache, MappingCache, MappingCacheOverlay, MappingOverlay, \
+    get_program
+from .compiler import get_compiled_finalize, MappingRef, OP_INSTRUCTION, OP_CONTAINS, OP_GET, OP_GET_OR_USE, \
+    OP_SET, OP_RAND_CHACHA, OP_REMOVE, OP_BRANCH_EQ, OP_BRANCH_NEQ, OP_AWAIT, OP_NOP
+from .utils import store_plaintext_to_register, FinalizeState, load_future_from_register
 
 try:
     from line_profiler import profile
@@ -45,25 +46,13 @@ class ExecuteError(Exception):
 async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict[str, Any]]], finalize_state: FinalizeState,
                             transition_id: TransitionID, program: Program,
                             function_name: Identifier, inputs: list[Value],
-                            mapping_cache: dict[Field, MappingCacheDict],
-                            local_mapping_cache: dict[Field, MappingCacheDict],
+                            mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache],
+                            local_mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache],
                             allow_state_change: bool) -> list[dict[str, Any]]:
-    registers = Registers()
     operations: list[dict[str, Any]] = []
-    function = program.functions[function_name]
-    if function.finalize.value is None:
-        raise ValueError("invalid finalize function")
-    finalize = function.finalize.value
-
-    if len(inputs) != len(finalize.inputs):
-        raise TypeError("invalid number of inputs")
-    for fi, i in zip(finalize.inputs, inputs):
-        if fi.finalize_type.type.name != i.type.name:
-            raise TypeError("invalid input type")
-        ir = fi.register
-        if not isinstance(ir, LocatorRegister):
-            raise TypeError("invalid input register type")
-        registers[int(ir.locator)] = i
+    compiled = get_compiled_finalize(program, function_name)
+    registers = compiled.load_inputs(inputs)
+    steps = compiled.steps
 
     debug = os.environ.get("DEBUG", False)
     timer = time.perf_counter_ns()
@@ -73,19 +62,30 @@ async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict
 
     pc = 0
 
-    async def load_mapping_cache_id(program_id_: ProgramID, mapping_: Identifier):
-        mapping_id_ = Field.loads(cached_get_mapping_id(str(program_id_), str(mapping_)))
+    async def load_mapping_cache_id(ref: MappingRef):
+        mapping_id_ = ref.mapping_id
         if mapping_id_ not in mapping_cache:
-            if cur:
-                mapping_cache[mapping_id_] = await mapping_cache_read_with_cur(db, cur, str(program_id_), str(mapping_))
+            if ref.program_name == "credits.aleo" and ref.mapping_name in ["committee", "bonded", "delegated"]:
+                # small and kept in redis, always loaded whole
+                if cur:
+                    mapping_cache[mapping_id_] = await mapping_cache_read_with_cur(db, cur, ref.program_name, ref.mapping_name)
+                else:
+                    mapping_cache[mapping_id_] = await mapping_cache_read(db, ref.program_name, ref.mapping_name)
+            elif isinstance(mapping_cache, (MappingCache, MappingCacheOverlay)):
+                mapping_cache.key_cache(ref.program_name, ref.mapping_name, mapping_id_)
             else:
-                mapping_cache[mapping_id_] = await mapping_cache_read(db, str(program_id_), str(mapping_))
+                mapping_cache[mapping_id_] = MappingKeyCache(ref.program_name, ref.mapping_name, mapping_id_)
         if not allow_state_change and mapping_id_ not in local_mapping_cache:
             local_mapping_cache[mapping_id_] = {}
         return mapping_id_
 
-    while pc < len(finalize.commands):
-        c = finalize.commands[pc]
+    async def load_mapping_key(mapping_id_: Field, key_id_: Field):
+        cache = mapping_cache[mapping_id_]
+        if isinstance(cache, (MappingKeyCache, MappingOverlay)):
+            await cache.load(db, cur, [key_id_])
+
+    while pc < len(steps):
+        op, c, args = steps[pc]
         if debug:
             if isinstance(c, InstructionCommand):
                 print(disasm_instruction(c.instruction))
@@ -93,29 +93,22 @@ async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict
                 print(disasm_command(c))
 
         try:
-            if isinstance(c, InstructionCommand):
-                instruction = c.instruction
+            if op == OP_INSTRUCTION:
                 try:
-                    execute_instruction(instruction, program, registers, finalize_state)
+                    args[0](registers, finalize_state)
                 except (AssertionError, OverflowError, ZeroDivisionError) as e:
+                    instruction = cast(InstructionCommand, c).instruction
                     raise ExecuteError(str(e), e, disasm_instruction(instruction), transition_id, str(program.id), str(function_name))
                 except Exception:
                     registers.dump()
                     raise
 
-            elif isinstance(c, ContainsCommand):
-                operator = c.mapping
-                if isinstance(operator, LocatorCallOperator):
-                    program_id = operator.locator.id
-                    mapping = operator.locator.resource
-                elif isinstance(operator, ResourceCallOperator):
-                    program_id = program.id
-                    mapping = operator.resource
-                else:
-                    raise TypeError("invalid locator type")
-                mapping_id = await load_mapping_cache_id(program_id, mapping)
-                key = load_plaintext_from_operand(c.key, registers, finalize_state)
-                key_id = Field.loads(cached_get_key_id(str(program_id), str(mapping), key.dump()))
+            elif op == OP_CONTAINS:
+                ref, load_key = args
+                mapping_id = await load_mapping_cache_id(ref)
+                key = load_key(registers, finalize_state)
+                key_id = ref.key_id(key)
+                await load_mapping_key(mapping_id, key_id)
                 if not allow_state_change and key_id in local_mapping_cache[mapping_id]:
                     contains = local_mapping_cache[mapping_id][key_id]["value"] is not None
                 else:
@@ -129,103 +122,98 @@ async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict
                         )
                     )
                 )
-                destination = c.destination
+                destination = cast(ContainsCommand, c).destination
                 store_plaintext_to_register(value.plaintext, destination, registers)
 
-            elif isinstance(c, GetCommand | GetOrUseCommand):
-                operator = c.mapping
-                if isinstance(operator, LocatorCallOperator):
-                    program_id = operator.locator.id
-                    mapping = operator.locator.resource
-                elif isinstance(operator, ResourceCallOperator):
-                    program_id = program.id
-                    mapping = operator.resource
-                else:
-                    raise TypeError("invalid locator type")
-                mapping_id = await load_mapping_cache_id(program_id, mapping)
-                key = load_plaintext_from_operand(c.key, registers, finalize_state)
-                key_id = Field.loads(cached_get_key_id(str(program_id), str(mapping), key.dump()))
+            elif op == OP_GET or op == OP_GET_OR_USE:
+                ref, load_key = args[0], args[1]
+                mapping = ref.mapping
+                mapping_id = await load_mapping_cache_id(ref)
+                key = load_key(registers, finalize_state)
+                key_id = ref.key_id(key)
+                await load_mapping_key(mapping_id, key_id)
                 if not allow_state_change and key_id in local_mapping_cache[mapping_id]:
                     if local_mapping_cache[mapping_id][key_id]["value"] is None:
-                        if isinstance(c, GetCommand):
+                        if op == OP_GET:
                             raise ExecuteError(f"key {key} not found in mapping {mapping}", None, disasm_command(c), transition_id, str(program.id), str(function_name))
-                        default = load_plaintext_from_operand(c.default, registers, finalize_state)
-                        value = PlaintextValue(plaintext=default)
+                        value = PlaintextValue(plaintext=args[2](registers, finalize_state))
                     else:
                         value = local_mapping_cache[mapping_id][key_id]["value"]
                 else:
                     if key_id not in mapping_cache[mapping_id]:
-                        if isinstance(c, GetCommand):
+                        if op == OP_GET:
                             raise ExecuteError(f"key {key} not found in mapping {mapping}", None, disasm_command(c), transition_id, str(program.id), str(function_name))
-                        default = load_plaintext_from_operand(c.default, registers, finalize_state)
-                        value = PlaintextValue(plaintext=default)
+                        value = PlaintextValue(plaintext=args[2](registers, finalize_state))
                     else:
                         value = mapping_cache[mapping_id][key_id]["value"]
                 if debug:
                     print(f"get {mapping}[{key}] = {value}")
                 if not isinstance(value, PlaintextValue):
                     raise TypeError("invalid value type")
-                destination = c.destination
+                destination = cast(GetCommand | GetOrUseCommand, c).destination
                 store_plaintext_to_register(value.plaintext, destination, registers)
 
-            elif isinstance(c, SetCommand):
-                mapping_id = await load_mapping_cache_id(program.id, c.mapping)
-                key = load_plaintext_from_operand(c.key, registers, finalize_state)
-                value = PlaintextValue(plaintext=load_plaintext_from_operand(c.value, registers, finalize_state))
-                key_id = Field.loads(cached_get_key_id(str(program.id), str(c.mapping), key.dump()))
+            elif op == OP_SET:
+                ref, load_key, load_value = args
+                mapping_id = await load_mapping_cache_id(ref)
+                key = load_key(registers, finalize_state)
+                value = PlaintextValue(plaintext=load_value(registers, finalize_state))
+                key_id = ref.key_id(key)
                 value_id = Field.loads(aleo_explorer_rust.get_value_id(str(key_id), value.dump()))
                 effective_mapping_cache = local_mapping_cache if not allow_state_change else mapping_cache
-                if key_id not in effective_mapping_cache[mapping_id]:
-                    effective_mapping_cache[mapping_id][key_id] = {
-                        "key": key,
-                        "value": value,
-                    }
-                else:
-                    effective_mapping_cache[mapping_id][key_id]["value"] = value
+                # always replace the entry instead of updating it in place, overlays only see assignments
+                effective_mapping_cache[mapping_id][key_id] = {
+                    "key": key,
+                    "value": value,
+                }
                 if debug:
-                    print(f"set {c.mapping}[{key}] = {value}")
+                    print(f"set {ref.mapping}[{key}] = {value}")
                 del effective_mapping_cache
                 operations.append({
                     "type": FinalizeOperation.Type.UpdateKeyValue,
-                    "program_name": str(program.id),
+                    "program_name": ref.program_name,
                     "mapping_id": mapping_id,
                     "key_id": key_id,
                     "value_id": value_id,
-                    "mapping_name": c.mapping,
+                    "mapping_name": ref.mapping,
                     "key": key,
                     "value": value,
                     "height": finalize_state.block_height,
                     "from_transaction": True,
                 })
 
-            elif isinstance(c, RandChaChaCommand):
-                additional_seeds = list(map(lambda x: PlaintextValue(plaintext=load_plaintext_from_operand(x, registers, finalize_state)).dump(), c.operands))
+            elif op == OP_RAND_CHACHA:
+                seed_loaders, program_id_bytes, function_name_bytes, destination_locator, literal_type, primitive_type = args
+                c = cast(RandChaChaCommand, c)
+                additional_seeds = [PlaintextValue(plaintext=load(registers, finalize_state)).dump() for load in seed_loaders]
                 chacha_seed = aleo_explorer_rust.chacha_random_seed(
                     finalize_state.random_seed,
                     transition_id.dump(),
-                    program.id.dump(),
-                    function_name.dump(),
-                    int(c.destination.locator),
+                    program_id_bytes,
+                    function_name_bytes,
+                    destination_locator,
                     c.destination_type.value,
                     additional_seeds,
                 )
-                primitive_type = c.destination_type.primitive_type
                 value = primitive_type.load(BytesIO(aleo_explorer_rust.chacha_random_value(chacha_seed, c.destination_type)))
                 res = LiteralPlaintext(
                     literal=Literal(
-                        type_=Literal.Type(c.destination_type.value),
+                        type_=literal_type,
                         primitive=value,
                     )
                 )
                 store_plaintext_to_register(res, c.destination, registers)
 
-            elif isinstance(c, RemoveCommand):
-                mapping_id = await load_mapping_cache_id(program.id, c.mapping)
-                key = load_plaintext_from_operand(c.key, registers, finalize_state)
-                key_id = Field.loads(cached_get_key_id(str(program.id), str(c.mapping), key.dump()))
+            elif op == OP_REMOVE:
+                ref, load_key = args
+                mapping_id = await load_mapping_cache_id(ref)
+                key = load_key(registers, finalize_state)
+                key_id = ref.key_id(key)
                 effective_mapping_cache = local_mapping_cache if not allow_state_change else mapping_cache
+                if allow_state_change:
+                    await load_mapping_key(mapping_id, key_id)
                 if key_id not in effective_mapping_cache[mapping_id]:
-                    print(f"Key {key} not found in mapping {c.mapping}")
+                    print(f"Key {key} not found in mapping {ref.mapping}")
                     pc += 1
                     continue
                 if allow_state_change:
@@ -233,30 +221,31 @@ async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict
                 else:
                     effective_mapping_cache[mapping_id][key_id]["value"] = None
                 if debug:
-                    print(f"del {c.mapping}[{key}]")
+                    print(f"del {ref.mapping}[{key}]")
                 operations.append({
                     "type": FinalizeOperation.Type.RemoveKeyValue,
-                    "program_name": str(program.id),
+                    "program_name": ref.program_name,
                     "mapping_id": mapping_id,
-                    "mapping_name": c.mapping,
+                    "mapping_name": ref.mapping,
                     "key_id": key_id,
                     "key": key,
                     "height": finalize_state.block_height,
                     "from_transaction": True,
                 })
 
-            elif isinstance(c, (BranchEqCommand, BranchNeqCommand)):
-                first = load_plaintext_from_operand(c.first, registers, finalize_state)
-                second = load_plaintext_from_operand(c.second, registers, finalize_state)
-                if (first == second and isinstance(c, BranchEqCommand)) or (first != second and isinstance(c, BranchNeqCommand)):
-                    pc = finalize.positions[c.position]
+            elif op == OP_BRANCH_EQ or op == OP_BRANCH_NEQ:
+                load_first, load_second, target = args
+                first = load_first(registers, finalize_state)
+                second = load_second(registers, finalize_state)
+                if (first == second) == (op == OP_BRANCH_EQ):
+                    pc = target
                     continue
 
-            elif isinstance(c, PositionCommand):
+            elif op == OP_NOP:
                 pass
 
-            elif isinstance(c, AwaitCommand):
-                call_future = load_future_from_register(c.register, registers, finalize_state)
+            elif op == OP_AWAIT:
+                call_future = load_future_from_register(args[0], registers, finalize_state)
                 call_program = await get_program(db, str(call_future.program_id))
                 if not call_program:
                     raise RuntimeError("program not found")
@@ -280,7 +269,3 @@ async def execute_finalizer(db: Database, cur: Optional[psycopg.AsyncCursor[dict
     if debug:
         print(f"execution took {time.perf_counter_ns() - timer} ns")
     return operations
-
-
-
-
@@ -10,35 +10,44 @@ CmT = CommitInstruction.Type
 CsT = CastType.Type
 
 def execute_instruction(instruction: Instruction, program: Program, registers: Registers, finalize_state: FinalizeState):
+    compile_instruction(instruction, program)(registers, finalize_state)
+
+def compile_instruction(instruction: Instruction, program: Program) -> Callable[[Registers, FinalizeState], None]:
     literals = instruction.literals
     if isinstance(literals, Literals):
-        num_operands = literals.num_operands
-        operands = literals.operands[:num_operands]
+        op = literal_ops[instruction.type]
+        operands = literals.operands[:literals.num_operands]
         destination = literals.destination
-        literal_ops[instruction.type](operands, destination, registers, finalize_state)
+        return lambda registers, finalize_state: op(operands, destination, registers, finalize_state)
     elif isinstance(literals, CastInstruction):
-        operands = literals.operands
-        destination = literals.destination
+        cast_operands = literals.operands
+        cast_destination = literals.destination
         cast_type = literals.cast_type
-        cast_op(operands, destination, cast_type, program, registers, finalize_state)
-    elif isinstance(literals, CallInstruction):
-        raise NotImplementedError
+        return lambda registers, finalize_state: cast_op(cast_operands, cast_destination, cast_type, program, registers, finalize_state)
     elif isinstance(literals, AssertInstruction):
+        assert_operands = literals.operands
         variant = literals.variant
         if variant == 0:
-            assert_eq(literals.operands, registers, finalize_state)
+            return lambda registers, finalize_state: assert_eq(assert_operands, registers, finalize_state)
         elif variant == 1:
-            assert_neq(literals.operands, registers, finalize_state)
-        else:
-            raise NotImplementedError
+            return lambda registers, finalize_state: assert_neq(assert_operands, registers, finalize_state)
     elif isinstance(literals, HashInstruction):
-        type_ = literals.type
-        hash_op(literals.operands, literals.destination, literals.destination_type, registers, finalize_state, type_)
+        hash_literals = literals
+        return lambda registers, finalize_state: hash_op(
+            hash_literals.operands, hash_literals.destination, hash_literals.destination_type, registers,
+            finalize_state, hash_literals.type
+        )
     elif isinstance(literals, CommitInstruction):
-        type_ = literals.type
-        commit_op(literals.operands, literals.destination, literals.destination_type, registers, finalize_state, type_)
-    else:
+        commit_literals = literals
+        return lambda registers, finalize_state: commit_op(
+            commit_literals.operands, commit_literals.destination, commit_literals.destination_type, registers,
+            finalize_state, commit_literals.type
+        )
+
+    # only fails when actually reached, same as before compiling
+    def unsupported(registers: Registers, finalize_state: FinalizeState):
         raise NotImplementedError
+    return unsupported
 
 
 def abs_(operands: list[Operand], destination: Register, registers: Registers, finalize_state: FinalizeState):
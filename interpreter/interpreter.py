@@ -1,10 +1,15 @@
+import asyncio
+import os
+import traceback
+
 import psycopg
 
 from aleo_types import *
 from db import Database
+from db.mapping import MappingWriter
 from interpreter.finalizer import execute_finalizer, ExecuteError, mapping_cache_read, profile
 from interpreter.utils import FinalizeState
-from util.global_cache import global_mapping_cache, global_program_cache, MappingCacheDict, get_program
+from util.global_cache import global_mapping_cache, MappingCacheDict, MappingKeyCache, MappingCacheOverlay, get_program
 
 
 async def init_builtin_program(db: Database, program: Program):
@@ -14,9 +19,9 @@ async def init_builtin_program(db: Database, program: Program):
         if await db.get_program(str(program.id)) is None:
             await db.save_builtin_program(program)
 
-async def _execute_public_fee(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], finalize_state: FinalizeState,
-                              fee_transition: Transition, mapping_cache: dict[Field, MappingCacheDict],
-                              local_mapping_cache: dict[Field, MappingCacheDict], allow_state_change: bool
+async def _execute_public_fee(db: Database, cur: Optional[psycopg.AsyncCursor[dict[str, Any]]], finalize_state: FinalizeState,
+                              fee_transition: Transition, mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache],
+                              local_mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache], allow_state_change: bool
                               ) -> list[dict[str, Any]]:
     if fee_transition.program_id != "credits.aleo" or fee_transition.function_name != "fee_public":
         raise TypeError("not a fee transition")
@@ -35,7 +40,7 @@ async def _execute_public_fee(db: Database, cur: psycopg.AsyncCursor[dict[str, A
                                    mapping_cache, local_mapping_cache, allow_state_change)
 
 async def finalize_deploy(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], finalize_state: FinalizeState,
-                          confirmed_transaction: ConfirmedTransaction, mapping_cache: dict[Field, MappingCacheDict]
+                          confirmed_transaction: ConfirmedTransaction, mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache]
                           ) -> tuple[list[FinalizeOperation], list[dict[str, Any]], Optional[str]]:
     transaction = confirmed_transaction.transaction
     if isinstance(transaction, (DeployTransaction, FeeTransaction)):
@@ -77,8 +82,8 @@ def load_input_from_arguments(arguments: list[Argument]) -> list[Value]:
     return inputs
 
 @profile
-async def finalize_execute(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], finalize_state: FinalizeState,
-                           confirmed_transaction: ConfirmedTransaction, mapping_cache: dict[Field, MappingCacheDict]
+async def finalize_execute(db: Database, cur: Optional[psycopg.AsyncCursor[dict[str, Any]]], finalize_state: FinalizeState,
+                           confirmed_transaction: ConfirmedTransaction, mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache]
                            ) -> tuple[list[FinalizeOperation], list[dict[str, Any]], Optional[str]]:
     expected_operations = list(confirmed_transaction.finalize)
     if isinstance(confirmed_transaction, AcceptedExecute):
@@ -148,19 +153,119 @@ async def finalize_execute(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]
             operations.extend(await _execute_public_fee(db, cur, finalize_state, transition, mapping_cache, local_mapping_cache, True))
     return expected_operations, operations, reject_reason
 
+FinalizeResult = tuple[list[FinalizeOperation], list[dict[str, Any]], Optional[str]]
+
+async def finalize_transaction(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], finalize_state: FinalizeState,
+                               confirmed_transaction: ConfirmedTransaction,
+                               mapping_cache: dict[Field, MappingCacheDict | MappingKeyCache]) -> FinalizeResult:
+    CTType = ConfirmedTransaction.Type
+    if confirmed_transaction.type in [CTType.AcceptedDeploy, CTType.RejectedDeploy]:
+        return await finalize_deploy(db, cur, finalize_state, confirmed_transaction, mapping_cache)
+    elif confirmed_transaction.type in [CTType.AcceptedExecute, CTType.RejectedExecute]:
+        return await finalize_execute(db, cur, finalize_state, confirmed_transaction, mapping_cache)
+    else:
+        raise NotImplementedError
+
+
+class SpeculativeFinalizeStats:
+    report_interval = 1000
+
+    def __init__(self):
+        self.blocks = 0
+        self.speculated = 0
+        self.conflicts = 0
+        self.errors = 0
+
+    @property
+    def conflict_rate(self) -> float:
+        if self.speculated == 0:
+            return 0
+        return self.conflicts / self.speculated
+
+    def add_block(self, speculated: int, conflicts: int, errors: int):
+        self.blocks += 1
+        self.speculated += speculated
+        self.conflicts += conflicts
+        self.errors += errors
+        if os.environ.get("DEBUG") or self.blocks % self.report_interval == 0:
+            print(f"speculative finalize: {conflicts}/{speculated} re-executed in this block, "
+                  f"{self.conflicts}/{self.speculated} ({self.conflict_rate:.2%}) over {self.blocks} blocks, "
+                  f"{self.errors} speculative runs failed")
+
+
+speculative_finalize_stats = SpeculativeFinalizeStats()
+
+async def speculative_finalize(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], finalize_state: FinalizeState,
+                               transactions: list[ConfirmedTransaction], workers: int) -> list[FinalizeResult]:
+    """
+    Finalizes all executions of a block concurrently against the mapping cache as it was before the block, each in
+    its own overlay that records the keys it read. Results are then committed in block order; a transaction whose
+    read set was written by an earlier one (and every deploy) is finalized again on top of the committed state, so
+    the outcome is the same as finalizing the block one transaction at a time.
+
+    Speculative runs read missing keys through the pool instead of the block cursor, which is fine as mapping
+    writes are only flushed to the database after the whole block is finalized.
+    """
+    semaphore = asyncio.Semaphore(workers)
+    errors = 0
+    execute_types = [ConfirmedTransaction.Type.AcceptedExecute, ConfirmedTransaction.Type.RejectedExecute]
+
+    async def speculate(confirmed_transaction: ConfirmedTransaction) -> Optional[tuple[MappingCacheOverlay, FinalizeResult]]:
+        if confirmed_transaction.type not in execute_types:
+            return None
+        overlay = MappingCacheOverlay(global_mapping_cache)
+        async with semaphore:
+            try:
+                result = await finalize_execute(db, None, finalize_state, confirmed_transaction, overlay)
+            except Exception:
+                # the pre-block state may have sent the run down a path the in-order one won't take, so it is
+                # re-executed and raises there if the error is real
+                print(f"speculative finalize of {confirmed_transaction.transaction.id} failed, re-executing in order:")
+                traceback.print_exc()
+                nonlocal errors
+                errors += 1
+                return None
+        return overlay, result
+
+    speculations = await asyncio.gather(*[speculate(ct) for ct in transactions])
+
+    results: list[FinalizeResult] = []
+    written: set[tuple[Field, Field]] = set()
+    speculated = 0
+    conflicts = 0
+    for confirmed_transaction, speculation in zip(transactions, speculations):
+        if speculation is not None:
+            speculated += 1
+            if not speculation[0].reads.isdisjoint(written):
+                conflicts += 1
+                speculation = None
+        if speculation is None:
+            overlay = MappingCacheOverlay(global_mapping_cache)
+            result = await finalize_transaction(db, cur, finalize_state, confirmed_transaction, overlay)
+        else:
+            overlay, result = speculation
+        written.update(overlay.commit())
+        results.append(result)
+    speculative_finalize_stats.add_block(speculated, conflicts, errors)
+    return results
+
 @profile
-async def finalize_block(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], block: Block) -> list[Optional[str]]:
+async def finalize_block(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], mapping_writer: MappingWriter,
+                         block: Block) -> list[Optional[str]]:
     finalize_state = FinalizeState(block)
     reject_reasons: list[Optional[str]] = []
-    for confirmed_transaction in block.transactions.transactions:
-        confirmed_transaction: ConfirmedTransaction
-        CTType = ConfirmedTransaction.Type
-        if confirmed_transaction.type in [CTType.AcceptedDeploy, CTType.RejectedDeploy]:
-            expected_operations, operations, reject_reason = await finalize_deploy(db, cur, finalize_state, confirmed_transaction, global_mapping_cache)
-        elif confirmed_transaction.type in [CTType.AcceptedExecute, CTType.RejectedExecute]:
-            expected_operations, operations, reject_reason = await finalize_execute(db, cur, finalize_state, confirmed_transaction, global_mapping_cache)
+    transactions: list[ConfirmedTransaction] = list(block.transactions.transactions)
+    workers = int(os.environ.get("FINALIZE_SPECULATIVE_WORKERS", 0))
+    results: Optional[list[FinalizeResult]] = None
+    if workers > 0 and len(transactions) > 1:
+        results = await speculative_finalize(db, cur, finalize_state, transactions, workers)
+    for index, confirmed_transaction in enumerate(transactions):
+        if results is not None:
+            expected_operations, operations, reject_reason = results[index]
         else:
-            raise NotImplementedError
+            expected_operations, operations, reject_reason = await finalize_transaction(
+                db, cur, finalize_state, confirmed_transaction, global_mapping_cache
+            )
 
         if len(expected_operations) != len(operations):
             print("expected:", expected_operations)
@@ -191,12 +296,13 @@ async def finalize_block(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]],
                 global_mapping_cache.clear()
                 raise
 
-        await execute_operations(db, cur, operations)
+        await execute_operations(db, cur, mapping_writer, operations)
         reject_reasons.append(reject_reason)
     return reject_reasons
 
 
-async def execute_operations(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], operations: list[dict[str, Any]]):
+async def execute_operations(db: Database, cur: psycopg.AsyncCursor[dict[str, Any]], mapping_writer: MappingWriter,
+                             operations: list[dict[str, Any]]):
     for operation in operations:
         match operation["type"]:
             case FinalizeOperation.Type.InitializeMapping:
@@ -213,7 +319,7 @@ async def execute_operations(db: Database, cur: psycopg.AsyncCursor[dict[str, An
                 program_name = operation["program_name"]
                 mapping_name = operation["mapping_name"]
                 from_transaction = operation["from_transaction"]
-                await db.update_mapping_key_value(cur, program_name, mapping_name, str(mapping_id), str(key_id), str(value_id), key.dump(), value.dump(), operation["height"], from_transaction)
+                await db.update_mapping_key_value(mapping_writer, program_name, mapping_name, str(mapping_id), str(key_id), str(value_id), key.dump(), value.dump(), operation["height"], from_transaction)
             case FinalizeOperation.Type.RemoveKeyValue:
                 mapping_id = operation["mapping_id"]
                 key_id = operation["key_id"]
@@ -222,7 +328,7 @@ async def execute_operations(db: Database, cur: psycopg.AsyncCursor[dict[str, An
                 mapping_name = operation["mapping_name"]
                 from_transaction = operation["from_transaction"]
                 height = operation["height"]
-                await db.remove_mapping_key_value(cur, program_name, mapping_name, str(mapping_id), str(key_id), key.dump(), height, from_transaction)
+                await db.remove_mapping_key_value(mapping_writer, program_name, mapping_name, str(mapping_id), str(key_id), key.dump(), height, from_transaction)
             case _:
                 raise NotImplementedError
 
@@ -230,25 +336,26 @@ async def get_mapping_value(db: Database, program_id: str, mapping_name: str, ke
     # where was this used?
     mapping_id = Field.loads(cached_get_mapping_id(program_id, mapping_name))
     if mapping_id not in global_mapping_cache:
-        global_mapping_cache[mapping_id] = await mapping_cache_read(db, program_id, mapping_name)
-    if str(program_id) in global_program_cache:
-        program = global_program_cache[str(program_id)]
-    else:
-        program_bytes = await db.get_program(str(program_id))
-        if program_bytes is None:
-            raise RuntimeError("program not found")
-        program = Program.load(BytesIO(program_bytes))
-        global_program_cache[str(program_id)] = program
+        if program_id == "credits.aleo" and mapping_name in ["committee", "bonded", "delegated"]:
+            global_mapping_cache[mapping_id] = await mapping_cache_read(db, program_id, mapping_name)
+        else:
+            global_mapping_cache.key_cache(program_id, mapping_name, mapping_id)
+    program = await get_program(db, str(program_id))
+    if program is None:
+        raise RuntimeError("program not found")
     mapping = program.mappings[Identifier(value=mapping_name)]
     mapping_key_type = mapping.key.plaintext_type
     if not isinstance(mapping_key_type, LiteralPlaintextType):
         raise TypeError("unsupported key type")
     key_plaintext = LiteralPlaintext(literal=Literal.loads(Literal.Type(mapping_key_type.literal_type.value), key))
     key_id = Field.loads(cached_get_key_id(program_id, mapping_name, key_plaintext.dump()))
-    if key_id not in global_mapping_cache[mapping_id]:
+    cache = global_mapping_cache[mapping_id]
+    if isinstance(cache, MappingKeyCache):
+        await cache.load(db, None, [key_id])
+    if key_id not in cache:
         raise ExecuteError(f"key {key} not found in mapping {mapping_id}", None, "", )
     else:
-        value = global_mapping_cache[mapping_id][key_id]["value"]
+        value = cache[key_id]["value"]
         if not isinstance(value, PlaintextValue):
             raise TypeError("invalid value type")
     return value
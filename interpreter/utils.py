@@ -87,6 +87,33 @@ def load_plaintext_from_operand(operand: Operand, registers: Registers, finalize
     else:
         raise NotImplementedError
 
+OperandLoader = Callable[[Registers, FinalizeState], Plaintext]
+
+def compile_operand(operand: Operand) -> OperandLoader:
+    """Resolves what can be resolved about an operand ahead of execution, see load_plaintext_from_operand"""
+    if isinstance(operand, LiteralOperand):
+        literal_plaintext = LiteralPlaintext(literal=operand.literal)
+        return lambda registers, finalize_state: literal_plaintext
+    elif isinstance(operand, RegisterOperand) and isinstance(operand.register, LocatorRegister):
+        index = int(operand.register.locator)
+        def load_register(registers: Registers, finalize_state: FinalizeState) -> Plaintext:
+            value = registers[index]
+            if not isinstance(value, PlaintextValue):
+                raise TypeError("register is not plaintext")
+            return value.plaintext
+        return load_register
+    elif isinstance(operand, BlockHeightOperand):
+        return lambda registers, finalize_state: LiteralPlaintext(
+            literal=Literal(
+                type_=Literal.Type.U32,
+                primitive=finalize_state.block_height
+            )
+        )
+    elif isinstance(operand, (ProgramIDOperand, NetworkIDOperand)):
+        constant = load_plaintext_from_operand(operand, Registers(), cast(FinalizeState, None))
+        return lambda registers, finalize_state: constant
+    return lambda registers, finalize_state: load_plaintext_from_operand(operand, registers, finalize_state)
+
 def load_future_from_operand(operand: Operand, registers: Registers, finalize_state: FinalizeState) -> Future:
     if not isinstance(operand, RegisterOperand):
         raise ValueError("operand is not register")
@@ -0,0 +1,113 @@
+"""
+Exports every (key, value) of a mapping, or of all mappings, as of a block height.
+
+    python mapping_snapshot.py HEIGHT [--program credits.aleo] [--mapping account] [--format binary|jsonl] [-o FILE]
+
+The binary format is a header of b"ALEOMAPS", u32 format version and u32 height, followed by one record per key:
+program id, mapping name, key and value, each prefixed with its u32 length. All integers are little endian; keys
+and values are the snarkVM serialized Plaintext and Value, so nothing has to be decoded to produce it. jsonl decodes
+them to their string form in a pool of worker processes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, BinaryIO
+
+from dotenv import load_dotenv
+
+from aleo_types import Plaintext, Value
+from db import Database
+from util.set_proc_title import set_proc_title
+
+load_dotenv()
+
+SNAPSHOT_MAGIC = b"ALEOMAPS"
+SNAPSHOT_VERSION = 1
+
+
+def encode_binary(rows: list[tuple[str, str, bytes, bytes]]) -> bytes:
+    res = bytearray()
+    for row in rows:
+        for field in (row[0].encode(), row[1].encode(), row[2], row[3]):
+            res += struct.pack("<I", len(field))
+            res += field
+    return bytes(res)
+
+def init_decoder():
+    set_proc_title("aleo-explorer: snapshot decoder")
+
+def encode_jsonl(rows: list[tuple[str, str, bytes, bytes]]) -> bytes:
+    lines: list[str] = []
+    for program_id, mapping, key, value in rows:
+        lines.append(json.dumps({
+            "program_id": program_id,
+            "mapping": mapping,
+            "key": str(Plaintext.load(BytesIO(key))),
+            "value": str(Value.load(BytesIO(value))),
+        }) + "\n")
+    return "".join(lines).encode()
+
+
+async def export(db: Database, out: BinaryIO, height: int, program_id: str | None, mapping: str | None,
+                 fmt: str, workers: int):
+    count = 0
+    if fmt == "binary":
+        # only length prefixes are added, shipping the batches to other processes would cost more than that
+        out.write(SNAPSHOT_MAGIC + struct.pack("<II", SNAPSHOT_VERSION, height))
+        async for rows in db.get_mapping_snapshot(height, program_id, mapping):
+            out.write(encode_binary([(r["program_id"], r["mapping"], bytes(r["key"]), bytes(r["value"])) for r in rows]))
+            count += len(rows)
+    else:
+        loop = asyncio.get_running_loop()
+        # batches are decoded while the next ones are fetched, and written out in cursor order
+        pending: list[asyncio.Future[bytes]] = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_decoder) as pool:
+            async for rows in db.get_mapping_snapshot(height, program_id, mapping):
+                batch = [(r["program_id"], r["mapping"], bytes(r["key"]), bytes(r["value"])) for r in rows]
+                pending.append(loop.run_in_executor(pool, encode_jsonl, batch))
+                count += len(batch)
+                if len(pending) > workers:
+                    out.write(await pending.pop(0))
+            for task in pending:
+                out.write(await task)
+    out.flush()
+    print(f"exported {count} keys at height {height}", file=sys.stderr)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export mapping values as of a block height")
+    parser.add_argument("height", type=int)
+    parser.add_argument("--program", help="program id, all programs if omitted")
+    parser.add_argument("--mapping", help="mapping name, all mappings of the program if omitted")
+    parser.add_argument("--format", choices=["binary", "jsonl"], default="binary")
+    parser.add_argument("-o", "--output", help="output file, stdout if omitted")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SNAPSHOT_WORKERS", 4)),
+                        help="decoder processes for --format jsonl")
+    args = parser.parse_args()
+    if args.mapping is not None and args.program is None:
+        parser.error("--mapping requires --program")
+
+    async def noop(_: Any): pass
+
+    db = Database(server=os.environ["DB_HOST"], user=os.environ["DB_USER"], password=os.environ["DB_PASS"],
+                  database=os.environ["DB_DATABASE"], schema=os.environ["DB_SCHEMA"],
+                  redis_server=os.environ["REDIS_HOST"], redis_port=int(os.environ["REDIS_PORT"]),
+                  redis_db=int(os.environ["REDIS_DB"]), redis_user=os.environ.get("REDIS_USER"),
+                  redis_password=os.environ.get("REDIS_PASS"),
+                  message_callback=noop)
+    await db.connect()
+    set_proc_title("aleo-explorer: mapping snapshot")
+    if args.output is None:
+        await export(db, sys.stdout.buffer, args.height, args.program, args.mapping, args.format, args.workers)
+    else:
+        with open(args.output, "wb") as out:
+            await export(db, out, args.height, args.program, args.mapping, args.format, args.workers)
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,6 +1,7 @@
-from starlette.requests import Request
+from starlette.requests import HTTPConnection
 from starlette.responses import JSONResponse
 from starlette.types import ASGIApp, Scope, Receive, Send
+from starlette.websockets import WebSocket
 
 
 class APIFilterMiddleware:
@@ -10,8 +11,12 @@ class APIFilterMiddleware:
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] not in ["http", "websocket"]:
             return await self.app(scope, receive, send)
-        request = Request(scope)
-        if request.headers.get("user-agent", "") == "":
-            response = JSONResponse({"error": "You must provide a sensible user agent to use this API."}, status_code=403)
+        connection = HTTPConnection(scope)
+        if connection.headers.get("user-agent", "") == "":
+            error = "You must provide a sensible user agent to use this API."
+            # a websocket handshake can only be refused by closing it
+            if scope["type"] == "websocket":
+                return await WebSocket(scope, receive, send).close(code=1008, reason=error)
+            response = JSONResponse({"error": error}, status_code=403)
             return await response(scope, receive, send)
         await self.app(scope, receive, send)
\ No newline at end of file
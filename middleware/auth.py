@@ -1,5 +1,6 @@
 from starlette.responses import Response
 from starlette.types import ASGIApp, Scope, Receive, Send
+from starlette.websockets import WebSocket
 
 
 class AuthMiddleware:
@@ -11,5 +12,7 @@ class AuthMiddleware:
         if scope["type"] not in ["http", "websocket"]:
             return await self.app(scope, receive, send)
         if dict(scope["headers"]).get(b"authorization", b"").decode() != f"Token {self.token}":
+            if scope["type"] == "websocket":
+                return await WebSocket(scope, receive, send).close(code=1008)
             return await Response(status_code=401)(scope, receive, send)
         await self.app(scope, receive, send)
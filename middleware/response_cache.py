@@ -0,0 +1,136 @@
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from util.chain_tip import chain_tip
+
+
+class CachedResponse:
+    __slots__ = ("status", "headers", "body", "expires", "immutable", "size")
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes, expires: float, immutable: bool):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+        self.immutable = immutable
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers)
+
+
+class ResponseCacheMiddleware:
+    """
+    In-process cache of GET responses, keyed by path, sorted query string and whether it's an htmx request.
+
+    What gets cached is decided by the Cache-Control header the route sets: `max-age` is the time to live, `immutable`
+    entries (historical blocks) never expire and everything else is dropped as soon as the chain tip moves. Responses
+    without Cache-Control are cached for `default_ttl` seconds, 0 turns that off. When placed outside MinifyMiddleware
+    the stored bodies are already minified.
+    """
+
+    # per-request headers that must not be replayed from the cache
+    skipped_headers = {b"server-timing", b"date"}
+    # seconds since the last block after which pages show the out of sync banner, as in webui out_of_sync_check
+    out_of_sync_after = 120
+
+    def __init__(self, app: ASGIApp, *, default_ttl: int = 0) -> None:
+        self.app = app
+        self.default_ttl = default_ttl
+        self.max_size = int(os.environ.get("RESPONSE_CACHE_SIZE_MB", 128)) * 1024 * 1024
+        self.size = 0
+        self.entries: OrderedDict[tuple[str, str, bool], CachedResponse] = OrderedDict()
+        # keys of entries that have to go when the next block lands
+        self.tip_keys: set[tuple[str, str, bool]] = set()
+        self.height = 0
+        chain_tip.on_block_added(self.block_added)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or self.max_size == 0 or os.environ.get("DEBUG"):
+            return await self.app(scope, receive, send)
+        # without the block added subscription entries can't be invalidated, so nothing is served or stored. Out of
+        # sync pages carry the banner with live heights, and cached in sync pages would hide it.
+        if not chain_tip.listening or time.time() - chain_tip.timestamp > self.out_of_sync_after:
+            return await self.app(scope, receive, send)
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = (scope["path"], query, b"hx-request" in dict(scope["headers"]))
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.immutable or entry.expires > time.monotonic():
+                self.entries.move_to_end(key)
+                await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers})
+                await send({"type": "http.response.body", "body": entry.body})
+                return
+            self._remove(key)
+
+        height = self.height
+        start_message: Message = {}
+        body: list[bytes] = []
+
+        async def cache_send(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self._store(key, height, start_message, b"".join(body))
+            await send(message)
+
+        await self.app(scope, receive, cache_send)
+
+    def _store(self, key: tuple[str, str, bool], height: int, start_message: Message, body: bytes):
+        if start_message.get("status") != 200 or start_message.get("trailers", False):
+            return
+        # a block landed while the response was rendered, it may already be stale
+        if height != self.height:
+            return
+        headers = Headers(raw=start_message["headers"])
+        if "set-cookie" in headers:
+            return
+        directives = [d.strip().lower() for d in headers.get("cache-control", "").split(",") if d.strip()]
+        if not directives:
+            ttl = self.default_ttl
+        elif "public" not in directives or "no-cache" in directives or "no-store" in directives:
+            return
+        else:
+            ttl = 0
+            for directive in directives:
+                if directive.startswith("max-age="):
+                    try:
+                        ttl = int(directive[8:])
+                    except ValueError:
+                        return
+        immutable = "immutable" in directives
+        if ttl <= 0 and not immutable:
+            return
+        entry = CachedResponse(
+            start_message["status"],
+            [(k, v) for k, v in start_message["headers"] if k.lower() not in self.skipped_headers],
+            body, time.monotonic() + ttl, immutable
+        )
+        if entry.size > self.max_size // 16:
+            return
+        self._remove(key)
+        self.entries[key] = entry
+        self.size += entry.size
+        if not immutable:
+            self.tip_keys.add(key)
+        while self.size > self.max_size and self.entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: tuple[str, str, bool]):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+        self.tip_keys.discard(key)
+
+    def block_added(self, height: int):
+        # a lower tip means blocks were reverted, even immutable pages may show blocks that are gone
+        keys = list(self.entries if height < self.height else self.tip_keys)
+        self.height = height
+        for key in keys:
+            self._remove(key)
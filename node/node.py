@@ -1,14 +1,19 @@
 import asyncio
+import multiprocessing
 import os
+import pickle
 import random
 import time
 import traceback
 from asyncio import StreamReader, StreamWriter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Awaitable
 
 import explorer.types as explorer
 from aleo_types import *  # too many types
 # from .light_node import LightNodeState
+from util.set_proc_title import set_proc_title
 from . import Network
 
 # Do not open PR about this value.
@@ -17,6 +22,20 @@ from . import Network
 # If you don't agree with this, change this on your own end.
 PING_SLEEP_IN_SECS = 3
 
+# Frames smaller than this are decoded on the event loop, shipping them to a decoder process costs more than it saves.
+INLINE_DECODE_MAX_FRAME_SIZE = 64 * 1024
+
+
+def init_decoder():
+    set_proc_title("aleo-explorer: decoder")
+
+def decode_frame(data: bytes) -> bytes:
+    frame = Frame.load(BytesIO(data))
+    # Data payloads decode lazily, make sure the blocks are decoded here and not on the event loop
+    if isinstance(frame.message, BlockResponse):
+        _ = frame.message.blocks.value
+    return GenericPickler.dumps(frame)
+
 
 class Node:
     def __init__(self, explorer_message: Callable[[explorer.Message], Awaitable[None]], explorer_request: Callable[[explorer.ExplorerRequest], Awaitable[Any]]):
@@ -39,6 +58,17 @@ class Node:
         self.block_requests_deadline = float('inf')
         self.ping_task = None
         self.is_syncing = False
+        self.sync_lock = asyncio.Lock()
+        # pipelined sync: blocks received out of order wait here until the consumer reaches their height
+        self.block_buffer: dict[int, Block] = {}
+        self.block_buffer_event = asyncio.Event()
+        self.next_request_height = 0
+        self.next_process_height = 0
+        self.block_consumer_task: Optional[asyncio.Task[None]] = None
+        self.sync_stats_time = 0.0
+        # large frames (block responses) are decoded in worker processes, several at a time
+        self.decode_workers = int(os.environ.get("P2P_DECODE_WORKERS", 2))
+        self.decode_pool: Optional[ProcessPoolExecutor] = None
         # self.light_node_state = light_node_state
 
     async def connect(self, ip: str, port: int):
@@ -67,23 +97,61 @@ class Node:
                 nonce=self.nonce,
             )
             await self.send_message(challenge_request)
-            while True:
-                try:
-                    size = await self.reader.readexactly(4)
-                except:
-                    raise Exception("connection closed")
-                size = int.from_bytes(size, byteorder="little")
-                try:
-                    frame = await self.reader.readexactly(size)
-                except:
-                    raise Exception("connection closed")
-                await self.parse_message(Frame.load(BytesIO(frame)))
+            # frames are decoded concurrently but handled strictly in the order they arrived
+            frames: asyncio.Queue[Optional[asyncio.Task[Frame]]] = asyncio.Queue(maxsize=max(self.decode_workers, 1) * 2)
+            reader_task = asyncio.create_task(self.frame_reader(frames))
+            try:
+                while True:
+                    decode_task = await frames.get()
+                    if decode_task is None:
+                        raise Exception("connection closed")
+                    await self.parse_message(await decode_task)
+            finally:
+                reader_task.cancel()
+                while not frames.empty():
+                    decode_task = frames.get_nowait()
+                    if decode_task is not None:
+                        decode_task.cancel()
         except Exception:
             traceback.print_exc()
             await self.explorer_message(explorer.Message(explorer.Message.Type.NodeDisconnected, None))
             await self.close()
             return
 
+    async def frame_reader(self, frames: asyncio.Queue[Optional[asyncio.Task[Frame]]]):
+        if self.reader is None:
+            raise Exception("connection is not established")
+        try:
+            while True:
+                size = await self.reader.readexactly(4)
+                size = int.from_bytes(size, byteorder="little")
+                frame = await self.reader.readexactly(size)
+                await frames.put(asyncio.create_task(self.decode_frame(frame)))
+        except (asyncio.IncompleteReadError, OSError):
+            await frames.put(None)
+        except Exception:
+            # anything else is a bug, but the worker still has to learn that no more frames are coming
+            traceback.print_exc()
+            await frames.put(None)
+
+    async def decode_frame(self, data: bytes) -> Frame:
+        if self.decode_workers <= 0 or len(data) < INLINE_DECODE_MAX_FRAME_SIZE:
+            return Frame.load(BytesIO(data))
+        if self.decode_pool is None:
+            # forking now would copy the event loop, the database pool threads and open sockets into the decoders
+            self.decode_pool = ProcessPoolExecutor(
+                max_workers=self.decode_workers, initializer=init_decoder,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        try:
+            res = await asyncio.get_running_loop().run_in_executor(self.decode_pool, decode_frame, data)
+        except BrokenProcessPool:
+            # a decoder process died, start over with a fresh pool on the next frame
+            self.decode_pool.shutdown(wait=False)
+            self.decode_pool = None
+            raise
+        return pickle.loads(res)
+
     async def parse_message(self, frame: Frame):
         if isinstance(frame.message, BlockRequest):
             if self.handshake_state != 1:
@@ -101,15 +169,19 @@ class Node:
             if self.handshake_state != 1:
                 raise Exception("handshake is not done")
             msg = frame.message
+            # decoded in full here (or by a decoder process), the consumer inserts every block of the response
             for block in msg.blocks.value:
                 height = block.header.metadata.height
                 if height in self.block_requests:
                     self.block_requests.remove(height)
-                    await self.explorer_request(explorer.Request.ProcessBlock(block))
-            if not self.block_requests:
-                self.is_syncing = False
+                    if height >= self.next_process_height:
+                        self.block_buffer[height] = block
+            if self.block_buffer:
+                self.block_buffer_event.set()
+            if self.block_requests:
+                self.block_requests_deadline = time.time() + 30
+            else:
                 self.block_requests_deadline = float('inf')
-                self.is_fork = False
             await self._sync()
 
         elif isinstance(frame.message, ChallengeRequest):
@@ -139,6 +211,7 @@ class Node:
                     await self.send_ping()
 
             self.ping_task = asyncio.create_task(ping_task())
+            self.block_consumer_task = asyncio.create_task(self.block_consumer())
 
         elif isinstance(frame.message, ChallengeResponse):
             if self.handshake_state != 0:
@@ -203,7 +276,7 @@ class Node:
                 is_fork=Option[bool_](is_fork),
             )
             await self.send_message(pong)
-            if not self.is_syncing:
+            if not self.is_syncing or self.block_requests_deadline < time.time():
                 await self._sync()
 
         elif isinstance(frame.message, Pong):
@@ -230,36 +303,79 @@ class Node:
         else:
             print("unhandled message type:", frame.message.type)
 
+    async def block_consumer(self):
+        try:
+            while True:
+                await self.block_buffer_event.wait()
+                self.block_buffer_event.clear()
+                while self.next_process_height in self.block_buffer:
+                    height = self.next_process_height
+                    block = self.block_buffer.pop(height)
+                    await self.explorer_request(explorer.Request.ProcessBlock(block))
+                    self.next_process_height = height + 1
+                    # freed a slot in the reorder buffer, ask for more while this one is fresh
+                    await self._sync()
+                if self.is_syncing and not self.block_requests and not self.block_buffer:
+                    self.is_syncing = False
+                    self.is_fork = False
+                    await self._sync()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            traceback.print_exc()
+            # only the worker reconnects: closing the connection fails its read and it runs close() from there
+            if self.writer is not None and not self.writer.is_closing():
+                self.writer.close()
+
     async def _sync(self):
-        batch_size = int(os.environ.get("P2P_BLOCK_BATCH_SIZE", 1))
-        if self.block_requests_deadline < time.time():
-            self.block_requests.clear()
-            self.block_requests_deadline = float("inf")
-            self.is_syncing = False
-        locators = self.peer_block_locators
-        if locators is None:
-            return
-        recents = locators.recents
-        self.peer_block_height = max(recents.keys())
-        if self.is_syncing:
-            next_block = self.block_requests[0]
-            self.block_requests_deadline = time.time() + 30
-            msg = BlockRequest(start_height=u32(next_block), end_height=u32(min(max(self.block_requests) + 1, next_block + batch_size)))
-            await self.send_message(msg)
-        else:
-            latest_height = await self.explorer_request(explorer.Request.GetLatestHeight())
-            if latest_height >= self.peer_block_height:
+        # called from the message handlers and the block consumer, the height checks must not interleave
+        async with self.sync_lock:
+            batch_size = int(os.environ.get("P2P_BLOCK_BATCH_SIZE", 1))
+            window_size = int(os.environ.get("P2P_BLOCK_REQUEST_WINDOW", 8))
+            if self.block_requests_deadline < time.time():
+                # drop the outstanding ranges and request them again from the first missing height
+                self.block_requests.clear()
+                self.block_requests_deadline = float("inf")
+                missing = self.next_process_height
+                while missing in self.block_buffer:
+                    missing += 1
+                for height in list(self.block_buffer.keys()):
+                    if height > missing:
+                        del self.block_buffer[height]
+                self.next_request_height = missing
+            locators = self.peer_block_locators
+            if locators is None:
                 return
-
-            start_block_height = latest_height + 1
-            end_block_height = min(self.peer_block_height + 1, start_block_height + batch_size)
-            print(f"Synchronizing from block {start_block_height} to {end_block_height}")
-            self.is_syncing = True
-
-            self.block_requests.extend(range(start_block_height, end_block_height))
-            self.block_requests_deadline = time.time() + 30
-            msg = BlockRequest(start_height=u32(start_block_height), end_height=u32(end_block_height))
-            await self.send_message(msg)
+            recents = locators.recents
+            self.peer_block_height = max(recents.keys())
+            if not self.is_syncing:
+                latest_height = await self.explorer_request(explorer.Request.GetLatestHeight())
+                if latest_height >= self.peer_block_height:
+                    return
+                print(f"Synchronizing from block {latest_height + 1} to {self.peer_block_height + 1}")
+                self.is_syncing = True
+                self.block_buffer.clear()
+                self.next_request_height = latest_height + 1
+                self.next_process_height = latest_height + 1
+
+            # the window counts both in-flight heights and buffered ones, which bounds the reorder buffer
+            max_pending = window_size * batch_size
+            while self.next_request_height <= self.peer_block_height:
+                pending = len(self.block_requests) + len(self.block_buffer)
+                if pending + batch_size > max_pending and pending > 0:
+                    break
+                start_block_height = self.next_request_height
+                end_block_height = min(self.peer_block_height + 1, start_block_height + batch_size)
+                self.block_requests.extend(range(start_block_height, end_block_height))
+                self.block_requests_deadline = time.time() + 30
+                self.next_request_height = end_block_height
+                msg = BlockRequest(start_height=u32(start_block_height), end_height=u32(end_block_height))
+                await self.send_message(msg)
+
+            if time.time() - self.sync_stats_time > 10:
+                self.sync_stats_time = time.time()
+                print(f"Sync window: {len(self.block_requests)} blocks in flight, {len(self.block_buffer)} buffered "
+                      f"(max {max_pending}), next block {self.next_process_height}")
 
     async def send_ping(self):
         ping = Ping(
@@ -302,7 +418,12 @@ class Node:
         self.block_requests = []
         self.block_requests_deadline = float('inf')
         self.is_syncing = False
+        self.block_buffer = {}
+        self.block_buffer_event.clear()
         if self.ping_task is not None:
             self.ping_task.cancel()
+        if self.block_consumer_task is not None and self.block_consumer_task is not asyncio.current_task():
+            self.block_consumer_task.cancel()
+        self.block_consumer_task = None
         await asyncio.sleep(5)
         self.worker_task = asyncio.create_task(self.worker(self.node_ip, self.node_port))
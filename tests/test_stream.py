@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, cast
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aleo_explorer_rust")
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.routing import WebSocketRoute
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from db import Database
+from middleware.api_filter import APIFilterMiddleware
+from util.stream import StreamClient, StreamHub
+
+
+class BlockRangeDatabase:
+    def __init__(self):
+        self.ranges: list[tuple[int, int]] = []
+
+    async def get_blocks_range_fast(self, start: int, end: int) -> list[dict[str, Any]]:
+        self.ranges.append((start, end))
+        return [{"height": height} for height in range(start, end, -1)]
+
+
+@pytest.fixture
+def hub(monkeypatch: pytest.MonkeyPatch) -> StreamHub:
+    async def listen(_: Database):
+        pass
+
+    hub = StreamHub()
+    monkeypatch.setattr(hub, "listen", listen)
+    return hub
+
+
+@pytest.fixture
+def client(hub: StreamHub, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(StreamClient, "keepalive", 0.05)
+    app = Starlette(
+        routes=[WebSocketRoute("/v{version:int}/stream", hub.websocket)],
+        middleware=[Middleware(APIFilterMiddleware)],
+    )
+    app.state.db = None
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_websocket_subscribe(hub: StreamHub, client: TestClient):
+    with client.websocket_connect("/v2/stream?topics=block", headers={"user-agent": "test"}):
+        assert [c.topics for c in hub.clients] == [{"block"}]
+    deadline = time.monotonic() + 5
+    while hub.clients and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not hub.clients
+
+
+def test_websocket_without_user_agent(client: TestClient):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/v2/stream", headers={"user-agent": ""}):
+            pass
+
+
+def test_websocket_unknown_topic(client: TestClient):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/v2/stream?topics=mapping", headers={"user-agent": "test"}):
+            pass
+
+
+def test_block_added_while_idle():
+    async def run():
+        hub = StreamHub()
+        db = BlockRangeDatabase()
+        await hub.block_added(cast(Database, db), 100)
+        assert db.ranges == []
+        hub.clients.add(StreamClient({"block"}))
+        await hub.block_added(cast(Database, db), 5000)
+        assert db.ranges == [(5000, 5000 - StreamHub.max_backfill)]
+
+    asyncio.run(run())
+
+
+def test_lagged_client_is_dropped():
+    hub = StreamHub()
+    client = StreamClient({"block"})
+    hub.clients.add(client)
+    for _ in range(StreamClient.max_pending + 1):
+        hub.broadcast("block", "{}")
+    assert client.lagged and client not in hub.clients
@@ -8,16 +8,17 @@ from aleo_types import Address, Field, StructPlaintext, Vec, Tuple, Identifier,
 from db import Database
 from node import Network
 from util.aleo_strings import string_to_u128_array_le, string_from_u128_array_le
-from util.global_cache import global_mapping_cache
+from util.global_cache import global_mapping_cache, MappingKeyCache
 
 
 async def _get_mapping_value(db: Database, program_id: str, mapping_name: str, key: Plaintext) -> Optional[Plaintext]:
     mapping_id = Field.loads(cached_get_mapping_id(program_id, mapping_name))
     key_id = Field.loads(cached_get_key_id(program_id, mapping_name, key.dump()))
-    if mapping_id in global_mapping_cache:
-        if key_id not in global_mapping_cache[mapping_id]:
+    cache = global_mapping_cache.get(mapping_id)
+    if cache is not None and (not isinstance(cache, MappingKeyCache) or cache.is_loaded(key_id)):
+        if key_id not in cache:
             return None
-        return global_mapping_cache[mapping_id][key_id]["value"]
+        return cache[key_id]["value"]
     data = await db.get_mapping_value(program_id, mapping_name, str(key_id))
     if data is None:
         return None
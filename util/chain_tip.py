@@ -0,0 +1,90 @@
+import asyncio
+import json
+from typing import Callable, Optional, Sequence
+
+from db import Database
+from util.global_cache import global_program_cache
+
+
+class ChainTip:
+    """
+    Height, hash and timestamp of the latest block, kept in memory by every web process. The explorer publishes each
+    saved block on the block added channel, along with the programs it deployed; reads only go to the database while
+    the subscription is down.
+    """
+
+    def __init__(self):
+        self.height = 0
+        self.block_hash = ""
+        self.timestamp = 0
+        self.listening = False
+        self.listener: Optional[asyncio.Task[None]] = None
+        self.callbacks: list[Callable[[int], None]] = []
+        self.program_callbacks: list[Callable[[str], None]] = []
+
+    @staticmethod
+    async def publish(db: Database, height: int, block_hash: str, timestamp: int, programs: Sequence[str] = ()):
+        await db.redis.publish(
+            db.block_added_channel,
+            json.dumps({"height": height, "block_hash": block_hash, "timestamp": timestamp, "programs": list(programs)})
+        )
+
+    def on_block_added(self, callback: Callable[[int], None]):
+        self.callbacks.append(callback)
+
+    def on_program_deployed(self, callback: Callable[[str], None]):
+        self.program_callbacks.append(callback)
+
+    def start(self, db: Database):
+        if self.listener is None:
+            self.listener = asyncio.create_task(self.listen(db))
+
+    async def get(self, db: Database) -> tuple[int, str, int]: # (height, block_hash, timestamp)
+        if self.listening:
+            return self.height, self.block_hash, self.timestamp
+        tip = await db.get_chain_tip()
+        if tip is None:
+            raise RuntimeError("no blocks in database")
+        return tip
+
+    async def get_height(self, db: Database) -> int:
+        return (await self.get(db))[0]
+
+    async def get_timestamp(self, db: Database) -> int:
+        return (await self.get(db))[2]
+
+    def _update(self, height: int, block_hash: str, timestamp: int, programs: Sequence[str] = ()):
+        self.height = height
+        self.block_hash = block_hash
+        self.timestamp = timestamp
+        for program_id in programs:
+            for program_callback in self.program_callbacks:
+                program_callback(program_id)
+        for callback in self.callbacks:
+            callback(height)
+
+    async def listen(self, db: Database):
+        while True:
+            try:
+                async with db.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(db.block_added_channel)
+                    # read after subscribing so a block landing in between isn't missed
+                    tip = await db.get_chain_tip()
+                    if tip is not None:
+                        self._update(*tip)
+                        self.listening = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            data = json.loads(message["data"])
+                            self._update(data["height"], data["block_hash"], data["timestamp"], data.get("programs", ()))
+                            self.listening = True
+            except Exception as e:
+                print("chain tip listener error:", e)
+            self.listening = False
+            await asyncio.sleep(5)
+
+
+chain_tip = ChainTip()
+# registered here as db imports util.global_cache, the cache can't import this module
+chain_tip.on_block_added(global_program_cache.block_added)
+chain_tip.on_program_deployed(global_program_cache.evict)
@@ -1,18 +1,294 @@
+import base64
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from redis.asyncio import Redis
 
 from aleo_types import *
 
+if TYPE_CHECKING:
+    # db imports this module
+    from db import Database
+    from db.base import RedisWriter
+
 MappingCacheDict = dict[Field, dict[str, Any]]
 
-global_mapping_cache: dict[Field, MappingCacheDict] = {}
-global_program_cache: dict[str, Program] = {}
 
-async def get_program(db: "Database", program_id: str) -> Program | None:
-    try:
-        return global_program_cache[program_id]
-    except KeyError:
-        program = await db.get_program(program_id)
-        if not program:
+class MappingKeyCache:
+    """
+    Read-through cache for the keys of a single mapping.
+
+    Keys have to be loaded with `load` before they are looked up; keys that were looked up but do not exist in the
+    mapping are remembered as None so repeated misses don't hit the database again.
+    """
+
+    # rough size of the python objects behind one decoded key/value pair, on top of the raw bytes
+    entry_overhead = 1024
+
+    def __init__(self, program_id: str, mapping: str, mapping_id: Field, owner: Optional["MappingCache"] = None):
+        self.program_id = program_id
+        self.mapping = mapping
+        self.mapping_id = mapping_id
+        self.owner = owner
+        self.entries: dict[Field, Optional[dict[str, Any]]] = {}
+
+    def __contains__(self, key_id: Field) -> bool:
+        return self.entries.get(key_id) is not None
+
+    def __getitem__(self, key_id: Field) -> dict[str, Any]:
+        entry = self.entries.get(key_id)
+        if entry is None:
+            raise KeyError(key_id)
+        if self.owner is not None:
+            self.owner.touch(self.mapping_id, key_id)
+        return entry
+
+    def __setitem__(self, key_id: Field, entry: dict[str, Any]):
+        self.entries[key_id] = entry
+        if self.owner is not None:
+            self.owner.touch(self.mapping_id, key_id)
+
+    def pop(self, key_id: Field) -> dict[str, Any]:
+        entry = self[key_id]
+        self.entries[key_id] = None
+        return entry
+
+    def is_loaded(self, key_id: Field) -> bool:
+        return key_id in self.entries
+
+    def evict(self, key_id: Field):
+        self.entries.pop(key_id, None)
+
+    async def load(self, db: "Database", cur: Optional[Any], key_ids: list[Field]):
+        missing = list(dict.fromkeys(k for k in key_ids if k not in self.entries))
+        if not missing:
+            return
+        if cur is not None:
+            data = await db.get_mapping_values_with_cur(cur, self.program_id, self.mapping, list(map(str, missing)))
+        else:
+            data = await db.get_mapping_values(self.program_id, self.mapping, list(map(str, missing)))
+        for key_id in missing:
+            raw = data.get(str(key_id))
+            if raw is None:
+                entry = None
+                size = self.entry_overhead
+            else:
+                entry = {
+                    "key": Plaintext.load(BytesIO(raw[0])),
+                    "value": Value.load(BytesIO(raw[1])),
+                }
+                size = self.entry_overhead + len(raw[0]) + len(raw[1])
+            self.entries[key_id] = entry
+            if self.owner is not None:
+                self.owner.touch(self.mapping_id, key_id, size)
+
+
+class MappingCache(dict[Field, MappingCacheDict | MappingKeyCache]):
+    """
+    Mapping id -> cached mapping. Small mappings (committee, bonded, delegated) are kept whole as plain dicts,
+    everything else is a MappingKeyCache whose keys share one LRU bounded by MAPPING_CACHE_SIZE_MB.
+    """
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+        self.size = 0
+        self.lru: OrderedDict[tuple[Field, Field], int] = OrderedDict()
+
+    def key_cache(self, program_id: str, mapping: str, mapping_id: Field) -> MappingKeyCache:
+        cache = self.get(mapping_id)
+        if isinstance(cache, MappingKeyCache):
+            return cache
+        cache = MappingKeyCache(program_id, mapping, mapping_id, self)
+        self[mapping_id] = cache
+        return cache
+
+    def touch(self, mapping_id: Field, key_id: Field, size: Optional[int] = None):
+        k = (mapping_id, key_id)
+        if k in self.lru:
+            self.lru.move_to_end(k)
+            if size is not None:
+                self.size += size - self.lru[k]
+                self.lru[k] = size
+        else:
+            if size is None:
+                size = MappingKeyCache.entry_overhead
+            self.lru[k] = size
+            self.size += size
+
+    def trim(self):
+        # only called between blocks, entries written earlier in a block must stay until its mapping writes are flushed
+        while self.size > self.max_size and self.lru:
+            (mapping_id, key_id), size = self.lru.popitem(last=False)
+            self.size -= size
+            cache = self.get(mapping_id)
+            if isinstance(cache, MappingKeyCache):
+                cache.evict(key_id)
+
+    def clear(self):
+        super().clear()
+        self.lru.clear()
+        self.size = 0
+
+
+class MappingOverlay:
+    """
+    Write buffer in front of one cached mapping. Lookups that miss the buffer fall through to the shared cache and
+    are recorded in the read set of the owning MappingCacheOverlay.
+    """
+
+    def __init__(self, base: MappingCacheDict | MappingKeyCache, mapping_id: Field, reads: set[tuple[Field, Field]]):
+        self.base = base
+        self.mapping_id = mapping_id
+        self.reads = reads
+        # None marks a removed key
+        self.writes: dict[Field, Optional[dict[str, Any]]] = {}
+
+    def __contains__(self, key_id: Field) -> bool:
+        if key_id in self.writes:
+            return self.writes[key_id] is not None
+        self.reads.add((self.mapping_id, key_id))
+        return key_id in self.base
+
+    def __getitem__(self, key_id: Field) -> dict[str, Any]:
+        if key_id in self.writes:
+            entry = self.writes[key_id]
+            if entry is None:
+                raise KeyError(key_id)
+            return entry
+        self.reads.add((self.mapping_id, key_id))
+        return self.base[key_id]
+
+    def __setitem__(self, key_id: Field, entry: dict[str, Any]):
+        self.writes[key_id] = entry
+
+    def pop(self, key_id: Field) -> dict[str, Any]:
+        entry = self[key_id]
+        self.writes[key_id] = None
+        return entry
+
+    async def load(self, db: "Database", cur: Optional[Any], key_ids: list[Field]):
+        if isinstance(self.base, MappingKeyCache):
+            await self.base.load(db, cur, [k for k in key_ids if k not in self.writes])
+
+    def commit(self):
+        for key_id, entry in self.writes.items():
+            if entry is not None:
+                self.base[key_id] = entry
+            elif key_id in self.base:
+                self.base.pop(key_id)
+
+
+class MappingCacheOverlay(dict[Field, Any]):
+    """
+    Transaction-local view of a MappingCache used by speculative finalize. Writes are buffered per mapping until
+    `commit`, and every key read from the shared cache is collected in `reads` so the caller can tell whether an
+    earlier transaction in the block changed something this one depended on.
+    """
+
+    def __init__(self, base: MappingCache):
+        super().__init__()
+        self.base = base
+        self.reads: set[tuple[Field, Field]] = set()
+
+    def __contains__(self, mapping_id: object) -> bool:
+        return mapping_id in self.base
+
+    def __missing__(self, mapping_id: Field) -> MappingOverlay:
+        overlay = MappingOverlay(self.base[mapping_id], mapping_id, self.reads)
+        super().__setitem__(mapping_id, overlay)
+        return overlay
+
+    def __setitem__(self, mapping_id: Field, cache: MappingCacheDict | MappingKeyCache):
+        # whole mappings loaded during finalize hold committed state, so they go straight to the shared cache
+        if mapping_id not in self.base:
+            self.base[mapping_id] = cache
+        super().__setitem__(mapping_id, MappingOverlay(self.base[mapping_id], mapping_id, self.reads))
+
+    def key_cache(self, program_id: str, mapping: str, mapping_id: Field) -> MappingOverlay:
+        self.base.key_cache(program_id, mapping, mapping_id)
+        return self[mapping_id]
+
+    def commit(self) -> set[tuple[Field, Field]]:
+        written: set[tuple[Field, Field]] = set()
+        for mapping_id, overlay in self.items():
+            overlay = cast(MappingOverlay, overlay)
+            overlay.commit()
+            written.update((mapping_id, key_id) for key_id in overlay.writes)
+        return written
+
+
+class ProgramCache:
+    """
+    Parsed programs shared by the explorer, api and webui processes. Each process keeps its own LRU of Program
+    objects in front of a redis hash holding the serialized programs tagged with their edition, so processes that miss
+    their LRU don't have to go to the database. Deploys drop the redis entry, and the chain tip tells the other
+    processes which LRU entries to drop.
+    """
+
+    # renamed from program_cache when entries stopped being pickled, so old entries are never read
+    redis_key = "program_raw_cache"
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self.programs: OrderedDict[str, tuple[int, Program]] = OrderedDict()
+        # last height announced by the chain tip, see block_added
+        self.height = 0
+
+    def __contains__(self, program_id: str) -> bool:
+        return program_id in self.programs
+
+    async def get(self, db: "Database", program_id: str) -> Optional[Program]:
+        if program_id in self.programs:
+            self.programs.move_to_end(program_id)
+            return self.programs[program_id][1]
+        data = await db.redis.hget(self.redis_key, program_id)
+        if data is not None:
+            edition, raw_data = data.split(":", 1)
+            self._put(program_id, int(edition), Program.load(BytesIO(base64.b64decode(raw_data))))
+            return self.programs[program_id][1]
+        res = await db.get_program_with_edition(program_id)
+        if res is None:
             return None
-        program = Program.load(BytesIO(program))
-        global_program_cache[program_id] = program
-        return program
\ No newline at end of file
+        raw_data, edition = res
+        program = Program.load(BytesIO(raw_data))
+        await db.redis.hset(self.redis_key, program_id, f"{edition}:{base64.b64encode(raw_data).decode()}")
+        self._put(program_id, edition, program)
+        return program
+
+    def edition(self, program_id: str) -> int:
+        entry = self.programs.get(program_id)
+        if entry is None:
+            return 0
+        return entry[0]
+
+    def _put(self, program_id: str, edition: int, program: Program):
+        self.programs[program_id] = (edition, program)
+        self.programs.move_to_end(program_id)
+        while len(self.programs) > self.max_size:
+            self.programs.popitem(last=False)
+
+    def evict(self, program_id: str):
+        self.programs.pop(program_id, None)
+
+    def block_added(self, height: int):
+        # deploys of blocks missed while unsubscribed, or of reverted blocks, are unknown, so anything may be stale
+        if height != self.height + 1:
+            self.programs.clear()
+        self.height = height
+
+    def invalidate(self, redis_writer: "RedisWriter", program_id: str):
+        self.evict(program_id)
+        redis_writer.hdel(self.redis_key, program_id)
+
+    async def clear(self, redis_conn: Redis[str]):
+        self.programs.clear()
+        await redis_conn.delete(self.redis_key)
+
+
+global_mapping_cache = MappingCache(int(os.environ.get("MAPPING_CACHE_SIZE_MB", 1024)) * 1024 * 1024)
+global_program_cache = ProgramCache()
+
+async def get_program(db: "Database", program_id: str) -> Program | None:
+    return await global_program_cache.get(db, program_id)
@@ -0,0 +1,59 @@
+from bisect import bisect_left
+
+from db import Database
+from util.chain_tip import chain_tip
+
+
+class ProgramSearchIndex:
+    """
+    Sorted program ids and program addresses (owners and program addresses) for prefix search. The program table is
+    small enough to keep in every web process; deploys are picked up by row id after the chain tip moves.
+    """
+
+    def __init__(self):
+        self.program_ids: list[str] = []
+        self.addresses: list[str] = []
+        self.last_id = 0
+        self.stale = True
+        chain_tip.on_block_added(self.block_added)
+
+    def block_added(self, _: int):
+        self.stale = True
+
+    async def refresh(self, db: Database):
+        # without the block added subscription every search checks for new programs
+        if not self.stale and chain_tip.listening:
+            return
+        self.stale = False
+        for row in await db.get_program_search_entries(self.last_id):
+            self._insert(self.program_ids, row["program_id"])
+            if row["owner"] is not None:
+                self._insert(self.addresses, row["owner"])
+            self._insert(self.addresses, row["address"])
+            self.last_id = row["id"]
+
+    @staticmethod
+    def _insert(items: list[str], item: str):
+        index = bisect_left(items, item)
+        if index == len(items) or items[index] != item:
+            items.insert(index, item)
+
+    @staticmethod
+    def _prefix_match(items: list[str], prefix: str, limit: int) -> list[str]:
+        result: list[str] = []
+        index = bisect_left(items, prefix)
+        while index < len(items) and len(result) < limit and items[index].startswith(prefix):
+            result.append(items[index])
+            index += 1
+        return result
+
+    async def search_program(self, db: Database, program_id: str, limit: int) -> list[str]:
+        await self.refresh(db)
+        return self._prefix_match(self.program_ids, program_id, limit)
+
+    async def search_address(self, db: Database, address: str, limit: int) -> list[str]:
+        await self.refresh(db)
+        return self._prefix_match(self.addresses, address, limit)
+
+
+program_search_index = ProgramSearchIndex()
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+import simplejson
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from aleo_types import Transaction, ExecuteTransaction, DeployTransaction
+from db import Database
+
+TOPICS = {"block", "transaction"}
+
+
+def _dumps(data: object) -> str:
+    return simplejson.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"), use_decimal=True)
+
+
+async def publish_unconfirmed_transaction(db: Database, transaction: Transaction):
+    data: dict[str, object] = {
+        "transaction_id": str(transaction.id),
+        "type": transaction.type.name,
+        "first_seen": int(time.time()),
+    }
+    if isinstance(transaction, ExecuteTransaction):
+        root_transition = transaction.execution.transitions[-1]
+        data["root_transition"] = f"{root_transition.program_id}/{root_transition.function_name}"
+    elif isinstance(transaction, DeployTransaction):
+        data["program_id"] = str(transaction.deployment.program.id)
+    await db.redis.publish(db.unconfirmed_transaction_channel, _dumps(data))
+
+
+class StreamClient:
+    # events a subscriber may fall behind by before it is dropped
+    max_pending = 64
+    # seconds between keepalives, also how long a closed connection may go unnoticed
+    keepalive = 15.0
+
+    def __init__(self, topics: set[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(self.max_pending)
+        self.lagged = False
+        self.closed = False
+
+    async def events(self) -> AsyncIterator[Optional[tuple[str, str]]]:
+        # yields (topic, json) events, None when there was nothing to send for `keepalive` seconds
+        while not self.closed and not (self.lagged and self.queue.empty()):
+            try:
+                yield await asyncio.wait_for(self.queue.get(), self.keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def _parse_topics(value: Optional[str]) -> Optional[set[str]]:
+    if value is None:
+        return set(TOPICS)
+    topics = set(value.split(","))
+    if not topics <= TOPICS:
+        return None
+    return topics
+
+
+async def _wait_disconnect(websocket: WebSocket, client: StreamClient):
+    # clients don't send anything, but the disconnect only shows up on the receiving side
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        client.closed = True
+
+
+class StreamHub:
+    """
+    Fans new blocks and unconfirmed transactions out to the stream subscribers of one web process. The hub subscribes to
+    the explorer's pub/sub channels when the first client connects, and reads each new block once no matter how many
+    clients there are. A client whose queue is full is dropped instead of slowing down everyone else.
+    """
+
+    # blocks sent at most when several land between two notifications
+    max_backfill = 10
+
+    def __init__(self):
+        self.clients: set[StreamClient] = set()
+        self.listener: Optional[asyncio.Task[None]] = None
+        self.last_height = 0
+
+    def subscribe(self, db: Database, topics: set[str]) -> StreamClient:
+        if self.listener is None:
+            self.listener = asyncio.create_task(self.listen(db))
+        client = StreamClient(topics)
+        self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client: StreamClient):
+        self.clients.discard(client)
+
+    def broadcast(self, topic: str, data: str):
+        for client in list(self.clients):
+            if topic not in client.topics:
+                continue
+            try:
+                client.queue.put_nowait((topic, data))
+            except asyncio.QueueFull:
+                client.lagged = True
+                self.clients.discard(client)
+
+    async def block_added(self, db: Database, height: int):
+        if height <= self.last_height:
+            # a revert announces a lower tip, blocks after it are sent again once they are re-synced
+            self.last_height = height
+            return
+        # blocks missed while idle or disconnected are not replayed, a backlog would only get new clients dropped
+        start = max(self.last_height, height - self.max_backfill)
+        self.last_height = height
+        if not self.clients:
+            return
+        blocks = await db.get_blocks_range_fast(height, start)
+        for block in reversed(blocks):
+            self.broadcast("block", _dumps(block))
+
+    async def listen(self, db: Database):
+        while True:
+            try:
+                async with db.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(db.block_added_channel, db.unconfirmed_transaction_channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        if message["channel"] == db.block_added_channel:
+                            await self.block_added(db, simplejson.loads(message["data"])["height"])
+                        else:
+                            self.broadcast("transaction", message["data"])
+            except Exception as e:
+                print("stream hub listener error:", e)
+            await asyncio.sleep(5)
+
+    async def sse_response(self, request: Request) -> Response:
+        topics = _parse_topics(request.query_params.get("topics"))
+        if topics is None:
+            return PlainTextResponse(f"unknown topic, available: {','.join(sorted(TOPICS))}", status_code=400)
+        db: Database = request.app.state.db
+        client = self.subscribe(db, topics)
+
+        async def body() -> AsyncIterator[str]:
+            try:
+                async for event in client.events():
+                    if event is None:
+                        yield ": keepalive\n\n"
+                    else:
+                        yield f"event: {event[0]}\ndata: {event[1]}\n\n"
+                yield "event: lagged\ndata: {}\n\n"
+            finally:
+                self.unsubscribe(client)
+
+        return StreamingResponse(
+            body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def websocket(self, websocket: WebSocket):
+        topics = _parse_topics(websocket.query_params.get("topics"))
+        if topics is None:
+            await websocket.close(code=1008, reason=f"unknown topic, available: {','.join(sorted(TOPICS))}")
+            return
+        db: Database = websocket.app.state.db
+        client = self.subscribe(db, topics)
+        receiver: Optional[asyncio.Task[None]] = None
+        try:
+            await websocket.accept()
+            receiver = asyncio.create_task(_wait_disconnect(websocket, client))
+            async for event in client.events():
+                if event is not None:
+                    await websocket.send_text(f'{{"topic":"{event[0]}","data":{event[1]}}}')
+            if not client.closed:
+                await websocket.close(code=1013, reason="client lagged behind")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if receiver is not None:
+                receiver.cancel()
+            self.unsubscribe(client)
+
+
+stream_hub = StreamHub()
@@ -1,4 +1,3 @@
-import asyncio
 import os
 import time
 from typing import Any
@@ -8,6 +7,7 @@ import simplejson
 from starlette.responses import Response
 
 from db import Database
+from util.chain_tip import chain_tip
 
 
 class SJSONResponse(Response):
@@ -36,10 +36,7 @@ async def get_remote_height(session: aiohttp.ClientSession, rpc_root: str) -> st
 
 
 async def out_of_sync_check(session: aiohttp.ClientSession, db: Database):
-    last_timestamp, last_height = await asyncio.gather(
-        db.get_latest_block_timestamp(),
-        db.get_latest_height()
-    )
+    last_height, _, last_timestamp = await chain_tip.get(db)
     now = int(time.time())
     maintenance_info = os.environ.get("MAINTENANCE_INFO")
     out_of_sync = now - last_timestamp > 120
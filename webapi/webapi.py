@@ -10,13 +10,15 @@ from dotenv import load_dotenv
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.requests import Request
-from starlette.routing import Route
+from starlette.routing import Route, WebSocketRoute
 
 from db import Database
 from middleware.asgi_logger import AccessLoggerMiddleware
 from middleware.auth import AuthMiddleware
 from middleware.server_timing import ServerTimingMiddleware
+from util.chain_tip import chain_tip
 from util.set_proc_title import set_proc_title
+from util.stream import stream_hub
 from .block_routes import recent_blocks_route
 from .error_routes import bad_request, not_found, internal_error
 from .utils import out_of_sync_check, SJSONResponse
@@ -49,6 +51,9 @@ routes = [
     Route("/sync", sync_info_route),
 
     Route("/block/recent", recent_blocks_route),
+
+    Route("/stream", stream_hub.sse_response),
+    WebSocketRoute("/stream/ws", stream_hub.websocket),
 ]
 
 exc_handlers = {
@@ -70,6 +75,7 @@ async def startup():
     await db.connect()
     # noinspection PyUnresolvedReferences
     app.state.db = db
+    chain_tip.start(db)
     # noinspection PyUnresolvedReferences
     # app.state.lns.connect(os.environ.get("P2P_NODE_HOST", "127.0.0.1"), int(os.environ.get("P2P_NODE_PORT", "4130")), None)
     app.state.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=1))
@@ -20,10 +20,13 @@ from aleo_types import u32, Transition, ExecuteTransaction, PrivateTransitionInp
     NodeType, cached_get_mapping_id, cached_get_key_id, FeeComponent, Fee
 from db import Database
 from node.light_node import LightNodeState
+from util.chain_tip import chain_tip
 from util.global_cache import get_program
+from util.search_index import program_search_index
 from .classes import UIAddress
 from .template import htmx_template
-from .utils import function_signature, out_of_sync_check, function_definition, get_relative_time
+from .utils import function_signature, out_of_sync_check, function_definition, get_relative_time, \
+    get_page_cursor
 
 try:
     from line_profiler import profile
@@ -179,6 +182,12 @@ async def block_route(request: Request):
         "all_validators": all_validators,
         "sync_info": sync_info,
     }
+    if sync_info["out_of_sync"]:
+        # the banner shows live heights
+        return ctx, {'Cache-Control': 'no-cache'}
+    if height < sync_info["explorer_height"]:
+        # blocks below the tip never change, the response cache keeps them until evicted or a revert
+        return ctx, {'Cache-Control': 'public, max-age=3600, immutable'}
     return ctx, {'Cache-Control': 'public, max-age=3600'}
 
 
@@ -684,18 +693,20 @@ async def search_route(request: Request):
         return RedirectResponse(f"/block?h={height}{remaining_query}", status_code=302)
     except ValueError:
         pass
+    # matches listed at most, one more is fetched to tell whether there are too many
+    limit = 50
     if query.startswith("aprivatekey1zkp"):
         raise HTTPException(status_code=400, detail=">>> YOU HAVE LEAKED YOUR PRIVATE KEY <<< Please throw it away and generate a new one.")
     elif query.startswith("ab1"):
         # block hash
-        blocks = await db.search_block_hash(query)
+        blocks = await db.search_block_hash(query, limit + 1)
         if not blocks:
             raise HTTPException(status_code=404, detail="Block not found")
         if len(blocks) == 1:
             return RedirectResponse(f"/block?bh={blocks[0]}{remaining_query}", status_code=302)
         too_many = False
-        if len(blocks) > 50:
-            blocks = blocks[:50]
+        if len(blocks) > limit:
+            blocks = blocks[:limit]
             too_many = True
         ctx = {
             "query": query,
@@ -706,14 +717,14 @@ async def search_route(request: Request):
         return ctx, {'Cache-Control': 'public, max-age=15'}
     elif query.startswith("at1"):
         # transaction id
-        transactions = await db.search_transaction_id(query)
+        transactions = await db.search_transaction_id(query, limit + 1)
         if not transactions:
             raise HTTPException(status_code=404, detail="Transaction not found")
         if len(transactions) == 1:
             return RedirectResponse(f"/transaction?id={transactions[0]}{remaining_query}", status_code=302)
         too_many = False
-        if len(transactions) > 50:
-            transactions = transactions[:50]
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
             too_many = True
         ctx = {
             "query": query,
@@ -724,14 +735,14 @@ async def search_route(request: Request):
         return ctx, {'Cache-Control': 'public, max-age=15'}
     elif query.startswith("au1"):
         # transition id
-        transitions = await db.search_transition_id(query)
+        transitions = await db.search_transition_id(query, limit + 1)
         if not transitions:
             raise HTTPException(status_code=404, detail="Transition not found")
         if len(transitions) == 1:
             return RedirectResponse(f"/transition?id={transitions[0]}{remaining_query}", status_code=302)
         too_many = False
-        if len(transitions) > 50:
-            transitions = transitions[:50]
+        if len(transitions) > limit:
+            transitions = transitions[:limit]
             too_many = True
         ctx = {
             "query": query,
@@ -742,14 +753,16 @@ async def search_route(request: Request):
         return ctx, {'Cache-Control': 'public, max-age=15'}
     elif query.startswith("aleo1"):
         # address
-        addresses = await db.search_address(query)
+        addresses = sorted(set(await db.search_address(query, limit + 1)).union(
+            await program_search_index.search_address(db, query, limit + 1)
+        ))
         if not addresses:
             raise HTTPException(status_code=404, detail="Address not found. See FAQ for more info.")
         if len(addresses) == 1:
             return RedirectResponse(f"/address?a={addresses[0]}{remaining_query}", status_code=302)
         too_many = False
-        if len(addresses) > 50:
-            addresses = addresses[:50]
+        if len(addresses) > limit:
+            addresses = addresses[:limit]
             too_many = True
         ctx = {
             "query": query,
@@ -767,13 +780,13 @@ async def search_route(request: Request):
         return RedirectResponse(f"/address?a={address}{remaining_query}", status_code=302)
     else:
         # have to do this to support program name prefix search
-        programs = await db.search_program(query)
+        programs = await program_search_index.search_program(db, query, limit + 1)
         if programs:
             if len(programs) == 1:
                 return RedirectResponse(f"/program?id={programs[0]}{remaining_query}", status_code=302)
             too_many = False
-            if len(programs) > 50:
-                programs = programs[:50]
+            if len(programs) > limit:
+                programs = programs[:limit]
                 too_many = True
             ctx = {
                 "query": query,
@@ -782,6 +795,13 @@ async def search_route(request: Request):
                 "too_many": too_many,
             }
             return ctx, {'Cache-Control': 'public, max-age=15'}
+        # bare ANS names without the suffix
+        try:
+            address = await util.arc0137.get_address_from_domain(db, f"{query}.ans")
+        except ValueError:
+            address = None
+        if address:
+            return RedirectResponse(f"/address?a={address}{remaining_query}", status_code=302)
     raise HTTPException(status_code=404, detail="Unknown object type or searching is not supported")
 
 
@@ -796,7 +816,7 @@ async def blocks_route(request: Request):
             page = int(page)
     except:
         raise HTTPException(status_code=400, detail="Invalid page")
-    total_blocks = await db.get_latest_height()
+    total_blocks = await chain_tip.get_height(db)
     if not total_blocks:
         raise HTTPException(status_code=550, detail="No blocks found")
     total_pages = (total_blocks // 50) + 1
@@ -826,7 +846,7 @@ async def validators_route(request: Request):
             page = int(page)
     except:
         raise HTTPException(status_code=400, detail="Invalid page")
-    latest_height = await db.get_latest_height()
+    latest_height = await chain_tip.get_height(db)
     total_validators = await db.get_validator_count_at_height(latest_height)
     if not total_validators:
         raise HTTPException(status_code=550, detail="No validators found")
@@ -871,8 +891,18 @@ async def unconfirmed_transactions_route(request: Request):
     total_pages = (total_transactions // 50) + 1
     if page < 1 or page > total_pages:
         raise HTTPException(status_code=400, detail="Invalid page")
-    start = 50 * (page - 1)
-    data = await db.get_unconfirmed_transactions_range(start, start + 50)
+    # cursor is "<first_seen>.<transaction id>" of the last transaction on the previous page
+    cursor = get_page_cursor(request)
+    if cursor is not None:
+        try:
+            first_seen, transaction_id = cursor.split(".", 1)
+            first_seen = int(first_seen)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        data = await db.get_unconfirmed_transactions_range(0, 50, cursor=(first_seen, transaction_id))
+    else:
+        start = 50 * (page - 1)
+        data = await db.get_unconfirmed_transactions_range(start, start + 50)
     transactions: list[dict[str, Any]] = []
     for tx in data:
         transactions.append({
@@ -880,12 +910,16 @@ async def unconfirmed_transactions_route(request: Request):
             "type": tx.type.name,
             "first_seen": await db.get_transaction_first_seen(str(tx.id)),
         })
+    next_cursor = None
+    if transactions and transactions[-1]["first_seen"] is not None:
+        next_cursor = f"{transactions[-1]['first_seen']}.{transactions[-1]['tx_id']}"
 
     sync_info = await out_of_sync_check(request.app.state.session, db)
     ctx = {
         "transactions": transactions,
         "page": page,
         "total_pages": total_pages,
+        "next_cursor": next_cursor,
         "sync_info": sync_info,
     }
     return ctx, {'Cache-Control': 'public, max-age=5'}
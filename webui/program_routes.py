@@ -1,4 +1,3 @@
-from io import BytesIO
 from typing import Any, Optional
 
 import aleo_explorer_rust
@@ -11,8 +10,9 @@ import disasm.aleo
 from aleo_types import DeployTransaction, Deployment, Program, \
     AcceptedDeploy
 from db import Database
+from util.global_cache import get_program
 from .template import htmx_template
-from .utils import function_signature, out_of_sync_check
+from .utils import function_signature, out_of_sync_check, get_int_page_cursor
 
 
 @htmx_template("programs.jinja2")
@@ -35,8 +35,12 @@ async def programs_route(request: Request):
     total_pages = (total_programs // 50) + 1
     if page < 1 or page > total_pages:
         raise HTTPException(status_code=400, detail="Invalid page")
-    start = 50 * (page - 1)
-    programs = await db.get_programs(start, start + 50, no_helloworld=no_helloworld)
+    cursor = get_int_page_cursor(request)
+    if cursor is not None:
+        programs = await db.get_programs(0, 50, no_helloworld=no_helloworld, cursor=cursor)
+    else:
+        start = 50 * (page - 1)
+        programs = await db.get_programs(start, start + 50, no_helloworld=no_helloworld)
     builtin_programs = await db.get_builtin_programs()
 
     sync_info = await out_of_sync_check(request.app.state.session, db)
@@ -44,6 +48,7 @@ async def programs_route(request: Request):
         "programs": programs + builtin_programs,
         "page": page,
         "total_pages": total_pages,
+        "next_cursor": programs[-1]["id"] if programs else None,
         "no_helloworld": no_helloworld,
         "sync_info": sync_info,
     }
@@ -70,10 +75,10 @@ async def program_route(request: Request):
         deployment: Deployment = transaction.deployment
         program: Program = deployment.program
     else:
-        program_bytes = await db.get_program(program_id)
-        if not program_bytes:
+        stored_program = await get_program(db, program_id)
+        if stored_program is None:
             raise HTTPException(status_code=404, detail="Program not found")
-        program = Program.load(BytesIO(program_bytes))
+        program = stored_program
         transaction = None
     functions: list[str] = []
     for f in program.functions.keys():
@@ -146,8 +151,12 @@ async def similar_programs_route(request: Request):
     total_pages = (total_programs // 50) + 1
     if page < 1 or page > total_pages:
         raise HTTPException(status_code=400, detail="Invalid page")
-    start = 50 * (page - 1)
-    programs = await db.get_programs_with_feature_hash(feature_hash, start, start + 50)
+    cursor = get_int_page_cursor(request)
+    if cursor is not None:
+        programs = await db.get_programs_with_feature_hash(feature_hash, 0, 50, cursor=cursor)
+    else:
+        start = 50 * (page - 1)
+        programs = await db.get_programs_with_feature_hash(feature_hash, start, start + 50)
 
     sync_info = await out_of_sync_check(request.app.state.session, db)
     ctx = {
@@ -155,6 +164,7 @@ async def similar_programs_route(request: Request):
         "programs": programs,
         "page": page,
         "total_pages": total_pages,
+        "next_cursor": programs[-1]["id"] if programs else None,
         "sync_info": sync_info,
     }
     return ctx, {'Cache-Control': 'public, max-age=15'}
@@ -166,7 +176,7 @@ async def upload_source_route(request: Request):
     program_id = request.query_params.get("id")
     if program_id is None:
         raise HTTPException(status_code=400, detail="Missing program id")
-    program = await db.get_program(program_id)
+    program = await get_program(db, program_id)
     if program is None:
         raise HTTPException(status_code=404, detail="Program not found")
     if request.method == "POST":
@@ -180,7 +190,6 @@ async def upload_source_route(request: Request):
         has_leo_source = True
     else:
         has_leo_source = False
-        program = Program.load(BytesIO(program))
         for i in program.imports:
             imports.append(str(i.program_id.name))
             if i.program_id != "credits.aleo":
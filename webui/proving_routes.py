@@ -1,3 +1,4 @@
+import asyncio
 import time
 from io import BytesIO
 from typing import Any, cast
@@ -10,7 +11,7 @@ from aleo_types import PlaintextValue, LiteralPlaintext, Literal, \
 from db import Database
 from .classes import UIAddress
 from .template import htmx_template
-from .utils import out_of_sync_check
+from .utils import out_of_sync_check, get_int_page_cursor
 
 
 @htmx_template("calc.jinja2")
@@ -74,9 +75,6 @@ async def address_route(request: Request):
     address = request.query_params.get("a")
     if not address:
         raise HTTPException(status_code=400, detail="Missing address")
-    solutions = await db.get_recent_solutions_by_address(address)
-    programs = await db.get_recent_programs_by_address(address)
-    transitions = await db.get_address_recent_transitions(address)
     address_key = LiteralPlaintext(
         literal=Literal(
             type_=Literal.Type.Address,
@@ -84,22 +82,32 @@ async def address_route(request: Request):
         )
     )
     address_key_bytes = address_key.dump()
-    account_key_id = cached_get_key_id("credits.aleo", "account", address_key_bytes)
-    bonded_key_id = cached_get_key_id("credits.aleo", "bonded", address_key_bytes)
-    unbonding_key_id = cached_get_key_id("credits.aleo", "unbonding", address_key_bytes)
-    committee_key_id = cached_get_key_id("credits.aleo", "committee", address_key_bytes)
-    delegated_key_id = cached_get_key_id("credits.aleo", "delegated", address_key_bytes)
-    withdraw_key_id = cached_get_key_id("credits.aleo", "withdraw", address_key_bytes)
-    public_balance_bytes = await db.get_mapping_value("credits.aleo", "account", account_key_id)
-    bond_state_bytes = await db.get_mapping_value("credits.aleo", "bonded", bonded_key_id)
-    unbond_state_bytes = await db.get_mapping_value("credits.aleo", "unbonding", unbonding_key_id)
-    committee_state_bytes = await db.get_mapping_value("credits.aleo", "committee", committee_key_id)
-    delegated_bytes = await db.get_mapping_value("credits.aleo", "delegated", delegated_key_id)
-    stake_reward = await db.get_address_stake_reward(address)
-    transfer_in = await db.get_address_transfer_in(address)
-    transfer_out = await db.get_address_transfer_out(address)
-    fee = await db.get_address_total_fee(address)
-    program_name = await db.get_program_name_from_address(address)
+    mapping_keys = [
+        (mapping, cached_get_key_id("credits.aleo", mapping, address_key_bytes))
+        for mapping in ["account", "bonded", "unbonding", "committee", "delegated", "withdraw"]
+    ]
+    # everything below is independent, so the page waits for the slowest query instead of all of them in turn
+    # (nested, the typed gather overloads stop at six awaitables)
+    (solutions, programs, transitions, mapping_values), (stats, program_name, program_count) = await asyncio.gather(
+        asyncio.gather(
+            db.get_recent_solutions_by_address(address),
+            db.get_recent_programs_by_address(address),
+            db.get_address_recent_transitions(address),
+            db.get_mapping_values_by_key_ids("credits.aleo", mapping_keys),
+        ),
+        asyncio.gather(
+            db.get_address_stats(address),
+            db.get_program_name_from_address(address),
+            db.get_program_count_by_address(address),
+        ),
+    )
+    public_balance_bytes, bond_state_bytes, unbond_state_bytes, committee_state_bytes, delegated_bytes, withdraw_bytes = (
+        mapping_values[k] for k in mapping_keys
+    )
+    stake_reward = stats["address_stake_reward"]
+    transfer_in = stats["address_transfer_in"]
+    transfer_out = stats["address_transfer_out"]
+    fee = stats["address_fee"]
 
     if (len(solutions) == 0
         and len(programs) == 0
@@ -115,16 +123,28 @@ async def address_route(request: Request):
         and program_name is None
     ):
         raise HTTPException(status_code=404, detail="Address not found")
-    if len(solutions) > 0:
-        solution_count = await db.get_solution_count_by_address(address)
-        total_rewards = await db.get_puzzle_reward_by_address(address)
-        speed, interval = await db.get_address_speed(address)
-    else:
-        solution_count = 0
-        total_rewards = 0
-        speed = 0
-        interval = 0
-    program_count = await db.get_program_count_by_address(address)
+
+    # second round, for what depends on the results above; all of it is awaited here so nothing is left running
+    # when the page fails further down
+    async def solution_stats():
+        if len(solutions) == 0:
+            return 0, 0, (0, 0)
+        return await asyncio.gather(
+            db.get_solution_count_by_address(address),
+            db.get_puzzle_reward_by_address(address),
+            db.get_address_speed(address),
+        )
+
+    async def validator_stats():
+        if committee_state_bytes is None:
+            return None
+        return await asyncio.gather(db.get_bonded_mapping_unchecked(), db.get_validator_uptime(address))
+
+    deploy_infos, (solution_count, total_rewards, (speed, interval)), validator_state = await asyncio.gather(
+        asyncio.gather(*[db.get_deploy_info_by_program_id(program) for program in programs]),
+        solution_stats(),
+        validator_stats(),
+    )
     interval_text = {
         0: "never",
         900: "15 minutes",
@@ -145,8 +165,7 @@ async def address_route(request: Request):
             "target_sum": solution["target_sum"],
         })
     recent_programs: list[dict[str, Any]] = []
-    for program in programs:
-        deploy_info = await db.get_deploy_info_by_program_id(program)
+    for program, deploy_info in zip(programs, deploy_infos):
         if deploy_info is None:
             raise HTTPException(status_code=550, detail="Deploy info not found")
         recent_programs.append({
@@ -173,7 +192,6 @@ async def address_route(request: Request):
             "validator": str(validator.literal.primitive),
             "amount": int(cast(Int, amount.literal.primitive)),
         }
-        withdraw_bytes = await db.get_mapping_value("credits.aleo", "withdraw", withdraw_key_id)
         if withdraw_bytes is None:
             withdrawal_address = None
         else:
@@ -191,7 +209,7 @@ async def address_route(request: Request):
             "amount": int(cast(Int, amount.literal.primitive)),
             "height": int(cast(u64, height.literal.primitive)),
         }
-    if committee_state_bytes is None:
+    if committee_state_bytes is None or validator_state is None:
         committee_state = None
         address_stakes = None
         uptime = None
@@ -204,7 +222,7 @@ async def address_route(request: Request):
             "commission": int(cast(Int, commission.literal.primitive)),
             "is_open": bool(is_open.literal.primitive),
         }
-        bonded_mapping = await db.get_bonded_mapping_unchecked()
+        bonded_mapping, uptime = validator_state
         bonded_mapping = sorted(bonded_mapping.items(), key=lambda x: x[1][1], reverse=True)
         address_stakes = {}
         for staker_addr, (validator_addr, stake_amount) in bonded_mapping:
@@ -212,7 +230,6 @@ async def address_route(request: Request):
                 address_stakes[str(staker_addr)] = int(stake_amount)
                 if len(address_stakes) >= 50:
                     break
-        uptime = await db.get_validator_uptime(address)
     if delegated_bytes is None:
         delegated = None
     else:
@@ -230,15 +247,12 @@ async def address_route(request: Request):
 
     recent_transitions: list[dict[str, Any]] = []
     for transition_data in transitions:
-        transition = await db.get_transition(transition_data["transition_id"])
-        if transition is None:
-            raise HTTPException(status_code=550, detail="Transition not found")
         recent_transitions.append({
             "transition_id": transition_data["transition_id"],
             "height": transition_data["height"],
             "timestamp": transition_data["timestamp"],
-            "program_id": transition.program_id,
-            "function_name": transition.function_name,
+            "program_id": transition_data["program_id"],
+            "function_name": transition_data["function_name"],
         })
 
     sync_info = await out_of_sync_check(request.app.state.session, db)
@@ -290,8 +304,12 @@ async def address_solution_route(request: Request):
     total_pages = (solution_count // 50) + 1
     if page < 1 or page > total_pages:
         raise HTTPException(status_code=400, detail="Invalid page")
-    start = 50 * (page - 1)
-    solutions = await db.get_solution_by_address(address, start, start + 50)
+    cursor = get_int_page_cursor(request)
+    if cursor is not None:
+        solutions = await db.get_solution_by_address(address, 0, 50, cursor=cursor)
+    else:
+        start = 50 * (page - 1)
+        solutions = await db.get_solution_by_address(address, start, start + 50)
     data: list[dict[str, Any]] = []
     for solution in solutions:
         data.append({
@@ -309,6 +327,7 @@ async def address_solution_route(request: Request):
         "solutions": data,
         "page": page,
         "total_pages": total_pages,
+        "next_cursor": solutions[-1]["id"] if solutions else None,
         "sync_info": sync_info,
     }
     return ctx, {'Cache-Control': 'public, max-age=15'}
\ No newline at end of file
@@ -1,10 +1,13 @@
-import asyncio
 import os
 import time
+from typing import Optional
 
 import aiohttp
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
 
 from db import Database
+from util.chain_tip import chain_tip
 
 
 def get_relative_time(timestamp: int):
@@ -27,6 +30,19 @@ def get_relative_time(timestamp: int):
     return f"{int(delta)} hours ago"
 
 
+def get_page_cursor(request: Request) -> Optional[str]:
+    # "c" is set by the next page links of list pages, see the nav macro
+    return request.query_params.get("c")
+
+def get_int_page_cursor(request: Request) -> Optional[int]:
+    cursor = get_page_cursor(request)
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 async def get_remote_height(session: aiohttp.ClientSession, rpc_root: str) -> str:
     try:
         async with session.get(f"{rpc_root}/mainnet/latest/height") as resp:
@@ -40,10 +56,7 @@ async def get_remote_height(session: aiohttp.ClientSession, rpc_root: str) -> st
 
 
 async def out_of_sync_check(session: aiohttp.ClientSession, db: Database):
-    last_timestamp, last_height = await asyncio.gather(
-        db.get_latest_block_timestamp(),
-        db.get_latest_height()
-    )
+    last_height, _, last_timestamp = await chain_tip.get(db)
     now = int(time.time())
     maintenance_info = os.environ.get("MAINTENANCE_INFO")
     out_of_sync = now - last_timestamp > 120
@@ -14,7 +14,9 @@ from starlette.staticfiles import StaticFiles
 from middleware.asgi_logger import AccessLoggerMiddleware
 from middleware.htmx import HtmxMiddleware
 from middleware.minify import MinifyMiddleware
+from middleware.response_cache import ResponseCacheMiddleware
 from middleware.server_timing import ServerTimingMiddleware
+from util.chain_tip import chain_tip
 from util.set_proc_title import set_proc_title
 from .chain_routes import *
 from .error_routes import *
@@ -179,6 +181,7 @@ async def startup():
     await db.connect()
     # noinspection PyUnresolvedReferences
     app.state.db = db
+    chain_tip.start(db)
     # noinspection PyUnresolvedReferences
     app.state.lns.connect(os.environ.get("P2P_NODE_HOST", "127.0.0.1"), int(os.environ.get("P2P_NODE_PORT", "4133")), None)
     app.state.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=1))
@@ -194,6 +197,7 @@ app = Starlette(
     middleware=[
         Middleware(AccessLoggerMiddleware, format=log_format),
         Middleware(HtmxMiddleware),
+        Middleware(ResponseCacheMiddleware),
         Middleware(MinifyMiddleware),
         Middleware(ServerTimingMiddleware),
     ]